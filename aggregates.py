@@ -0,0 +1,83 @@
+"""
+Grouped counts of tasks computed in SQL.
+
+Tasks can be grouped by foreign keys (GROUP_COLUMNS) and by date buckets
+of create_date or end_date, written as '<column>:<bucket>', eg.
+'create_date:month'. Each group has number of tasks and min/max of their
+create_date and end_date.
+"""
+from sqlalchemy import func
+from database import db_session
+from models import Task
+
+GROUP_COLUMNS = ('status_id', 'type_id', 'creator_id', 'contractor_id')
+DATE_COLUMNS = ('create_date', 'end_date')
+DATE_BUCKETS = ('day', 'month', 'year')
+
+# Bucket -> strftime format used on SQLite, which has no date_trunc. Result
+# looks the same as ISO format of datetime returned by PostgreSQL.
+SQLITE_FORMATS = dict(
+    day='%Y-%m-%dT00:00:00',
+    month='%Y-%m-01T00:00:00',
+    year='%Y-01-01T00:00:00',
+)
+
+
+def date_bucket(column, bucket):
+    """Expression which truncates column to start of day, month or year."""
+    if db_session.bind.dialect.name == 'sqlite':
+        return func.strftime(SQLITE_FORMATS[bucket], column)
+
+    return func.date_trunc(bucket, column)
+
+
+def group_expression(name):
+    """
+    Expression for group name, see module docstring.
+
+    Raises ValueError for unknown name.
+    """
+    if name in GROUP_COLUMNS:
+        return getattr(Task, name)
+
+    column, _, bucket = name.partition(':')
+
+    if column not in DATE_COLUMNS or bucket not in DATE_BUCKETS:
+        raise ValueError('Invalid group ' + name)
+
+    return date_bucket(getattr(Task, column), bucket)
+
+
+def count_tasks(query):
+    """Number of tasks matching query, without loading them."""
+    return query.order_by(None).with_entities(func.count(Task.id)).scalar()
+
+
+def aggregate_tasks(query, group_by):
+    """
+    List of dicts with values of groups in group_by, count and min/max of
+    dates of tasks matching query, ordered by groups.
+    """
+    groups = [group_expression(name).label('group_%d' % i)
+              for i, name in enumerate(group_by)]
+
+    query = query.order_by(None).with_entities(
+        *groups + [
+            func.count(Task.id),
+            func.min(Task.create_date),
+            func.max(Task.create_date),
+            func.min(Task.end_date),
+            func.max(Task.end_date),
+        ]
+    ).group_by(*groups).order_by(*groups)
+
+    rv = []
+
+    for row in query:
+        values = list(row)
+        item = dict(zip(group_by, values[:len(groups)]))
+        item['count'], item['min_create_date'], item['max_create_date'], \
+            item['min_end_date'], item['max_end_date'] = values[len(groups):]
+        rv.append(item)
+
+    return rv
@@ -0,0 +1,188 @@
+"""
+Filtering and sorting tasks by values of their attributes.
+
+Attribute values are EAV rows, so instead of joining task_attribute_values
+once per attribute, all conditions are answered by one grouped scan of
+the table: rows matching any condition are grouped by task and a task
+matches if it has a matching row for every attribute. Each condition is
+range of task_attribute_id, served by the composite index of it and value
+prefix (values are unbounded text). Equality conditions on strings are
+compared on the prefix too, so the index narrows them to the value, see
+_value_clauses. Sorting uses one pivot subquery with a column per sort
+attribute.
+
+Values of 'int' and 'float' attributes are compared as numbers, using
+number_value column and its (task_attribute_id, number_value) index.
+"""
+from sqlalchemy import and_, case, func, or_, select
+from cache import reference_cache
+from models import Task, TaskAttribute, TaskAttributeValue, NUMERIC_TYPES, \
+    VALUE_INDEX_LENGTH, attribute_type_name, recoerce_values, value_prefix, \
+    value_rest
+from utils import get_operator, operator_name
+
+
+def is_numeric(attribute_id):
+    """
+    True if values of attribute are numbers.
+
+    Raises ValueError for unknown attribute.
+    """
+    if reference_cache.get(TaskAttribute, attribute_id) is None:
+        raise ValueError('Unknown attribute %s' % attribute_id)
+
+    return attribute_type_name(attribute_id) in NUMERIC_TYPES
+
+
+def value_column(attribute_id):
+    """Value column compared for attribute, number_value if numeric."""
+    if is_numeric(attribute_id):
+        return TaskAttributeValue.number_value
+
+    return TaskAttributeValue.value
+
+
+# Operators which match text, not allowed for numeric attributes.
+TEXT_OPERATORS = ('prefix', 'contains')
+
+
+def _coerce(attribute_id, value, operator):
+    if not is_numeric(attribute_id):
+        return value
+
+    if operator in TEXT_OPERATORS:
+        raise ValueError('Operator %s is not allowed for numeric attribute %s'
+                         % (operator, attribute_id))
+
+    try:
+        if isinstance(value, list):
+            return [float(item) for item in value]
+
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError('Attribute %s expects numbers' % attribute_id)
+
+
+def _is_text(value):
+    values = value if isinstance(value, list) else [value]
+
+    return all(isinstance(item, str) for item in values)
+
+
+def _value_clauses(name, operator, attribute_id, value, param):
+    """
+    Clauses of condition on value of attribute and their bind parameters.
+
+    Equality of strings is compared by value_prefix, served by the index,
+    and value_rest. Not by value itself: SQLite would substitute equal
+    value into value_prefix, which then does not match the index.
+    """
+    arity = operator.arity and operator.arity(value)
+
+    if is_numeric(attribute_id) or not _is_text(value) or \
+            name not in ('=', 'in'):
+        return ([operator.build(value_column(attribute_id), param, arity)],
+                operator.bind(param, value))
+
+    if name == 'in':
+        prefixes = [item[:VALUE_INDEX_LENGTH] for item in value]
+
+        return ([operator.build(TaskAttributeValue.value, param, arity),
+                 operator.build(value_prefix, param + '_prefix', arity)],
+                dict(operator.bind(param, value),
+                     **operator.bind(param + '_prefix', prefixes)))
+
+    return ([operator.build(value_prefix, param + '_prefix', arity),
+             operator.build(value_rest, param + '_rest', arity)],
+            dict(operator.bind(param + '_prefix', value[:VALUE_INDEX_LENGTH]),
+                 **operator.bind(param + '_rest', value[VALUE_INDEX_LENGTH:])))
+
+
+def attribute_filter(conditions):
+    """
+    Criterion for tasks with attribute values matching all conditions -
+    dicts with attribute_id, value and operator (default '=') - and bind
+    parameters of it, for Query.params().
+
+    Raises ValueError for unknown attribute or value of wrong type.
+    """
+    branches = dict()
+    params = dict()
+
+    for i, condition in enumerate(conditions):
+        attribute_id = condition['attribute_id']
+        name = operator_name(condition.get('operator', '='))
+        value = _coerce(attribute_id, condition['value'], name)
+        clauses, values = _value_clauses(name, get_operator(name),
+                                         attribute_id, value,
+                                         'attribute_%d' % i)
+
+        branches.setdefault(attribute_id, []).extend(clauses)
+        params.update(values)
+
+    matching = select([TaskAttributeValue.task_id]).where(or_(*[
+        and_(TaskAttributeValue.task_attribute_id == attribute_id, *clauses)
+        for attribute_id, clauses in sorted(branches.items())
+    ])).group_by(TaskAttributeValue.task_id).having(
+        func.count() == len(branches))
+
+    return Task.id.in_(matching), params
+
+
+def sort_by_attributes(query, sort):
+    """
+    Order query of tasks by attribute values, sort is list of dicts with
+    attribute_id and desc (default false). Tasks without the attribute
+    have NULL value. Task id is the last sort key.
+
+    Raises ValueError for unknown attribute.
+    """
+    columns = [
+        func.max(case([(
+            TaskAttributeValue.task_attribute_id == item['attribute_id'],
+            value_column(item['attribute_id'])
+        )])).label('sort_%d' % i)
+        for i, item in enumerate(sort)
+    ]
+
+    pivot = select([TaskAttributeValue.task_id] + columns).where(
+        TaskAttributeValue.task_attribute_id.in_(
+            set(item['attribute_id'] for item in sort))
+    ).group_by(TaskAttributeValue.task_id).alias('sort_values')
+
+    order = [pivot.c['sort_%d' % i].desc() if item.get('desc')
+             else pivot.c['sort_%d' % i] for i, item in enumerate(sort)]
+
+    return query.outerjoin(pivot, pivot.c.task_id == Task.id).order_by(
+        *order + [Task.id])
+
+
+def backfill_values(engine, batch_size=10000):
+    """
+    Coerce stored values of every attribute to its current type, batch_size
+    values at once, see models.recoerce_values. Sets number_value of values
+    which were stored without it.
+
+    Returns list of (attribute id, task id, message) of values which do not
+    match type of their attribute, they are left unchanged.
+    """
+    invalid = []
+
+    for attribute in reference_cache.get_all(TaskAttribute):
+        type_name = attribute_type_name(attribute['id'])
+        after = 0
+
+        while True:
+            with engine.begin() as connection:
+                task_ids, rejected = recoerce_values(
+                    connection, attribute['id'], type_name, after, batch_size)
+
+            invalid += [(attribute['id'], task_id, message)
+                        for task_id, message in rejected]
+
+            if len(task_ids) < batch_size:
+                break
+
+            after = task_ids[-1]
+
+    return invalid
@@ -0,0 +1,69 @@
+"""
+Measure inserting a batch of tasks (as POST /tasks/bulk does) with
+bulk_save_objects, which sends INSERT per task to get ids, and with
+models.insert_tasks.
+
+Run from the project root against a scratch database - all tables in it
+are dropped:
+
+    python -m benchmarks.bulk_insert postgresql://localhost/bench 1000
+
+On databases other than PostgreSQL insert_tasks falls back to
+bulk_save_objects, so both numbers are the same.
+"""
+import sys
+import time
+import create_app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from database import Model
+from models import Task, TaskStatus, TaskType, User, insert_tasks
+
+NUMBER = 5
+
+
+def seed(engine):
+    Model.metadata.drop_all(engine)
+    Model.metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        connection.execute(TaskStatus.__table__.insert(), [dict(name='new')])
+        connection.execute(TaskType.__table__.insert(), [dict(name='task')])
+        connection.execute(User.__table__.insert(), [dict(
+            login='user', first_name='a', last_name='b', password=b'x',
+            is_creator=True, is_contractor=True, is_admin=False)])
+
+
+def measure(engine, insert, count):
+    seconds = 0
+
+    for _ in range(NUMBER):
+        session = Session(bind=engine)
+        tasks = [Task('task %d' % i, type_id=1, status_id=1, creator_id=1)
+                 for i in range(count)]
+
+        start = time.perf_counter()
+        insert(session, tasks)
+        session.commit()
+        seconds += time.perf_counter() - start
+        session.close()
+
+    return seconds / NUMBER * 1000
+
+
+def bulk_save_objects(session, tasks):
+    session.bulk_save_objects(tasks, return_defaults=True)
+
+
+if __name__ == '__main__':
+    engine = create_engine(sys.argv[1])
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    seed(engine)
+
+    print('{0} tasks, {1}'.format(count, engine.dialect.name))
+
+    for name, insert in (('bulk_save_objects', bulk_save_objects),
+                         ('insert_tasks', insert_tasks)):
+        print('{0:<18} {1:9.2f} ms'.format(
+            name, measure(engine, insert, count)))
@@ -0,0 +1,40 @@
+"""
+Payload size and encode/decode time of a task list as JSON and as
+MessagePack.
+
+Run from the project root (msgpack has to be installed):
+
+    python -m benchmarks.content_types [count]
+
+Tasks are built in memory like in benchmarks.serializers (default 10000)
+and converted with to_dict(), so both formats encode the same data.
+"""
+import sys
+import timeit
+from create_app import app
+from json_backend import dumps, loads, packb, unpackb
+from benchmarks.serializers import build_tasks, INCLUDE
+
+NUMBER = 10
+
+
+def measure(encode, decode, data):
+    body = encode(data)
+    encode_time = timeit.timeit(lambda: encode(data), number=NUMBER)
+    decode_time = timeit.timeit(lambda: decode(body), number=NUMBER)
+
+    return len(body), encode_time / NUMBER, decode_time / NUMBER
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    with app.app_context():
+        data = [task.to_dict(None, INCLUDE) for task in build_tasks(count)]
+
+    for name, encode, decode in [('json', dumps, loads),
+                                 ('msgpack', packb, unpackb)]:
+        size, encode_time, decode_time = measure(encode, decode, data)
+        print('{0:<8} {1:8.1f} kB  encode {2:7.1f} ms  decode {3:7.1f} ms'
+              .format(name, size / 1e3, encode_time * 1e3,
+                      decode_time * 1e3))
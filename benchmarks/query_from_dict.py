@@ -0,0 +1,60 @@
+"""
+Compare filter_from_dict with the previous if/elif implementation.
+
+Run from the project root:
+
+    python -m benchmarks.query_from_dict
+
+Only query construction (and optionally SQL compilation) is measured,
+no statements are executed.
+"""
+import timeit
+import create_app
+from models import Task
+from utils import filter_from_dict
+
+NUMBER = 10000
+
+DATA = dict(
+    name=dict(value='Dodaj cos tam', operator='!='),
+    status_id=dict(value=1),
+    type_id=dict(value=2, operator='>='),
+    creator_id=dict(value=10, operator='<'),
+)
+
+
+def legacy_filter_from_dict(Class, data):
+    query = Class.query
+
+    for key, item in data.items():
+        operator = item.get('operator', '=')
+        value = item['value']
+
+        if operator == '!=':
+            query = query.filter(getattr(Class, key) != value)
+        elif operator == '>':
+            query = query.filter(getattr(Class, key) > value)
+        elif operator == '<':
+            query = query.filter(getattr(Class, key) < value)
+        elif operator == '>=':
+            query = query.filter(getattr(Class, key) >= value)
+        elif operator == '<=':
+            query = query.filter(getattr(Class, key) <= value)
+        else:
+            query = query.filter(getattr(Class, key) == value)
+
+    return query
+
+
+def run(name, build):
+    build_time = timeit.timeit(build, number=NUMBER)
+    compile_time = timeit.timeit(
+        lambda: build().statement.compile(), number=NUMBER)
+
+    print('{0:<10} build: {1:8.2f} us  build+compile: {2:8.2f} us'.format(
+        name, build_time / NUMBER * 1e6, compile_time / NUMBER * 1e6))
+
+
+if __name__ == '__main__':
+    run('legacy', lambda: legacy_filter_from_dict(Task, DATA))
+    run('compiled', lambda: filter_from_dict(Task, DATA))
@@ -0,0 +1,75 @@
+"""
+Throughput of encoding a task list with to_dict() and jsonify versus
+generated encoders from serializers.
+
+Run from the project root:
+
+    python -m benchmarks.serializers [count]
+
+Tasks are built in memory (default 100000), each with creator, contractor
+and two attribute values, so only encoding is measured. Status is left
+out, it comes from the reference cache in both cases.
+"""
+import sys
+import time
+from datetime import datetime
+from create_app import app
+from flask import jsonify
+from models import Task, TaskAttributeValue, User
+from serializers import get_encoder, encode_list
+
+INCLUDE = ('content', 'creator', 'contractor')
+
+
+def build_tasks(count):
+    users = [User('user%d' % i, None, 'Jan', 'Kowalski', is_creator=True)
+             for i in range(100)]
+
+    for i, user in enumerate(users):
+        user.id = i + 1
+
+    tasks = []
+
+    for i in range(count):
+        task = Task('task %d' % i, type_id=1, status_id=1,
+                    creator_id=i % 100 + 1)
+        task.id = i + 1
+        task.external_identifier = 'EXT-%d' % i
+        task.create_date = datetime(2016, 1, 1, 12, 30, i % 60, 1000)
+        task.creator = users[i % 100]
+        task.contractor = users[(i + 1) % 100]
+        task.content = [TaskAttributeValue(task.id, 1, 'Zmiana ceny'),
+                        TaskAttributeValue(task.id, 2, str(i))]
+        tasks.append(task)
+
+    return tasks
+
+
+def to_dict(tasks, include):
+    with app.test_request_context():
+        return jsonify([task.to_dict(None, include)
+                        for task in tasks]).get_data()
+
+
+def encoder(tasks, include):
+    return encode_list(tasks, get_encoder(Task, None, include)).encode()
+
+
+def measure(function, tasks, include):
+    start = time.perf_counter()
+    data = function(tasks, include)
+    seconds = time.perf_counter() - start
+
+    return seconds, len(data)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    tasks = build_tasks(count)
+
+    for label, include in [('embedded', INCLUDE), ('columns only', ())]:
+        for name, function in [('to_dict+jsonify', to_dict),
+                               ('encoder', encoder)]:
+            seconds, size = measure(function, tasks, include)
+            print('{0:<13} {1:<16} {2:10.0f} rows/s {3:8.1f} MB'.format(
+                label, name, count / seconds, size / 1e6))
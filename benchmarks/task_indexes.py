@@ -0,0 +1,101 @@
+"""
+Measure task list queries with and without indexes.
+
+Run from the project root against a scratch database - all tables in it
+are dropped:
+
+    python -m benchmarks.task_indexes postgresql://localhost/bench 1000000
+"""
+import sys
+import timeit
+from datetime import datetime, timedelta
+import create_app
+from sqlalchemy import create_engine, func, select
+from database import Model
+from models import Task, TaskStatus, TaskType, User
+
+BATCH_SIZE = 10000
+NUMBER = 20
+
+QUERIES = [
+    ('status_id', lambda t: select([t]).where(t.c.status_id == 3)),
+    ('status_id, create_date', lambda t: select([t]).where(
+        t.c.status_id == 3).where(
+        t.c.create_date >= datetime(2016, 1, 1)).order_by(
+        t.c.create_date).limit(100)),
+    ('type_id', lambda t: select([t]).where(t.c.type_id == 2)),
+    ('creator_id', lambda t: select([t]).where(t.c.creator_id == 7)),
+    ('contractor_id', lambda t: select([t]).where(t.c.contractor_id == 7)),
+    ('count by status_id', lambda t: select([func.count()]).select_from(
+        t).where(t.c.status_id == 3)),
+]
+
+
+def create_tables(engine):
+    Model.metadata.drop_all(engine)
+    Model.metadata.create_all(engine)
+
+    for index in Task.__table__.indexes:
+        index.drop(engine)
+
+
+def seed(engine, count):
+    statuses = [dict(name='status %d' % i) for i in range(10)]
+    types = [dict(name='type %d' % i) for i in range(10)]
+    users = [dict(login='user%d' % i, first_name='a', last_name='b',
+                  password=b'x', is_creator=True, is_contractor=True,
+                  is_admin=False) for i in range(100)]
+
+    with engine.begin() as connection:
+        connection.execute(TaskStatus.__table__.insert(), statuses)
+        connection.execute(TaskType.__table__.insert(), types)
+        connection.execute(User.__table__.insert(), users)
+
+    start = datetime(2015, 1, 1)
+
+    for offset in range(0, count, BATCH_SIZE):
+        tasks = [dict(
+            name='task %d' % i,
+            type_id=i % 10 + 1,
+            status_id=i % 7 + 1,
+            creator_id=i % 100 + 1,
+            contractor_id=(i * 7) % 100 + 1 if i % 3 else None,
+            create_date=start + timedelta(minutes=i)
+        ) for i in range(offset, min(offset + BATCH_SIZE, count))]
+
+        with engine.begin() as connection:
+            connection.execute(Task.__table__.insert(), tasks)
+
+
+def measure(engine):
+    results = []
+
+    with engine.connect() as connection:
+        for name, build in QUERIES:
+            statement = build(Task.__table__)
+            seconds = timeit.timeit(
+                lambda: connection.execute(statement).fetchall(),
+                number=NUMBER)
+            results.append((name, seconds / NUMBER * 1000))
+
+    return results
+
+
+if __name__ == '__main__':
+    engine = create_engine(sys.argv[1])
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+
+    create_tables(engine)
+    seed(engine, count)
+    before = measure(engine)
+
+    for index in Task.__table__.indexes:
+        index.create(engine)
+
+    after = measure(engine)
+
+    print('{0} tasks'.format(count))
+
+    for (name, without), (_, with_index) in zip(before, after):
+        print('{0:<24} no index: {1:9.2f} ms  index: {2:9.2f} ms'.format(
+            name, without, with_index))
@@ -0,0 +1,48 @@
+"""
+Per-request overhead of validating task 'create' schema.
+
+Run from the project root:
+
+    python -m benchmarks.validation
+
+'lookup' resolves the schema with import_module and getattr on every
+call, like validate_json did before schemas were cached at decoration
+time, 'cached' uses the schema resolved once.
+"""
+import timeit
+from importlib import import_module
+import create_app
+from validation.schemas import get_schema
+
+NUMBER = 100000
+
+DATA = dict(
+    name='Zmiana ceny',
+    external_identifier='ABC-123',
+    type_id=1,
+    status_id=1,
+    creator_id=2,
+    contractor_id=3,
+)
+
+
+def lookup():
+    mod = import_module('validation.schemas.task')
+    schema = getattr(mod, 'create')
+    schema(DATA)
+
+
+def cached(schema=get_schema('task', 'create')):
+    schema(DATA)
+
+
+def resolve_only():
+    mod = import_module('validation.schemas.task')
+    getattr(mod, 'create')
+
+
+if __name__ == '__main__':
+    for name, function in [('lookup', lookup), ('cached', cached),
+                           ('resolve only', resolve_only)]:
+        seconds = timeit.timeit(function, number=NUMBER)
+        print('{0:<14} {1:8.2f} us'.format(name, seconds / NUMBER * 1e6))
@@ -0,0 +1,78 @@
+import time
+from hashlib import sha1
+from create_app import app
+
+
+class ReferenceCache:
+    """
+    Read-through cache for small, rarely changing tables (statuses, types,
+    attributes and attribute types).
+
+    Whole table is loaded on first use and kept as dicts returned by
+    to_dict(), keyed by id. Handlers which modify cached tables have to call
+    invalidate(). Tables are also reloaded after REFERENCE_CACHE_TTL seconds
+    (default 60), so changes made by other processes become visible.
+    Items missing from the cache can be new, so a miss reloads the table,
+    but at most once per REFERENCE_CACHE_MISS_TTL seconds (default 1): ids
+    which do not exist are answered from the cache in the meantime.
+
+    Returned dicts are shared and must not be modified.
+    """
+
+    def __init__(self):
+        self._tables = dict()
+
+    def _load(self, Class):
+        rows = dict((item.id, item.to_dict()) for item in Class.query.all())
+        version = sha1(repr(sorted(
+            (id, sorted(row.items())) for id, row in rows.items()
+        )).encode('utf-8')).hexdigest()
+        self._tables[Class] = (time.time(), rows, version)
+
+        return rows
+
+    def _get_table(self, Class):
+        try:
+            loaded_at, rows, version = self._tables[Class]
+        except KeyError:
+            self._load(Class)
+            return self._tables[Class]
+
+        if time.time() - loaded_at > app.config.get('REFERENCE_CACHE_TTL', 60):
+            self._load(Class)
+            return self._tables[Class]
+
+        return loaded_at, rows, version
+
+    def _get_rows(self, Class):
+        return self._get_table(Class)[1]
+
+    def get(self, Class, id):
+        """Return dict of item with id or None if there is no such item."""
+        loaded_at, rows, _ = self._get_table(Class)
+
+        if id not in rows and time.time() - loaded_at > \
+                app.config.get('REFERENCE_CACHE_MISS_TTL', 1):
+            # Item could be created by another process.
+            rows = self._load(Class)
+
+        return rows.get(id)
+
+    def get_all(self, Class):
+        """Return list of dicts of all items ordered by id."""
+        rows = self._get_rows(Class)
+
+        return [rows[id] for id in sorted(rows)]
+
+    def version(self, Class):
+        """Digest of cached rows of Class, changes when any row changes."""
+        return self._get_table(Class)[2]
+
+    def invalidate(self, Class):
+        self._tables.pop(Class, None)
+
+    def clear(self):
+        self._tables.clear()
+
+
+reference_cache = ReferenceCache()
@@ -0,0 +1,174 @@
+"""
+Compression of response bodies negotiated on Accept-Encoding.
+
+gzip is always available, brotli ('br') when the brotli package is
+installed. Responses smaller than COMPRESS_MIN_SIZE bytes (default 500)
+are sent as they are. Streamed responses are compressed chunk by chunk as
+they are sent, each chunk flushed so the client can decode it at once.
+Compressed bodies of responses with ETag are kept in a small LRU cache
+(COMPRESS_CACHE_SIZE entries, default 256), so an unchanged item or list
+is compressed only once. ETag of compressed response, streamed or not,
+gets '-<encoding>' suffix, see etag_variants.
+"""
+import threading
+import zlib
+from collections import OrderedDict
+from flask import request
+from create_app import app
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/plain', 'text/csv',
+                          'application/x-ndjson', 'application/msgpack')
+
+
+def _gzip_compressor(level):
+    # wbits 31 means gzip container.
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def flush():
+        return compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    return compressor.compress, flush, compressor.flush
+
+
+def _brotli_compressor(level):
+    compressor = brotli.Compressor(quality=min(level, 11))
+
+    return compressor.process, compressor.flush, compressor.finish
+
+
+# Encoding -> function returning (compress, flush, finish) of new
+# compressor, in order of preference.
+ENCODINGS = OrderedDict([('br', _brotli_compressor),
+                         ('gzip', _gzip_compressor)])
+
+if brotli is None:
+    del ENCODINGS['br']
+
+
+class CompressedCache:
+    """
+    LRU cache of compressed bodies keyed by (ETag, mimetype, encoding).
+
+    ETags of responses have to change with every change of their body,
+    including embedded rows (see responses.EMBEDDED_MODELS). Safe to use
+    from multiple threads.
+    """
+
+    def __init__(self):
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.pop(key, None)
+
+            if data is not None:
+                self._items[key] = data
+
+        return data
+
+    def set(self, key, data):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = data
+
+            while len(self._items) > \
+                    app.config.get('COMPRESS_CACHE_SIZE', 256):
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+compressed_cache = CompressedCache()
+
+
+def etag_variants(etag):
+    """ETag and ETags of its compressed variants."""
+    return [etag] + [etag + '-' + encoding for encoding in ENCODINGS]
+
+
+def compress(data, encoding):
+    compress, _, finish = ENCODINGS[encoding](
+        app.config.get('COMPRESS_LEVEL', 6))
+
+    return compress(data) + finish()
+
+
+def compress_stream(chunks, encoding):
+    """
+    Compress iterable of chunks. Compressor is flushed after every chunk,
+    so each one can be decoded as soon as it is received.
+    """
+    compress, flush, finish = ENCODINGS[encoding](
+        app.config.get('COMPRESS_LEVEL', 6))
+
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+
+        yield compress(chunk) + flush()
+
+    yield finish()
+
+
+def get_encoding(response):
+    """Encoding for response or None if it should not be compressed."""
+    if response.status_code != 200 or response.direct_passthrough or \
+            'Content-Encoding' in response.headers or \
+            response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return None
+
+    return request.accept_encodings.best_match(list(ENCODINGS))
+
+
+@app.after_request
+def compress_response(response):
+    if response.mimetype in COMPRESSIBLE_MIMETYPES:
+        response.vary.add('Accept-Encoding')
+
+    encoding = get_encoding(response)
+
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+
+        if etag is not None:
+            response.set_etag(etag + '-' + encoding, weak)
+
+        return response
+
+    data = response.get_data()
+
+    if len(data) < app.config.get('COMPRESS_MIN_SIZE', 500):
+        return response
+
+    etag, weak = response.get_etag()
+
+    if etag is None:
+        response.set_data(compress(data, encoding))
+    else:
+        key = (etag, response.mimetype, encoding)
+        compressed = compressed_cache.get(key)
+
+        if compressed is None:
+            compressed = compress(data, encoding)
+            compressed_cache.set(key, compressed)
+
+        response.set_data(compressed)
+        response.set_etag(etag + '-' + encoding, weak)
+
+    response.headers['Content-Encoding'] = encoding
+
+    return response
@@ -8,9 +8,18 @@ app = Flask(__name__)
 app.config.from_object('settings.DevelopmentConfig')
 
 bcrypt = Bcrypt(app)
-CORS(app)
+CORS(app, expose_headers=['X-Next-Cursor', 'ETag'])
+
+from json_backend import Request, Response
+
+app.request_class = Request
+app.response_class = Response
 
 import endpoints
+import compression
+from validation.schemas import load_schemas
+
+load_schemas()
 
 @app.cli.command()
 @click.argument('data', nargs=-1)
@@ -35,3 +44,70 @@ def test(data):
 def tests():
     tests = unittest.TestLoader().discover('tests')
     unittest.TextTestRunner(verbosity=2).run(tests)
+
+
+@app.cli.command('import')
+@click.argument('table', type=click.Choice(['tasks', 'attribute-values']))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', type=click.Choice(['ndjson', 'csv']),
+              help='Format of the file, by default taken from extension.')
+@click.option('--batch-size', default=10000)
+def import_command(table, path, format, batch_size):
+    """Import tasks or attribute values from NDJSON or CSV file."""
+    from database import db_session
+    from importer import import_file
+
+    if format is None:
+        format = 'csv' if path.endswith('.csv') else 'ndjson'
+
+    with open(path, newline='', encoding='utf-8') as lines:
+        result = import_file(db_session.bind, table, lines, format,
+                             batch_size)
+
+    for number, message in result.rejected:
+        click.echo('Line {0}: {1}'.format(number, message), err=True)
+
+    click.echo('Loaded {0} rows in {1:.1f} s ({2:.0f} rows/s), rejected '
+               '{3}.'.format(result.loaded, result.seconds,
+                             result.rows_per_second, len(result.rejected)))
+
+
+@app.cli.command('reindex')
+@click.option('--batch-size', default=10000)
+def reindex_command(batch_size):
+    """Rebuild full-text search documents of all tasks."""
+    from database import db_session
+    from search import reindex_tasks
+
+    reindex_tasks(db_session.bind, batch_size)
+    click.echo('Search documents rebuilt.')
+
+
+@app.cli.command('backfill-values')
+@click.option('--batch-size', default=10000)
+def backfill_values_command(batch_size):
+    """Coerce attribute values to types of their attributes again."""
+    from database import db_session
+    from attribute_search import backfill_values
+
+    invalid = backfill_values(db_session.bind, batch_size)
+
+    for attribute_id, task_id, message in invalid:
+        click.echo('Task {0}, attribute {1}: {2}'.format(
+            task_id, attribute_id, message), err=True)
+
+    click.echo('Attribute values coerced, {0} invalid.'.format(len(invalid)))
+
+
+@app.cli.command('prune-tombstones')
+def prune_tombstones_command():
+    """Delete tombstones older than TOMBSTONE_RETENTION_DAYS (default 30)."""
+    from datetime import datetime, timedelta
+    from database import db_session
+    from feed import prune_tombstones
+
+    before = datetime.utcnow() - timedelta(
+        days=app.config.get('TOMBSTONE_RETENTION_DAYS', 30))
+    count = prune_tombstones(db_session, before)
+    db_session.commit()
+    click.echo('Deleted {0} tombstones.'.format(count))
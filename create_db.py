@@ -1,6 +1,7 @@
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
 from database import Model
+from cache import reference_cache
 import models
 
 
@@ -16,7 +17,9 @@ def create_db(db_session=None):
             cursor.execute("PRAGMA foreign_keys=ON")
             cursor.close()
 
-    Model.metadata.reflect(db_session.bind)
+    # FTS5 search tables are created and dropped with search documents.
+    Model.metadata.reflect(db_session.bind, only=lambda name, _: not
+                           name.startswith(models.SEARCH_FTS_TABLE))
     Model.metadata.drop_all(db_session.bind)
     Model.metadata.create_all(db_session.bind)
 
@@ -112,10 +115,12 @@ def create_db(db_session=None):
     ]
 
     for item in tasks_content:
-        db_session.add(item)
+        db_session.add(item.coerce())
 
     db_session.commit()
 
+    reference_cache.clear()
+
 
 if __name__ == '__main__':
     create_db()
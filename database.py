@@ -1,9 +1,109 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event, exc, select
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import QueuePool
 from create_app import app
 
-engine = create_engine(app.config['SQLALCHEMY_DATABASE_URI'])
+# Config key -> create_engine argument.
+POOL_OPTIONS = {
+    'SQLALCHEMY_POOL_SIZE': 'pool_size',
+    'SQLALCHEMY_MAX_OVERFLOW': 'max_overflow',
+    'SQLALCHEMY_POOL_TIMEOUT': 'pool_timeout',
+    'SQLALCHEMY_POOL_RECYCLE': 'pool_recycle',
+}
+
+
+class MonitoredQueuePool(QueuePool):
+    """QueuePool which counts checkouts that had to wait for connection."""
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        exhausted = self.checkedin() == 0 and \
+            -1 < self._max_overflow <= self.overflow()
+
+        if not exhausted:
+            return super()._do_get()
+
+        start = time.time()
+        self.waits += 1
+
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.wait_time += time.time() - start
+
+
+def get_engine_options(config):
+    """
+    Arguments for create_engine from config.
+
+    Pool options are ignored for SQLite, which uses pools without size.
+    """
+    if make_url(config['SQLALCHEMY_DATABASE_URI']).drivername.startswith('sqlite'):
+        return dict()
+
+    options = dict(poolclass=MonitoredQueuePool)
+
+    for key, name in POOL_OPTIONS.items():
+        if key in config:
+            options[name] = config[key]
+
+    return options
+
+
+def ping_connection(connection, branch):
+    """
+    Check connection before it is used and reconnect if it was dropped by
+    the server (pessimistic disconnect handling).
+    """
+    if branch:
+        return
+
+    should_close_with_result = connection.should_close_with_result
+    connection.should_close_with_result = False
+
+    try:
+        connection.scalar(select([1]))
+    except exc.DBAPIError as e:
+        if e.connection_invalidated:
+            connection.scalar(select([1]))
+        else:
+            raise
+    finally:
+        connection.should_close_with_result = should_close_with_result
+
+
+def pool_status():
+    """Statistics of the connection pool of engine."""
+    pool = engine.pool
+    status = dict(pool=type(pool).__name__)
+
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        if callable(getattr(pool, name, None)):
+            status[name] = getattr(pool, name)()
+
+    for name in ('waits', 'wait_time', 'timeouts'):
+        if hasattr(pool, name):
+            status[name] = getattr(pool, name)
+
+    return status
+
+
+engine = create_engine(app.config['SQLALCHEMY_DATABASE_URI'],
+                       **get_engine_options(app.config))
+
+if app.config.get('SQLALCHEMY_POOL_PRE_PING', False):
+    event.listen(engine, 'engine_connect', ping_connection)
 
 db_session = scoped_session(sessionmaker(
     bind=engine,
@@ -12,5 +112,10 @@ db_session = scoped_session(sessionmaker(
 ))
 
 
+@app.teardown_appcontext
+def remove_session(exception=None):
+    db_session.remove()
+
+
 Model = declarative_base(bind=engine)
 Model.query = db_session.query_property()
@@ -1,23 +1,27 @@
 from create_app import app
-from flask import jsonify, abort, request
+from flask import abort, request
+from json_backend import jsonify
 from models import Task, User, TaskStatus, TaskType, TaskAttribute, \
-    TaskAttributeType, TaskAttributeValue, TaskAttributeToTaskType
+    TaskAttributeType, TaskAttributeValue, TaskAttributeToTaskType, \
+    recoerce_values
 from database import db_session
 from sqlalchemy.exc import IntegrityError, StatementError
 from sqlalchemy.orm.exc import FlushError
 from validation.json import validate_json
 from validation.query import validate_query
-from utils import query_from_dict
+from utils import filter_from_dict, split_list_options
+from responses import list_response, dict_response
+from cache import reference_cache
 
 
 @app.route('/task/attribute/<int:attribute_id>')
 def get_attribute(attribute_id):
-    attribute = TaskAttribute.query.get(attribute_id)
+    attribute = reference_cache.get(TaskAttribute, attribute_id)
 
     if attribute is None:
         abort(404)
 
-    return jsonify(attribute.to_dict()), 200
+    return dict_response(attribute)
 
 
 @app.route('/task/attribute/<int:attribute_id>', methods=['PUT'])
@@ -29,14 +33,30 @@ def update_attribute(attribute_id):
         abort(404)
 
     data = request.get_json()
+    type_changed = data.get('type_id', attribute.type_id) != attribute.type_id
     attribute.update_from_dict(data)
 
     try:
+        if type_changed:
+            # Stored values have to match the new type.
+            db_session.flush()
+            attribute_type = reference_cache.get(TaskAttributeType,
+                                                 attribute.type_id)
+            _, invalid = recoerce_values(
+                db_session, attribute.id,
+                attribute_type and attribute_type['name'])
+
+            if invalid:
+                db_session.rollback()
+                return jsonify(message=invalid[0][1]), 409
+
         db_session.commit()
     except IntegrityError as e:
         db_session.rollback()
         return jsonify(message=str(e)), 409
 
+    reference_cache.invalidate(TaskAttribute)
+
     return jsonify(attribute.to_dict()), 200
 
 
@@ -54,6 +74,8 @@ def create_attribute():
         db_session.rollback()
         return jsonify(message=str(e)), 409
 
+    reference_cache.invalidate(TaskAttribute)
+
     return jsonify(attribute.to_dict()), 201
 
 
@@ -72,25 +94,26 @@ def delete_attribute(attribute_id):
         db_session.rollback()
         return jsonify(message='Attribute cannot be deleted'), 409
 
+    reference_cache.invalidate(TaskAttribute)
+
     return '', 204
 
 
 @app.route('/task/attributes')
 @validate_query('attribute', 'query')
 def get_attributes_list():
-    query_data = request.args.to_dict()
-    attributes = [attribute.to_dict()
-                  for attribute in TaskAttribute.query.filter_by(**query_data).all()]
+    filters, options = split_list_options(request.args.to_dict())
+    query = TaskAttribute.query.filter_by(**filters)
 
-    return jsonify(attributes), 200
+    return list_response(query, TaskAttribute, options)
 
 
 @app.route('/task/attributes', methods=['POST'])
+@validate_query('listing', 'query')
 @validate_json('attribute', 'search')
 def get_attribute_list_complex():
     data = request.get_json()
+    _, options = split_list_options(request.args.to_dict())
+    query = filter_from_dict(TaskAttribute, data)
 
-    attributes = [attribute.to_dict()
-                       for attribute in query_from_dict(TaskAttribute, data)]
-
-    return jsonify(attributes), 200
+    return list_response(query, TaskAttribute, options)
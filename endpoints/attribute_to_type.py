@@ -1,5 +1,6 @@
 from create_app import app
-from flask import jsonify, abort, request
+from flask import abort, request
+from json_backend import jsonify
 from models import Task, User, TaskStatus, TaskType, TaskAttribute, \
     TaskAttributeType, TaskAttributeValue, TaskAttributeToTaskType
 from database import db_session
@@ -7,7 +8,8 @@ from sqlalchemy.exc import IntegrityError, StatementError
 from sqlalchemy.orm.exc import FlushError
 from validation.json import validate_json
 from validation.query import validate_query
-from utils import query_from_dict
+from utils import filter_from_dict, split_list_options
+from responses import list_response, item_response
 
 
 @app.route('/task/attribute-to-type/<int:task_type_id>/<int:task_attribute_id>')
@@ -18,7 +20,7 @@ def get_attribute_to_type(task_type_id, task_attribute_id):
     if attribute_to_type is None:
         abort(404)
 
-    return jsonify(attribute_to_type.to_dict()), 200
+    return item_response(attribute_to_type)
 
 
 @app.route('/task/attribute-to-type/<int:task_type_id>/<int:task_attribute_id>', methods=['PUT'])
@@ -81,18 +83,18 @@ def delete_attribute_to_type(task_type_id, task_attribute_id):
 @app.route('/task/attribute-to-types')
 @validate_query('attribute_to_type', 'query')
 def get_attribute_to_types_list():
-    query_data = request.args.to_dict()
-    attribute_to_types = [attribute_to_type.to_dict()
-                          for attribute_to_type in TaskAttributeToTaskType.query.filter_by(**query_data).all()]
+    filters, options = split_list_options(request.args.to_dict())
+    query = TaskAttributeToTaskType.query.filter_by(**filters)
+
+    return list_response(query, TaskAttributeToTaskType, options)
 
-    return jsonify(attribute_to_types), 200
 
 @app.route('/task/attribute-to-types', methods=['POST'])
+@validate_query('listing', 'query')
 @validate_json('attribute_to_type', 'search')
 def get_attribute_to_types_list_complex():
     data = request.get_json()
+    _, options = split_list_options(request.args.to_dict())
+    query = filter_from_dict(TaskAttributeToTaskType, data)
 
-    attribute_to_types = [attribute_to_type.to_dict()
-                for attribute_to_type in query_from_dict(TaskAttributeToTaskType, data)]
-
-    return jsonify(attribute_to_types), 200
+    return list_response(query, TaskAttributeToTaskType, options)
@@ -1,5 +1,6 @@
 from create_app import app
-from flask import jsonify, abort, request
+from flask import abort, request
+from json_backend import jsonify
 from models import Task, User, TaskStatus, TaskType, TaskAttribute, \
     TaskAttributeType, TaskAttributeValue, TaskAttributeToTaskType
 from database import db_session
@@ -7,17 +8,19 @@ from sqlalchemy.exc import IntegrityError, StatementError
 from sqlalchemy.orm.exc import FlushError
 from validation.json import validate_json
 from validation.query import validate_query
-from utils import query_from_dict
+from utils import filter_from_dict, split_list_options
+from responses import list_response, dict_response
+from cache import reference_cache
 
 
 @app.route('/task/attribute/type/<int:attribute_type_id>')
 def get_attribute_type(attribute_type_id):
-    attribute_type = TaskAttributeType.query.get(attribute_type_id)
+    attribute_type = reference_cache.get(TaskAttributeType, attribute_type_id)
 
     if attribute_type is None:
         abort(404)
 
-    return jsonify(attribute_type.to_dict()), 200
+    return dict_response(attribute_type)
 
 
 @app.route('/task/attribute/type/<int:attribute_type_id>', methods=['PUT'])
@@ -37,6 +40,8 @@ def update_attribute_type(attribute_type_id):
         db_session.rollback()
         return jsonify(message='Type name must be unique.'), 409
 
+    reference_cache.invalidate(TaskAttributeType)
+
     return jsonify(attribute_type.to_dict()), 200
 
 
@@ -54,6 +59,8 @@ def create_attribute_type():
         db_session.rollback()
         return jsonify(message='Type name must be unique.'), 409
 
+    reference_cache.invalidate(TaskAttributeType)
+
     return jsonify(attribute_type.to_dict()), 201
 
 
@@ -72,25 +79,26 @@ def delete_attribute_type(attribute_type_id):
         db_session.rollback()
         return jsonify(message='Type cannot be deleted'), 409
 
+    reference_cache.invalidate(TaskAttributeType)
+
     return '', 204
 
 
 @app.route('/task/attribute/types')
 @validate_query('attribute_type', 'query')
 def get_attribute_types_list():
-    query_data = request.args.to_dict()
-    attribute_types = [attribute_type.to_dict()
-                       for attribute_type in TaskAttributeType.query.filter_by(**query_data).all()]
+    filters, options = split_list_options(request.args.to_dict())
+    query = TaskAttributeType.query.filter_by(**filters)
 
-    return jsonify(attribute_types), 200
+    return list_response(query, TaskAttributeType, options)
 
 
 @app.route('/task/attribute/types', methods=['POST'])
+@validate_query('listing', 'query')
 @validate_json('attribute_type', 'search')
 def get_attribute_types_list_complex():
     data = request.get_json()
+    _, options = split_list_options(request.args.to_dict())
+    query = filter_from_dict(TaskAttributeType, data)
 
-    attribute_types = [attribute_type.to_dict()
-                       for attribute_type in query_from_dict(TaskAttributeType, data)]
-
-    return jsonify(attribute_types), 200
+    return list_response(query, TaskAttributeType, options)
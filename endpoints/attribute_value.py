@@ -1,13 +1,17 @@
 from create_app import app
-from flask import jsonify, abort, request
+from flask import abort, request
+from json_backend import jsonify
 from models import Task, User, TaskStatus, TaskType, TaskAttribute, \
-    TaskAttributeType, TaskAttributeValue, TaskAttributeToTaskType
+    TaskAttributeType, TaskAttributeValue, TaskAttributeToTaskType, \
+    attribute_type_names, coerce_row, index_tasks, touch_tasks
 from database import db_session
 from sqlalchemy.exc import IntegrityError, StatementError
 from sqlalchemy.orm.exc import FlushError
+from exceptions import ValidationError
 from validation.json import validate_json
 from validation.query import validate_query
-from utils import query_from_dict
+from utils import filter_from_dict, split_list_options
+from responses import list_response, item_response
 
 
 @app.route('/task/attribute/value/<int:task_id>/<int:task_attribute_id>')
@@ -18,7 +22,7 @@ def get_attribute_value(task_id, task_attribute_id):
     if attribute_value is None:
         abort(404)
 
-    return jsonify(attribute_value.to_dict()), 200
+    return item_response(attribute_value)
 
 
 @app.route('/task/attribute/value/<int:task_id>/<int:task_attribute_id>', methods=['PUT'])
@@ -34,10 +38,14 @@ def update_attribute_value(task_id, task_attribute_id):
     attribute_value.update_from_dict(data)
 
     try:
+        attribute_value.coerce()
         db_session.commit()
     except IntegrityError as e:
         db_session.rollback()
         return jsonify(message=str(e)), 409
+    except ValidationError as e:
+        db_session.rollback()
+        return jsonify(message=str(e)), 400
 
     return jsonify(attribute_value.to_dict()), 200
 
@@ -48,17 +56,50 @@ def create_attribute_value():
     data = request.get_json()
     attribute_value = TaskAttributeValue.create_from_dict(data)
 
-    db_session.add(attribute_value)
-
     try:
+        db_session.add(attribute_value.coerce())
         db_session.commit()
     except (IntegrityError, FlushError) as e:
         db_session.rollback()
         return jsonify(message=str(e)), 409
+    except ValidationError as e:
+        db_session.rollback()
+        return jsonify(message=str(e)), 400
 
     return jsonify(attribute_value.to_dict()), 201
 
 
+@app.route('/task/attribute/values/bulk', methods=['POST'])
+@validate_json('attribute_value', 'bulk_create')
+def create_attribute_values_bulk():
+    data = request.get_json()
+    attribute_values = [TaskAttributeValue.create_from_dict(item).to_dict()
+                        for item in data]
+
+    try:
+        # Mappings skip mapper events, values are coerced here.
+        type_names = attribute_type_names(
+            db_session, [item['task_attribute_id'] for item in data])
+        rows = [coerce_row(dict(item), type_names)
+                for item in attribute_values]
+        db_session.bulk_insert_mappings(TaskAttributeValue, rows)
+        task_ids = sorted(set(item['task_id'] for item in data))
+        touch_tasks(db_session, task_ids)
+        index_tasks(db_session, task_ids)
+        db_session.commit()
+    except IntegrityError as e:
+        db_session.rollback()
+        return jsonify(message=str(e)), 409
+    except ValidationError as e:
+        db_session.rollback()
+        return jsonify(message=str(e)), 400
+
+    for item, row in zip(attribute_values, rows):
+        item['value'] = row['value']
+
+    return jsonify(attribute_values), 201
+
+
 @app.route('/task/attribute/value/<int:task_id>/<int:task_attribute_id>', methods=['DELETE'])
 def delete_attribute_value(task_id, task_attribute_id):
     attribute_value = TaskAttributeValue.query.get(
@@ -81,19 +122,18 @@ def delete_attribute_value(task_id, task_attribute_id):
 @app.route('/task/attribute/values')
 @validate_query('attribute_value', 'query')
 def get_attribute_values_list():
-    query_data = request.args.to_dict()
-    attribute_values = [attribute_value.to_dict()
-                        for attribute_value in TaskAttributeValue.query.filter_by(**query_data).all()]
+    filters, options = split_list_options(request.args.to_dict())
+    query = TaskAttributeValue.query.filter_by(**filters)
 
-    return jsonify(attribute_values), 200
+    return list_response(query, TaskAttributeValue, options)
 
 
 @app.route('/task/attribute/values', methods=['POST'])
+@validate_query('listing', 'query')
 @validate_json('attribute_value', 'search')
 def get_attribute_value_list_complex():
     data = request.get_json()
+    _, options = split_list_options(request.args.to_dict())
+    query = filter_from_dict(TaskAttributeValue, data)
 
-    attribute_values = [attribute_value.to_dict()
-                       for attribute_value in query_from_dict(TaskAttributeValue, data)]
-
-    return jsonify(attribute_values), 200
+    return list_response(query, TaskAttributeValue, options)
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from create_app import app
+from flask import request
+from json_backend import jsonify
+from validation.query import validate_query
+from utils import decode_cursor, encode_cursor
+from feed import get_changes, CursorExpired
+from endpoints.task import eager_task_query
+
+DEFAULT_LIMIT = 100
+
+
+def changes_window():
+    """
+    (until, retained_since) of served changes. Changes newer than
+    CHANGES_SAFETY_LAG seconds (default 5) are held back, so that slower
+    transactions commit first. Cursors older than TOMBSTONE_RETENTION_DAYS
+    (default 30) are expired.
+    """
+    now = datetime.utcnow()
+
+    return (now - timedelta(seconds=app.config.get('CHANGES_SAFETY_LAG', 5)),
+            now - timedelta(days=app.config.get('TOMBSTONE_RETENTION_DAYS',
+                                                30)))
+
+
+@app.route('/changes')
+@validate_query('changes', 'query')
+def get_changes_list():
+    """
+    Changes of tasks, users and attribute values since cursor, oldest
+    first. Pass X-Next-Cursor of response as since to get next changes.
+    Expired cursor is answered with 410, client has to sync from scratch.
+    """
+    limit = int(request.args.get('limit', DEFAULT_LIMIT))
+    since = request.args.get('since')
+    until, retained_since = changes_window()
+
+    try:
+        since = decode_cursor(since) if since is not None else None
+        changes, cursor = get_changes(
+            limit, since, dict(task=eager_task_query()), until,
+            retained_since)
+    except CursorExpired:
+        return jsonify(dict(message='Cursor expired')), 410
+    except ValueError:
+        return jsonify(dict(message='Invalid cursor')), 400
+
+    response = jsonify(changes)
+
+    if cursor is not None:
+        response.headers['X-Next-Cursor'] = encode_cursor(cursor)
+
+    return response, 200
@@ -0,0 +1,35 @@
+from create_app import app
+from flask import request, stream_with_context
+from models import Task, TaskAttributeValue
+from validation.query import validate_query
+from feed import parse_datetime
+from export import FORMATS, export_table
+
+
+def export_response(Class):
+    """
+    Streamed response with all rows of Class in format given by 'format'
+    arg (ndjson or csv), only rows changed since 'since' arg if given.
+    """
+    format = request.args.get('format', 'ndjson')
+    since = request.args.get('since')
+
+    if since is not None:
+        since = parse_datetime(since)
+
+    chunks = export_table(Class.__table__, format, since)
+
+    return app.response_class(stream_with_context(chunks),
+                              mimetype=FORMATS[format]), 200
+
+
+@app.route('/export/tasks')
+@validate_query('export', 'query')
+def export_tasks():
+    return export_response(Task)
+
+
+@app.route('/export/attribute-values')
+@validate_query('export', 'query')
+def export_attribute_values():
+    return export_response(TaskAttributeValue)
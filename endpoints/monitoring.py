@@ -0,0 +1,8 @@
+from create_app import app
+from json_backend import jsonify
+from database import pool_status
+
+
+@app.route('/monitoring/pool')
+def get_pool_status():
+    return jsonify(pool_status()), 200
@@ -1,5 +1,6 @@
 from create_app import app
-from flask import jsonify, abort, request
+from flask import abort, request
+from json_backend import jsonify
 from models import Task, User, TaskStatus, TaskType, TaskAttribute, \
     TaskAttributeType, TaskAttributeValue, TaskAttributeToTaskType
 from database import db_session
@@ -7,16 +8,19 @@ from sqlalchemy.exc import IntegrityError, StatementError
 from sqlalchemy.orm.exc import FlushError
 from validation.json import validate_json
 from validation.query import validate_query
-from utils import query_from_dict
+from utils import filter_from_dict, split_list_options
+from responses import list_response, dict_response
+from cache import reference_cache
 
 
 @app.route('/task/status/<int:status_id>')
 def get_status(status_id):
-    status = TaskStatus.query.get(status_id)
+    status = reference_cache.get(TaskStatus, status_id)
+
     if status is None:
         abort(404)
 
-    return jsonify(status.to_dict()), 200
+    return dict_response(status)
 
 
 @app.route('/task/status/<int:status_id>', methods=['PUT'])
@@ -36,6 +40,8 @@ def update_status(status_id):
         db_session.rollback()
         return jsonify(dict(message='Status name must be unique.')), 409
 
+    reference_cache.invalidate(TaskStatus)
+
     return jsonify(status.to_dict())
 
 
@@ -53,6 +59,8 @@ def create_status():
         db_session.rollback()
         return jsonify(dict(message='Status name must be unique.')), 409
 
+    reference_cache.invalidate(TaskStatus)
+
     return jsonify(status.to_dict()), 201
 
 
@@ -71,24 +79,26 @@ def delete_status(status_id):
         db_session.rollback()
         return jsonify(dict(message='Status cannot be deleted')), 409
 
+    reference_cache.invalidate(TaskStatus)
+
     return '', 204
 
 
 @app.route('/task/statuses')
 @validate_query('status', 'query')
 def get_statuses_list():
-    statuses = [status.to_dict()
-                for status in TaskStatus.query.filter_by(**request.args.to_dict()).all()]
+    filters, options = split_list_options(request.args.to_dict())
+    query = TaskStatus.query.filter_by(**filters)
 
-    return jsonify(statuses), 200
+    return list_response(query, TaskStatus, options)
 
 
 @app.route('/task/statuses', methods=['POST'])
+@validate_query('listing', 'query')
 @validate_json('status', 'search')
 def get_statuses_list_complex():
     data = request.get_json()
+    _, options = split_list_options(request.args.to_dict())
+    query = filter_from_dict(TaskStatus, data)
 
-    statuses = [status.to_dict()
-                for status in query_from_dict(TaskStatus, data)]
-
-    return jsonify(statuses), 200
+    return list_response(query, TaskStatus, options)
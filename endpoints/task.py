@@ -1,22 +1,100 @@
 from create_app import app
-from flask import jsonify, abort, request
+from flask import abort, request
+from json_backend import jsonify
 from models import Task, User, Task, TaskType, TaskAttribute, \
-    TaskAttributeType, TaskAttributeValue, TaskAttributeToTaskType
+    TaskAttributeType, TaskAttributeValue, TaskAttributeToTaskType, \
+    attribute_type_names, coerce_row, index_tasks, insert_tasks, \
+    record_deletes, unindex_tasks
 from database import db_session
 from sqlalchemy.exc import IntegrityError, StatementError
+from sqlalchemy.orm import joinedload, subqueryload, load_only
 from sqlalchemy.orm.exc import FlushError
+from exceptions import ValidationError
 from validation.json import validate_json
 from validation.query import validate_query
-from utils import query_from_dict
+from utils import filter_from_dict, split_list_options, split_fieldset, \
+    decode_cursor
+from responses import list_response, item_response, encoded_response
+from serializers import get_encoder
+from aggregates import count_tasks, aggregate_tasks
+from attribute_search import attribute_filter, sort_by_attributes
+from search import search_tasks
+
+SEARCH_LIMIT = 20
+
+
+def eager_task_query():
+    """
+    Query for tasks which loads everything used by Task.to_dict().
+
+    Many-to-one relations are joined and content is loaded with one extra
+    query, so serializing a list costs the same number of statements
+    regardless of how many tasks it contains. Status is taken from
+    reference cache.
+    """
+    return Task.query.options(
+        joinedload(Task.creator),
+        joinedload(Task.contractor),
+        subqueryload(Task.content)
+    )
+
+
+# How relationships of Task.EMBEDDED are loaded, status is cached.
+TASK_LOADERS = dict(
+    content=subqueryload,
+    creator=joinedload,
+    contractor=joinedload,
+)
+
+
+def get_fieldset(args):
+    """
+    Pop fields and include from request args. If only fields are given,
+    nothing is embedded.
+    """
+    fields, include = split_fieldset(args)
+
+    if fields is not None and include is None:
+        include = ()
+
+    return fields, include
+
+
+def task_query(fields=None, include=None):
+    """
+    Query for tasks which loads only columns in fields and relationships
+    in include, as used by Task.to_dict(fields, include).
+    """
+    if fields is None and include is None:
+        return eager_task_query()
+
+    if include is None:
+        include = Task.EMBEDDED
+
+    # updated_at is needed for ETags, status_id for embedded status.
+    columns = set(Task.FIELDS if fields is None else fields)
+    columns.update(['id', 'updated_at'])
+
+    if 'status' in include:
+        columns.add('status_id')
+
+    options = [load_only(*sorted(columns))]
+    options += [TASK_LOADERS[name](getattr(Task, name))
+                for name in include if name in TASK_LOADERS]
+
+    return Task.query.options(*options)
 
 
 @app.route('/task/<int:task_id>')
+@validate_query('task', 'item')
 def get_task(task_id):
-    task = Task.query.get(task_id)
+    fields, include = get_fieldset(request.args.to_dict())
+    task = task_query(fields, include).get(task_id)
+
     if task is None:
         abort(404)
 
-    return jsonify(task.to_dict()), 200
+    return item_response(task, get_encoder(Task, fields, include))
 
 
 @app.route('/task/<int:task_id>', methods=['PUT'])
@@ -55,6 +133,47 @@ def create_task():
     return jsonify(task.to_dict()), 201
 
 
+@app.route('/tasks/bulk', methods=['POST'])
+@validate_json('task', 'bulk_create')
+def create_tasks_bulk():
+    """
+    Create list of tasks, each with optional list of attribute values in
+    'content', in one transaction.
+    """
+    data = request.get_json()
+    tasks = [Task.create_from_dict(item) for item in data]
+
+    try:
+        insert_tasks(db_session, tasks)
+
+        type_names = attribute_type_names(
+            db_session, [value['task_attribute_id'] for item in data
+                         for value in item.get('content', [])])
+        values = [coerce_row(dict(
+                      task_id=task.id,
+                      task_attribute_id=value['task_attribute_id'],
+                      value=value['value']), type_names)
+                  for task, item in zip(tasks, data)
+                  for value in item.get('content', [])]
+
+        db_session.bulk_insert_mappings(TaskAttributeValue, values)
+        index_tasks(db_session, [task.id for task in tasks])
+        db_session.commit()
+    except IntegrityError as e:
+        db_session.rollback()
+        return jsonify(dict(message=str(e))), 409
+    except ValidationError as e:
+        db_session.rollback()
+        return jsonify(dict(message=str(e))), 400
+
+    created = dict(
+        (task.id, task.to_dict()) for task in
+        eager_task_query().filter(Task.id.in_([task.id for task in tasks]))
+    )
+
+    return jsonify([created[task.id] for task in tasks]), 201
+
+
 @app.route('/task/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
     task = Task.query.get(task_id)
@@ -76,18 +195,157 @@ def delete_task(task_id):
 @app.route('/tasks')
 @validate_query('task', 'query')
 def get_tasks_list():
-    tasks = [task.to_dict()
-                for task in Task.query.filter_by(**request.args.to_dict()).all()]
+    args = request.args.to_dict()
+    fields, include = get_fieldset(args)
+    filters, options = split_list_options(args)
+    query = task_query(fields, include).filter_by(**filters)
 
-    return jsonify(tasks), 200
+    return list_response(query, Task, options,
+                         get_encoder(Task, fields, include))
 
 
 @app.route('/tasks', methods=['POST'])
+@validate_query('task', 'list_options')
 @validate_json('task', 'search')
 def get_tasks_list_complex():
     data = request.get_json()
+    args = request.args.to_dict()
+    fields, include = get_fieldset(args)
+    _, options = split_list_options(args)
+    query = filter_from_dict(Task, data, task_query(fields, include))
+
+    return list_response(query, Task, options,
+                         get_encoder(Task, fields, include))
 
-    tasks = [task.to_dict()
-                for task in query_from_dict(Task, data)]
 
-    return jsonify(tasks), 200
+@app.route('/tasks/by-attributes', methods=['POST'])
+@validate_query('task', 'list_options')
+@validate_json('task', 'attribute_search')
+def search_tasks_by_attributes():
+    """
+    Tasks matching 'filter' (as in POST /tasks) and conditions on their
+    attribute values in 'attributes', ordered by attribute values listed
+    in 'sort'. Sorted list can be limited, but not paged with cursor.
+    """
+    data = request.get_json()
+    args = request.args.to_dict()
+    fields, include = get_fieldset(args)
+    _, options = split_list_options(args)
+    query = filter_from_dict(Task, data.get('filter', dict()),
+                             task_query(fields, include))
+    encode = get_encoder(Task, fields, include)
+
+    try:
+        if data.get('attributes'):
+            criterion, params = attribute_filter(data['attributes'])
+            query = query.filter(criterion).params(**params)
+
+        if data.get('sort'):
+            query = sort_by_attributes(query, data['sort'])
+    except ValueError as e:
+        return jsonify(dict(message=str(e))), 400
+
+    if not data.get('sort'):
+        return list_response(query, Task, options, encode)
+
+    if 'after' in options or options.get('stream'):
+        message = 'Tasks sorted by attributes cannot be paged or streamed.'
+        return jsonify(dict(message=message)), 400
+
+    if 'limit' in options:
+        query = query.limit(options['limit'])
+
+    return encoded_response(query, encode, many=True), 200
+
+
+@app.route('/tasks/search')
+@validate_query('task', 'text_search')
+def search_tasks_by_text():
+    """
+    Tasks with all words of 'q' in name, external identifier or values of
+    string attributes, best match first. Pages have 'limit' tasks (default
+    SEARCH_LIMIT), cursor of the next page is sent in X-Next-Cursor.
+    """
+    args = request.args.to_dict()
+    fields, include = get_fieldset(args)
+    limit = int(args.get('limit', SEARCH_LIMIT))
+
+    try:
+        after = decode_cursor(args['after']) if 'after' in args else None
+        tasks, cursor = search_tasks(task_query(fields, include), args['q'],
+                                     limit, after)
+    except ValueError:
+        return jsonify(dict(message='Invalid cursor')), 400
+
+    response = encoded_response(tasks, get_encoder(Task, fields, include),
+                                many=True)
+
+    if cursor is not None:
+        response.headers['X-Next-Cursor'] = cursor
+
+    return response, 200
+
+
+@app.route('/tasks/count')
+@validate_query('task', 'count')
+def get_tasks_count():
+    query = Task.query.filter_by(**request.args.to_dict())
+
+    return jsonify(dict(count=count_tasks(query))), 200
+
+
+@app.route('/tasks/aggregate', methods=['POST'])
+@validate_json('task', 'aggregate')
+def aggregate_tasks_list():
+    """Counts and min/max dates of tasks matching filter, grouped in SQL."""
+    data = request.get_json()
+    query = filter_from_dict(Task, data.get('filter', dict()))
+
+    return jsonify(aggregate_tasks(query, data['group_by'])), 200
+
+
+@app.route('/tasks', methods=['PATCH'])
+@validate_json('task', 'bulk_update')
+def update_tasks_bulk():
+    """Update all tasks matching filter with one UPDATE statement."""
+    data = request.get_json()
+    query = filter_from_dict(Task, data['filter'])
+    task_ids = []
+
+    # Tasks matching filter can change, their ids are selected before.
+    if set(Task.SEARCHED) & set(data['changes']):
+        task_ids = [task_id for task_id, in query.with_entities(Task.id)]
+
+    try:
+        count = query.update(data['changes'], synchronize_session=False)
+        index_tasks(db_session, task_ids)
+        db_session.commit()
+    except IntegrityError as e:
+        db_session.rollback()
+        return jsonify(dict(message=str(e))), 409
+
+    return jsonify(dict(count=count)), 200
+
+
+@app.route('/tasks', methods=['DELETE'])
+@validate_json('task', 'bulk_delete')
+def delete_tasks_bulk():
+    """
+    Delete all tasks matching filter with one DELETE statement. Their
+    tombstones and search documents are handled by statements with the same
+    filter before it, so ids of deleted tasks are never loaded.
+    """
+    data = request.get_json()
+    query = filter_from_dict(Task, data['filter'])
+    task_ids = query.with_entities(Task.id).statement
+
+    try:
+        record_deletes(db_session, Task, task_ids)
+        unindex_tasks(db_session, task_ids)
+        count = query.delete(synchronize_session=False)
+        db_session.commit()
+    except IntegrityError:
+        db_session.rollback()
+        return jsonify(dict(message='Tasks cannot be deleted')), 409
+
+    return jsonify(dict(count=count)), 200
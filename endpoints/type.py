@@ -1,5 +1,6 @@
 from create_app import app
-from flask import jsonify, abort, request
+from flask import abort, request
+from json_backend import jsonify
 from models import Task, User, TaskStatus, TaskType, TaskAttribute, \
     TaskAttributeType, TaskAttributeValue, TaskAttributeToTaskType
 from database import db_session
@@ -7,17 +8,19 @@ from sqlalchemy.exc import IntegrityError, StatementError
 from sqlalchemy.orm.exc import FlushError
 from validation.json import validate_json
 from validation.query import validate_query
-from utils import query_from_dict
+from utils import filter_from_dict, split_list_options
+from responses import list_response, dict_response
+from cache import reference_cache
 
 
 @app.route('/task/type/<int:type_id>')
 def get_type(type_id):
-    task_type = TaskType.query.get(type_id)
+    task_type = reference_cache.get(TaskType, type_id)
 
     if task_type is None:
         abort(404)
 
-    return jsonify(task_type.to_dict()), 200
+    return dict_response(task_type)
 
 
 @app.route('/task/type/<int:type_id>', methods=['PUT'])
@@ -37,6 +40,8 @@ def update_type(type_id):
         db_session.rollback()
         return jsonify(message='Type name must be unique.'), 409
 
+    reference_cache.invalidate(TaskType)
+
     return jsonify(task_type.to_dict()), 200
 
 
@@ -54,6 +59,8 @@ def create_type():
         db_session.rollback()
         return jsonify(message='Type name must be unique.'), 409
 
+    reference_cache.invalidate(TaskType)
+
     return jsonify(task_type.to_dict()), 201
 
 
@@ -72,25 +79,26 @@ def delete_type(type_id):
         db_session.rollback()
         return jsonify(message='Type cannot be deleted'), 409
 
+    reference_cache.invalidate(TaskType)
+
     return '', 204
 
 
 @app.route('/task/types')
 @validate_query('type', 'query')
 def get_types_list():
-    query_data = request.args.to_dict()
-    types = [task_type.to_dict()
-             for task_type in TaskType.query.filter_by(**query_data).all()]
+    filters, options = split_list_options(request.args.to_dict())
+    query = TaskType.query.filter_by(**filters)
 
-    return jsonify(types), 200
+    return list_response(query, TaskType, options)
 
 
 @app.route('/task/types', methods=['POST'])
+@validate_query('listing', 'query')
 @validate_json('type', 'search')
 def get_types_list_complex():
     data = request.get_json()
+    _, options = split_list_options(request.args.to_dict())
+    query = filter_from_dict(TaskType, data)
 
-    types = [task_type.to_dict()
-                  for task_type in query_from_dict(TaskType, data)]
-
-    return jsonify(types), 200
+    return list_response(query, TaskType, options)
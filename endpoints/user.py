@@ -1,5 +1,6 @@
 from create_app import app
-from flask import jsonify, abort, request
+from flask import abort, request
+from json_backend import jsonify
 from models import Task, User, TaskStatus, TaskType, TaskAttribute, \
     TaskAttributeType, TaskAttributeValue, TaskAttributeToTaskType
 from database import db_session
@@ -7,7 +8,8 @@ from sqlalchemy.exc import IntegrityError, StatementError
 from sqlalchemy.orm.exc import FlushError
 from validation.json import validate_json
 from validation.query import validate_query
-from utils import query_from_dict
+from utils import filter_from_dict, split_list_options
+from responses import list_response, item_response
 
 
 @app.route('/user/<int:user_id>', methods=['GET'])
@@ -16,7 +18,7 @@ def get_user(user_id):
 
     if user is None:
         abort(404)
-    return jsonify(user.to_dict()), 200
+    return item_response(user)
 
 
 @app.route('/user/<int:user_id>', methods=['PUT'])
@@ -77,18 +79,18 @@ def delete_user(user_id):
 @app.route('/users', methods=['GET'])
 @validate_query('user', 'query')
 def get_users_list():
-    users_list = [user.to_dict()
-                  for user in User.query.filter_by(**request.args.to_dict()).all()]
+    filters, options = split_list_options(request.args.to_dict())
+    query = User.query.filter_by(**filters)
 
-    return jsonify(users_list), 200
+    return list_response(query, User, options)
 
 
 @app.route('/users', methods=['POST'])
+@validate_query('listing', 'query')
 @validate_json('user', 'search')
 def get_users_list_complex():
     data = request.get_json()
+    _, options = split_list_options(request.args.to_dict())
+    query = filter_from_dict(User, data)
 
-    users_list = [user.to_dict()
-                  for user in query_from_dict(User, data)]
-
-    return jsonify(users_list), 200
+    return list_response(query, User, options)
@@ -0,0 +1,96 @@
+"""
+Streamed export of whole tables as NDJSON or CSV.
+
+Rows are read without ORM objects, from a server side cursor (on
+PostgreSQL) in batches of EXPORT_BATCH_SIZE rows (default 10000), and
+every batch is encoded to one chunk, so memory usage does not depend on
+size of the table.
+"""
+import csv
+import io
+from sqlalchemy import DateTime, select
+from create_app import app
+from database import db_session
+from serializers import get_row_encoder
+
+# Format -> mimetype.
+FORMATS = dict(ndjson='application/x-ndjson', csv='text/csv')
+
+
+def export_query(table, since=None):
+    """Select of all rows of table (changed since) ordered by primary key."""
+    query = select([table]).order_by(*table.primary_key.columns)
+
+    if since is not None:
+        query = query.where(table.c.updated_at >= since)
+
+    return query
+
+
+def iterate_rows(query):
+    """Iterate over batches of rows of query read from server side cursor."""
+    batch_size = app.config.get('EXPORT_BATCH_SIZE', 10000)
+    connection = db_session.connection().execution_options(
+        stream_results=True)
+    result = connection.execute(query)
+
+    try:
+        while True:
+            rows = result.fetchmany(batch_size)
+
+            if not rows:
+                break
+
+            yield rows
+    finally:
+        result.close()
+
+
+def _to_iso(value):
+    return None if value is None else value.isoformat()
+
+
+def export_ndjson(table, batches):
+    """Encode batches of rows of table to JSON objects, one per line."""
+    encode = get_row_encoder(table)
+
+    for rows in batches:
+        yield '\n'.join([encode(row) for row in rows]) + '\n'
+
+
+def export_csv(table, batches):
+    """Encode batches of rows of table to CSV with header."""
+    converters = [_to_iso if isinstance(column.type, DateTime) else None
+                  for column in table.columns]
+    converted = [i for i, converter in enumerate(converters) if converter]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow([column.key for column in table.columns])
+
+    for rows in batches:
+        if converted:
+            rows = [list(row) for row in rows]
+
+            for row in rows:
+                for i in converted:
+                    row[i] = converters[i](row[i])
+
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Header of empty table.
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+EXPORTERS = dict(ndjson=export_ndjson, csv=export_csv)
+
+
+def export_table(table, format='ndjson', since=None):
+    """Chunks of table (rows changed since) in format, see FORMATS."""
+    batches = iterate_rows(export_query(table, since))
+
+    return EXPORTERS[format](table, batches)
@@ -0,0 +1,163 @@
+"""
+Change feed for incremental sync of tasks, users and attribute values.
+
+Changes are ordered by (time of change, source, primary key). Cursor is
+that triple of the last returned change, so next call continues right
+after it, even if many rows share the same updated_at (which is the
+case after bulk updates).
+
+Time of change is set by the application when a row is flushed, not when
+its transaction commits, so a row can become visible after rows changed
+later were already sent. Only changes made before 'until' are returned,
+which should be earlier than now by more than the longest transaction.
+
+Tombstones older than retention period are deleted by prune_tombstones,
+cursors older than that period are expired.
+"""
+from datetime import datetime
+from sqlalchemy import inspect
+from models import Task, User, TaskAttributeValue, Tombstone
+from utils import get_key_columns, keyset_criterion
+
+# Type of change -> model. Position in list is part of feed order.
+SOURCES = [
+    ('task', Task),
+    ('user', User),
+    ('attribute_value', TaskAttributeValue),
+]
+
+TOMBSTONES = len(SOURCES)
+
+
+class CursorExpired(Exception):
+    """Cursor is older than retained tombstones, client has to resync."""
+
+DATETIME_FORMATS = ['%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S']
+
+
+def parse_datetime(value):
+    for fmt in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+
+    raise ValueError('Invalid datetime ' + value)
+
+
+def _after_cursor(query, source, time_column, key_columns, cursor,
+                  until=None):
+    """Filter query to rows of source which come after cursor (and were
+    changed before until)."""
+    if until is not None:
+        query = query.filter(time_column < until)
+
+    if cursor is None:
+        return query
+
+    changed_at, cursor_source, key = cursor
+
+    if source < cursor_source:
+        return query.filter(time_column > changed_at)
+
+    if source > cursor_source:
+        return query.filter(time_column >= changed_at)
+
+    return query.filter(keyset_criterion(
+        [time_column] + list(key_columns), [changed_at] + key))
+
+
+def _get_source_changes(source, Class, limit, cursor, until, query=None):
+    key_columns = get_key_columns(Class)
+
+    if query is None:
+        query = Class.query
+
+    query = _after_cursor(query, source, Class.updated_at, key_columns,
+                          cursor, until)
+    query = query.order_by(Class.updated_at, *key_columns).limit(limit)
+
+    return [(item.updated_at, source, list(inspect(item).identity), dict(
+        type=name,
+        operation='upsert',
+        key=list(inspect(item).identity),
+        changed_at=item.updated_at,
+        data=item.to_dict()
+    )) for name, item in ((SOURCES[source][0], item) for item in query)]
+
+
+def _get_deletes(limit, cursor, until):
+    types = dict((Class.__tablename__, name) for name, Class in SOURCES)
+    query = _after_cursor(Tombstone.query, TOMBSTONES, Tombstone.deleted_at,
+                          [Tombstone.id], cursor, until)
+    query = query.order_by(Tombstone.deleted_at, Tombstone.id).limit(limit)
+
+    return [(item.deleted_at, TOMBSTONES, [item.id], dict(
+        type=types.get(item.table_name, item.table_name),
+        operation='delete',
+        key=item.to_dict()['key'],
+        changed_at=item.deleted_at,
+        data=None
+    )) for item in query]
+
+
+def decode_feed_cursor(values):
+    """
+    Convert values of decoded cursor to (changed_at, source, key).
+
+    Raises ValueError if values are not valid feed cursor.
+    """
+    if len(values) < 3 or not isinstance(values[0], str) or \
+            not isinstance(values[1], int) or \
+            not 0 <= values[1] <= TOMBSTONES:
+        raise ValueError('Invalid cursor')
+
+    return parse_datetime(values[0]), values[1], values[2:]
+
+
+def encode_feed_cursor(changed_at, source, key):
+    return [changed_at.isoformat(), source] + key
+
+
+def get_changes(limit, since=None, queries=None, until=None,
+                retained_since=None):
+    """
+    Return list of changes after cursor since (values of decoded cursor,
+    None for whole history) and before until, and values of cursor for
+    next call.
+
+    queries can map type of change to base query for its model, eg. to
+    set eager loading options.
+
+    Raises ValueError for invalid cursor and CursorExpired for cursor
+    older than retained_since.
+    """
+    cursor = decode_feed_cursor(since) if since is not None else None
+
+    if cursor is not None and retained_since is not None and \
+            cursor[0] < retained_since:
+        raise CursorExpired()
+
+    queries = queries or dict()
+    changes = []
+
+    for source, (name, Class) in enumerate(SOURCES):
+        changes += _get_source_changes(source, Class, limit, cursor, until,
+                                       queries.get(name))
+
+    changes += _get_deletes(limit, cursor, until)
+    changes.sort(key=lambda change: change[:3])
+    changes = changes[:limit]
+
+    if changes:
+        next_cursor = encode_feed_cursor(*changes[-1][:3])
+    else:
+        next_cursor = since
+
+    return [change[3] for change in changes], next_cursor
+
+
+def prune_tombstones(session, before):
+    """Delete tombstones of deletes made before, returns their number."""
+    return session.query(Tombstone).filter(
+        Tombstone.deleted_at < before).delete(synchronize_session=False)
@@ -0,0 +1,73 @@
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+import bcrypt
+from create_app import app
+
+_executor = None
+_executor_workers = 0
+_executor_lock = Lock()
+
+
+def get_executor():
+    """
+    Process pool for password hashing or None if hashing should be done in
+    the calling thread.
+
+    Size of the pool is set by PASSWORD_HASH_WORKERS config value, 0 (the
+    default) disables the pool. If the value changes, the old pool is shut
+    down and a new one is started with the new size.
+    """
+    global _executor, _executor_workers
+
+    workers = app.config.get('PASSWORD_HASH_WORKERS', 0)
+
+    with _executor_lock:
+        if workers != _executor_workers:
+            _shutdown()
+
+            if workers:
+                _executor = ProcessPoolExecutor(max_workers=workers)
+                _executor_workers = workers
+
+        return _executor
+
+
+def _shutdown():
+    global _executor, _executor_workers
+
+    if _executor is not None:
+        _executor.shutdown()
+
+    _executor = None
+    _executor_workers = 0
+
+
+def shutdown_executor():
+    """Shut down the pool, if it is running, after its pending hashes."""
+    with _executor_lock:
+        _shutdown()
+
+
+atexit.register(shutdown_executor)
+
+
+def hash_password(password):
+    """
+    Hash password with bcrypt using BCRYPT_LOG_ROUNDS (default 12) rounds.
+
+    The calling thread is blocked until the hash is done either way -
+    bcrypt releases the GIL, so other threads keep running without the pool
+    too. The pool only limits how many hashes run at once to
+    PASSWORD_HASH_WORKERS, so a burst of logins cannot take all cores.
+    """
+    if isinstance(password, str):
+        password = password.encode('utf-8')
+
+    salt = bcrypt.gensalt(app.config.get('BCRYPT_LOG_ROUNDS', 12))
+    executor = get_executor()
+
+    if executor is None:
+        return bcrypt.hashpw(password, salt)
+
+    return executor.submit(bcrypt.hashpw, password, salt).result()
@@ -0,0 +1,305 @@
+"""
+Bulk import of tasks and attribute values from NDJSON or CSV.
+
+Rows are read and validated (with 'import_row' schemas) in batches of
+batch_size. Valid rows of a batch are loaded with COPY on PostgreSQL and
+with one executemany INSERT on other databases, each batch in its own
+transaction together with search documents of its tasks. Exception are
+tasks without id on databases other than PostgreSQL: their generated ids
+are needed for search documents, so they are inserted by one INSERT per
+row, which is one round trip per task. Batch which
+database refused is loaded again in halves, down to single rows, so only
+the refused rows are left out. Invalid and refused rows are reported as
+rejected and do not stop the import.
+"""
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from itertools import islice
+from sqlalchemy import Boolean, Integer, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from voluptuous import MultipleInvalid
+from exceptions import ValidationError
+from models import Task, TaskAttributeValue, attribute_type_names, \
+    coerce_row, index_tasks
+from utils import TRUE_VALUES
+from validation.schemas import get_schema
+
+# Name used on command line -> (model, schema file).
+TABLES = {
+    'tasks': (Task, 'task'),
+    'attribute-values': (TaskAttributeValue, 'attribute_value'),
+}
+
+FORMATS = ('ndjson', 'csv')
+
+
+class ImportResult:
+    """Number of loaded rows and list of (line, message) of rejected."""
+
+    def __init__(self):
+        self.loaded = 0
+        self.rejected = []
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.loaded / self.seconds if self.seconds else 0.0
+
+
+def read_ndjson(lines):
+    """Iterate over (line number, dict) of non empty lines."""
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            try:
+                yield number, json.loads(line)
+            except ValueError as e:
+                yield number, e
+
+
+def read_csv(lines, table):
+    """
+    Iterate over (line number, dict) of CSV with header. Empty values are
+    left out, integer and boolean columns are converted.
+    """
+    converters = dict()
+
+    for column in table.columns:
+        if isinstance(column.type, Boolean):
+            converters[column.key] = lambda v: v.lower() in TRUE_VALUES
+        elif isinstance(column.type, Integer):
+            converters[column.key] = int
+
+    for number, row in enumerate(csv.DictReader(lines), 2):
+        try:
+            yield number, dict(
+                (key, converters[key](value) if key in converters else value)
+                for key, value in row.items() if value != '')
+        except ValueError as e:
+            yield number, e
+
+
+def prepare_row(table, data, now):
+    """
+    Row of table with all columns (id only if given) from valid data.
+    Attribute values are coerced to their types later, see coerce_rows.
+    """
+    row = dict((column.key, data.get(column.key))
+               for column in table.columns
+               if column.key != 'id' or 'id' in data)
+
+    if 'create_date' in row and row['create_date'] is None:
+        row['create_date'] = now
+
+    row['updated_at'] = now
+
+    return row
+
+
+def _copy_value(value):
+    """Value in PostgreSQL COPY text format."""
+    if value is None:
+        return '\\N'
+
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+
+    if isinstance(value, datetime):
+        return value.isoformat()
+
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t') \
+        .replace('\n', '\\n').replace('\r', '\\r')
+
+
+def copy_rows(connection, table, keys, rows):
+    """Load rows (dicts with keys) to table with COPY FROM STDIN."""
+    data = io.StringIO()
+
+    for row in rows:
+        data.write('\t'.join(_copy_value(row[key]) for key in keys))
+        data.write('\n')
+
+    data.seek(0)
+    cursor = connection.connection.cursor()
+
+    try:
+        cursor.copy_expert('COPY %s (%s) FROM STDIN' % (
+            table.name, ', '.join(keys)), data)
+    finally:
+        cursor.close()
+
+
+def load_all(connection, table, rows):
+    """Load rows with COPY on PostgreSQL, with executemany elsewhere."""
+    if connection.dialect.name == 'postgresql':
+        groups = dict()
+
+        # Rows with and without id are loaded separately.
+        for row in rows:
+            groups.setdefault(tuple(row), []).append(row)
+
+        for keys, group in groups.items():
+            copy_rows(connection, table, keys, group)
+    elif rows:
+        connection.execute(table.insert(), rows)
+
+
+def reserve_ids(connection, table, count):
+    """count new ids of table taken from its sequence (PostgreSQL only)."""
+    return [id for id, in connection.execute(
+        select([func.nextval(func.pg_get_serial_sequence(table.name, 'id'))])
+        .select_from(func.generate_series(1, count)))]
+
+
+def insert_rows(connection, table, rows):
+    """
+    Insert rows to table and return ids of tasks they belong to.
+
+    COPY cannot return generated ids, so on PostgreSQL tasks without id
+    get ids reserved from the sequence. Elsewhere they are inserted one by
+    one, each INSERT returns its id - import of such tasks is then as slow
+    as one statement per row, only rows with id use executemany.
+    """
+    if table is not Task.__table__:
+        load_all(connection, table, rows)
+        return sorted(set(row['task_id'] for row in rows))
+
+    given = [row for row in rows if 'id' in row]
+    new = [row for row in rows if 'id' not in row]
+
+    if new and connection.dialect.name == 'postgresql':
+        given += [dict(row, id=id) for row, id in
+                  zip(new, reserve_ids(connection, table, len(new)))]
+        new = []
+
+    load_all(connection, table, given)
+
+    return [row['id'] for row in given] + [
+        connection.execute(table.insert(), row).inserted_primary_key[0]
+        for row in new]
+
+
+def reset_sequence(connection, table):
+    """Move id sequence after ids loaded explicitly (PostgreSQL only)."""
+    if connection.dialect.name == 'postgresql' and 'id' in table.c:
+        connection.execute(select([func.setval(
+            func.pg_get_serial_sequence(table.name, 'id'),
+            select([func.coalesce(func.max(table.c.id), 0) + 1])
+            .as_scalar(), False)]))
+
+
+def coerce_rows(connection, rows, numbers, result):
+    """
+    Coerce attribute value rows to types of their attributes read in
+    transaction of connection. Rows not matching the type are added to
+    rejected of result. Returns (rows, numbers) of the others.
+    """
+    type_names = attribute_type_names(
+        connection, [row['task_attribute_id'] for row in rows])
+    valid = []
+    valid_numbers = []
+
+    for row, number in zip(rows, numbers):
+        try:
+            valid.append(coerce_row(row, type_names))
+        except ValidationError as e:
+            result.rejected.append((number, str(e)))
+            continue
+
+        valid_numbers.append(number)
+
+    return valid, valid_numbers
+
+
+def load_rows(engine, table, rows, numbers, result):
+    """
+    Load rows (from lines numbers) in one transaction. If database refuses
+    them, each half is loaded separately, refused single rows are added to
+    rejected of result, as are attribute values not matching type of their
+    attribute. Returns number of loaded rows.
+    """
+    try:
+        with engine.begin() as connection:
+            if table is TaskAttributeValue.__table__:
+                rows, numbers = coerce_rows(connection, rows, numbers, result)
+
+                if not rows:
+                    return 0
+
+            index_tasks(connection, insert_rows(connection, table, rows))
+    except (SQLAlchemyError, engine.dialect.dbapi.Error) as e:
+        if len(rows) == 1:
+            result.rejected.append((numbers[0], str(e).splitlines()[0]))
+            return 0
+
+        middle = len(rows) // 2
+
+        return load_rows(engine, table, rows[:middle], numbers[:middle],
+                         result) + \
+            load_rows(engine, table, rows[middle:], numbers[middle:], result)
+
+    return len(rows)
+
+
+def import_rows(engine, name, rows, batch_size=10000):
+    """
+    Import rows, iterable of (line number, dict or exception), to table
+    name (see TABLES). Returns ImportResult.
+    """
+    Class, schema_file = TABLES[name]
+    table = Class.__table__
+    schema = get_schema(schema_file, 'import_row')
+    result = ImportResult()
+    start = time.time()
+    rows = iter(rows)
+    has_ids = False
+
+    while True:
+        batch = list(islice(rows, batch_size))
+
+        if not batch:
+            break
+
+        now = datetime.utcnow()
+        valid = []
+        numbers = []
+
+        for number, data in batch:
+            if isinstance(data, Exception):
+                result.rejected.append((number, str(data)))
+                continue
+
+            try:
+                row = prepare_row(table, schema(data), now)
+            except MultipleInvalid as e:
+                result.rejected.append((number, str(e)))
+                continue
+
+            valid.append(row)
+            numbers.append(number)
+
+        if not valid:
+            continue
+
+        result.loaded += load_rows(engine, table, valid, numbers, result)
+        has_ids = has_ids or any('id' in row for row in valid)
+
+    if has_ids:
+        with engine.begin() as connection:
+            reset_sequence(connection, table)
+
+    result.seconds = time.time() - start
+
+    return result
+
+
+def import_file(engine, name, lines, format='ndjson', batch_size=10000):
+    """Import text lines of file in format (see FORMATS) to table name."""
+    if format == 'csv':
+        rows = read_csv(lines, TABLES[name][0].__table__)
+    else:
+        rows = read_ndjson(lines)
+
+    return import_rows(engine, name, rows, batch_size)
@@ -0,0 +1,239 @@
+"""
+JSON encoder and decoder used for request and response bodies.
+
+JSON_BACKEND config value selects the backend: 'orjson' (C encoder, has
+to be installed), 'json' (standard library) or 'auto' (the default) which
+uses the fastest installed one. Both backends encode datetimes as ISO 8601
+strings and bytes as base64.
+
+When the msgpack package is installed, request bodies with Content-Type
+application/msgpack are decoded the same way as JSON bodies, and clients
+which prefer application/msgpack in Accept header get responses encoded
+with MessagePack (datetimes as ISO 8601 strings, bytes as bin).
+"""
+import json
+from base64 import b64encode
+from datetime import date
+import flask
+from flask import request, has_request_context
+from create_app import app
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, 'application/x-msgpack')
+
+_backend = None
+
+
+def default(obj):
+    """Encode types which JSON does not support."""
+    if isinstance(obj, date):
+        return obj.isoformat()
+
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return b64encode(obj).decode('ascii')
+
+    raise TypeError('%r is not JSON serializable' % (obj,))
+
+
+def _json():
+    def dumps(obj, sort_keys=False):
+        return json.dumps(obj, default=default, sort_keys=sort_keys,
+                          separators=(',', ':')).encode('utf-8')
+
+    return dumps, json.loads
+
+
+def _orjson():
+    import orjson
+
+    def dumps(obj, sort_keys=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+
+        return orjson.dumps(obj, default=default, option=option)
+
+    return dumps, orjson.loads
+
+
+BACKENDS = [
+    ('orjson', _orjson),
+    ('json', _json),
+]
+
+
+def load_backend(name):
+    """
+    Return (dumps, loads) of backend name, see JSON_BACKEND.
+
+    Raises ValueError for unknown name and ImportError if the backend is
+    not installed.
+    """
+    backends = dict(BACKENDS)
+
+    if name != 'auto':
+        if name not in backends:
+            raise ValueError('Unknown JSON backend ' + name)
+
+        return backends[name]()
+
+    for _, load in BACKENDS:
+        try:
+            return load()
+        except ImportError:
+            pass
+
+
+def get_backend():
+    global _backend
+
+    if _backend is None:
+        _backend = load_backend(app.config.get('JSON_BACKEND', 'auto'))
+
+    return _backend
+
+
+def dumps(obj, sort_keys=False):
+    """Encode obj to JSON, returns UTF-8 bytes."""
+    return get_backend()[0](obj, sort_keys)
+
+
+def loads(data):
+    """Decode JSON from str or bytes."""
+    return get_backend()[1](data)
+
+
+def packb(obj):
+    """Encode obj to MessagePack."""
+    return msgpack.packb(obj, default=_msgpack_default, use_bin_type=True)
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, date):
+        return obj.isoformat()
+
+    raise TypeError('%r is not MessagePack serializable' % (obj,))
+
+
+def unpackb(data):
+    """
+    Decode MessagePack from bytes.
+
+    Raises ValueError if data is not valid MessagePack.
+    """
+    try:
+        return msgpack.unpackb(data, raw=False)
+    except Exception as e:
+        raise ValueError('Invalid MessagePack data') from e
+
+
+def response_mimetype():
+    """
+    Mimetype of response body negotiated on Accept header of request,
+    application/json unless client prefers MessagePack.
+    """
+    if msgpack is None or not has_request_context():
+        return JSON_MIMETYPE
+
+    mimetype = request.accept_mimetypes.best_match(
+        (JSON_MIMETYPE,) + MSGPACK_MIMETYPES, JSON_MIMETYPE)
+
+    return MSGPACK_MIMETYPE if mimetype in MSGPACK_MIMETYPES \
+        else JSON_MIMETYPE
+
+
+def jsonify(*args, **kwargs):
+    """Like flask.jsonify, but encoded with the configured backend."""
+    if args and kwargs:
+        raise TypeError('jsonify() behavior undefined when passed both '
+                        'args and kwargs')
+
+    if len(args) == 1:
+        data = args[0]
+    else:
+        data = args or kwargs
+
+    return app.response_class.from_data(data)
+
+
+class Request(flask.Request):
+    """
+    Request which decodes JSON body with the configured backend, or
+    MessagePack body if msgpack is installed.
+    """
+
+    _parsed_json = None
+
+    @property
+    def is_msgpack(self):
+        return msgpack is not None and self.mimetype in MSGPACK_MIMETYPES
+
+    def get_json(self, force=False, silent=False, cache=True):
+        """
+        Decoded JSON or MessagePack body or None if request is neither of
+        them (unless force). Body is decoded once, later calls return the
+        same object.
+        """
+        if self._parsed_json is not None:
+            return self._parsed_json
+
+        if not (force or self.is_json or self.is_msgpack):
+            return None
+
+        data = self.get_data(cache=cache)
+
+        try:
+            rv = unpackb(data) if self.is_msgpack else loads(data)
+        except ValueError as e:
+            if silent:
+                return None
+
+            return self.on_json_loading_failed(e)
+
+        if cache:
+            self._parsed_json = rv
+
+        return rv
+
+
+class Response(flask.Response):
+
+    @classmethod
+    def from_data(cls, data, status=None, headers=None):
+        """
+        Response with data encoded to JSON by the configured backend or to
+        MessagePack, see response_mimetype.
+        """
+        mimetype = response_mimetype()
+
+        if mimetype == MSGPACK_MIMETYPE:
+            body = packb(data)
+        else:
+            body = dumps(data)
+
+        return cls._negotiated(body, mimetype, status, headers)
+
+    @classmethod
+    def from_json(cls, text, status=None, headers=None):
+        """
+        Response with data which is already encoded to JSON. It is sent as
+        JSON whatever client prefers, bodies which are negotiated have to
+        be built by from_data.
+        """
+        return cls._negotiated(text, JSON_MIMETYPE, status, headers)
+
+    @classmethod
+    def _negotiated(cls, body, mimetype, status, headers):
+        response = cls(body, status=status, headers=headers,
+                       mimetype=mimetype)
+
+        if msgpack is not None:
+            response.vary.add('Accept')
+
+        return response
@@ -1,10 +1,16 @@
+import json
+import math
 from datetime import datetime, timezone
+from itertools import chain
 from create_app import bcrypt
-from database import Model
+from database import Model, db_session
 from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, \
-    Boolean, LargeBinary
+    Boolean, LargeBinary, Float, Index, DDL, bindparam, event, func, \
+    inspect, literal, literal_column, cast, select
 from sqlalchemy.orm import relationship
 from exceptions import ValidationError
+from hashing import hash_password
+from cache import reference_cache
 
 
 class User(Model):
@@ -18,6 +24,9 @@ class User(Model):
     is_creator = Column(Boolean(), nullable=False, default=False)
     is_contractor = Column(Boolean(), nullable=False, default=False)
     is_admin = Column(Boolean(), nullable=False, default=False)
+    updated_at = Column(DateTime(), nullable=False,
+                        default=datetime.utcnow, onupdate=datetime.utcnow,
+                        index=True)
 
     created_tasks = relationship(
         'Task', back_populates='creator', foreign_keys='Task.creator_id')
@@ -33,10 +42,11 @@ class User(Model):
         self.is_contractor = is_contractor
         self.is_admin = is_admin
 
-        self.generate_password_hash(password)
+        if password is not None:
+            self.generate_password_hash(password)
 
     def generate_password_hash(self, password):
-        self.password = bcrypt.generate_password_hash(password, rounds=12)
+        self.password = hash_password(password)
 
     def check_password_hash(self, password):
         return bcrypt.check_password_hash(self.password, password)
@@ -68,11 +78,10 @@ class User(Model):
 
     @staticmethod
     def create_from_dict(data):
-        print(data);
         if not isinstance(data, dict):
             raise TypeError
 
-        user = User(login='tmp', password='tmp',
+        user = User(login='tmp', password=None,
                     first_name='tmp', last_name='tmp')
 
         for field in user._get_fields():
@@ -94,19 +103,31 @@ class User(Model):
 
 class Task(Model):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # Also serves filters on status_id alone.
+        Index('ix_tasks_status_id_create_date', 'status_id', 'create_date'),
+        # Date ranges and date buckets in aggregates.
+        Index('ix_tasks_create_date', 'create_date'),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String(length=128), nullable=False)
     external_identifier = Column(String(length=128), nullable=True)
-    type_id = Column(Integer, ForeignKey('task_types.id'), nullable=False)
+    type_id = Column(Integer, ForeignKey('task_types.id'),
+                     nullable=False, index=True)
     end_date = Column(DateTime(), nullable=True)
     create_date = Column(DateTime(), nullable=False)
+    updated_at = Column(DateTime(), nullable=False,
+                        default=datetime.utcnow, onupdate=datetime.utcnow,
+                        index=True)
 
     # Foreign keys
     status_id = Column(Integer, ForeignKey(
         'task_statuses.id'), nullable=False)
-    creator_id = Column(Integer, ForeignKey('users.id'), nullable=False)
-    contractor_id = Column(Integer, ForeignKey('users.id'), nullable=True)
+    creator_id = Column(Integer, ForeignKey('users.id'),
+                        nullable=False, index=True)
+    contractor_id = Column(Integer, ForeignKey('users.id'),
+                           nullable=True, index=True)
 
     # Relationships
     status = relationship('TaskStatus', back_populates='tasks')
@@ -117,6 +138,13 @@ class Task(Model):
         'User', back_populates='completed_tasks', foreign_keys=[contractor_id])
     content = relationship('TaskAttributeValue')
 
+    # Columns and relationships which can be selected in to_dict().
+    FIELDS = ('id', 'name', 'external_identifier', 'type_id', 'status_id',
+              'creator_id', 'contractor_id', 'create_date', 'end_date')
+    EMBEDDED = ('content', 'status', 'creator', 'contractor')
+    # Columns in search document, with values of 'string' attributes.
+    SEARCHED = ('name', 'external_identifier')
+
     def __init__(self, name, type_id, status_id, creator_id, external_identifier=None):
         self.name = name
         self.type_id = type_id
@@ -137,37 +165,32 @@ class Task(Model):
 
         return fields
 
-    def to_dict(self):
-        rv = dict(
-            id=self.id,
-            name=self.name,
-            external_identifier=self.external_identifier,
-            type_id=self.type_id,
-            status_id=self.status_id,
-            creator_id=self.creator_id,
-            contractor_id=self.contractor_id,
-        )
+    def to_dict(self, fields=None, include=None):
+        """
+        Dict with columns in fields and relationships in include (see
+        Task.FIELDS and Task.EMBEDDED), None means all of them.
+        """
+        if fields is None:
+            fields = Task.FIELDS
 
-        if self.create_date is not None:
-            rv['create_date']=str(self.create_date.isoformat())
-        else:
-            rv['create_date'] = self.create_date
+        if include is None:
+            include = Task.EMBEDDED
 
-        if self.end_date is not None:
-            rv['end_date']=str(self.end_date.isoformat())
-        else:
-            rv['end_date'] = self.end_date
+        rv = dict((field, getattr(self, field)) for field in fields)
 
-        if self.content is not None:
+        if 'content' in include and self.content is not None:
             rv['content'] = [item.to_dict() for item in self.content]
 
-        if self.status is not None:
-            rv['status'] = self.status.to_dict()
+        if 'status' in include:
+            status = reference_cache.get(TaskStatus, self.status_id)
+
+            if status is not None:
+                rv['status'] = status
 
-        if self.creator is not None:
+        if 'creator' in include and self.creator is not None:
             rv['creator'] = self.creator.to_dict()
 
-        if self.contractor is not None:
+        if 'contractor' in include and self.contractor is not None:
             rv['contractor'] = self.contractor.to_dict()
 
         return rv
@@ -202,6 +225,8 @@ class TaskStatus(Model):
 
     id = Column(Integer, primary_key=True)
     name = Column(String(length=128), unique=True, nullable=False)
+    updated_at = Column(DateTime(), nullable=False,
+                        default=datetime.utcnow, onupdate=datetime.utcnow)
 
     tasks = relationship('Task', back_populates='status')
 
@@ -245,6 +270,8 @@ class TaskType(Model):
 
     id = Column(Integer, primary_key=True)
     name = Column(String(length=128), unique=True, nullable=False)
+    updated_at = Column(DateTime(), nullable=False,
+                        default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     tasks = relationship('Task', back_populates='type')
@@ -291,10 +318,12 @@ class TaskAttribute(Model):
 
     id = Column(Integer, primary_key=True)
     name = Column(String(length=128), unique=True, nullable=False)
+    updated_at = Column(DateTime(), nullable=False,
+                        default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Foreign keys
     type_id = Column(Integer, ForeignKey(
-        'task_attribute_types.id'), nullable=False)
+        'task_attribute_types.id'), nullable=False, index=True)
 
     def __init__(self, name, type_id):
         self.name = name
@@ -338,9 +367,11 @@ class TaskAttributeToTaskType(Model):
     task_type_id = Column(Integer, ForeignKey(
         'task_types.id'), primary_key=True, nullable=False)
     task_attribute_id = Column(Integer, ForeignKey(
-        'task_attributes.id'), primary_key=True, nullable=False)
+        'task_attributes.id'), primary_key=True, nullable=False, index=True)
     sort = Column(Integer, nullable=False, default=0)
     rules = Column(Text)
+    updated_at = Column(DateTime(), nullable=False,
+                        default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __init__(self, task_type_id, task_attribute_id, sort=0, rules=None):
         self.task_type_id = task_type_id
@@ -390,8 +421,18 @@ class TaskAttributeToTaskType(Model):
 
 class TaskAttributeValue(Model):
     __tablename__ = 'task_attribute_values'
+    __table_args__ = (
+        # Range searches on numeric attributes.
+        Index('ix_task_attribute_values_task_attribute_id_number_value',
+              'task_attribute_id', 'number_value'),
+    )
 
     value = Column(Text, nullable=False)
+    # Value as number for 'int' and 'float' attributes, set on write.
+    number_value = Column(Float, nullable=True)
+    updated_at = Column(DateTime(), nullable=False,
+                        default=datetime.utcnow, onupdate=datetime.utcnow,
+                        index=True)
 
     # Foreign keys
     task_id = Column(Integer, ForeignKey('tasks.id'),
@@ -411,6 +452,22 @@ class TaskAttributeValue(Model):
             task_attribute_id=self.task_attribute_id
         )
 
+    def coerce(self):
+        """
+        Coerce value to type of attribute and set number_value, see
+        coerce_value. Has to be called in transaction which writes value,
+        not in mapper events: type is queried, which must not run during
+        flush.
+
+        Raises ValidationError if value does not match type of attribute.
+        """
+        type_names = attribute_type_names(db_session, [self.task_attribute_id])
+        self.value, self.number_value = coerce_value(
+            self.task_attribute_id, self.value,
+            type_names.get(self.task_attribute_id))
+
+        return self
+
     def _get_fields(self):
         fields = ['value', 'task_id', 'task_attribute_id']
 
@@ -440,11 +497,29 @@ class TaskAttributeValue(Model):
         return value
 
 
+# Values are unbounded Text, which btree cannot index on PostgreSQL beyond
+# about 2.7 kB, so attribute searches use index of their first characters.
+# Bounds are literals, so that queries repeat the indexed expression.
+VALUE_INDEX_LENGTH = 200
+
+value_prefix = func.substr(TaskAttributeValue.value, literal_column('1'),
+                           literal_column(str(VALUE_INDEX_LENGTH)))
+# Rest of value after value_prefix.
+value_rest = func.substr(TaskAttributeValue.value,
+                         literal_column(str(VALUE_INDEX_LENGTH + 1)))
+
+# Attribute searches, also serves filters on task_attribute_id alone.
+Index('ix_task_attribute_values_task_attribute_id_value_prefix',
+      TaskAttributeValue.task_attribute_id, value_prefix)
+
+
 class TaskAttributeType(Model):
     __tablename__ = 'task_attribute_types'
 
     id = Column(Integer, primary_key=True)
     name = Column(String(length=128), unique=True, nullable=False)
+    updated_at = Column(DateTime(), nullable=False,
+                        default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __init__(self, name):
         self.name = name
@@ -479,3 +554,386 @@ class TaskAttributeType(Model):
 
     def to_dict(self):
         return dict(id=self.id, name=self.name)
+
+
+class TaskSearchDocument(Model):
+    """
+    Text of task searched by full-text search, see index_tasks and search
+    module.
+    """
+    __tablename__ = 'task_search_documents'
+
+    task_id = Column(Integer, primary_key=True, autoincrement=False)
+    document = Column(Text, nullable=False)
+
+
+# Text search configuration of PostgreSQL index and queries.
+SEARCH_CONFIG = 'simple'
+
+# SQLite has no tsvector, documents are indexed by FTS5 table kept in sync
+# by triggers. Its name is used by search queries.
+SEARCH_FTS_TABLE = 'task_search_fts'
+
+SEARCH_DDL = dict(
+    postgresql=[
+        "CREATE INDEX ix_task_search_documents_document "
+        "ON task_search_documents "
+        "USING gin (to_tsvector('%s', document))" % SEARCH_CONFIG,
+    ],
+    sqlite=[
+        "CREATE VIRTUAL TABLE %s USING fts5(document, "
+        "content='task_search_documents', content_rowid='task_id')"
+        % SEARCH_FTS_TABLE,
+        "CREATE TRIGGER task_search_documents_insert "
+        "AFTER INSERT ON task_search_documents BEGIN "
+        "INSERT INTO %s (rowid, document) "
+        "VALUES (new.task_id, new.document); END" % SEARCH_FTS_TABLE,
+        "CREATE TRIGGER task_search_documents_delete "
+        "AFTER DELETE ON task_search_documents BEGIN "
+        "INSERT INTO %s (%s, rowid, document) "
+        "VALUES ('delete', old.task_id, old.document); END"
+        % (SEARCH_FTS_TABLE, SEARCH_FTS_TABLE),
+    ],
+)
+
+for dialect, statements in SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(TaskSearchDocument.__table__, 'after_create',
+                     DDL(statement).execute_if(dialect=dialect))
+
+event.listen(TaskSearchDocument.__table__, 'before_drop',
+             DDL('DROP TABLE IF EXISTS %s' % SEARCH_FTS_TABLE)
+             .execute_if(dialect='sqlite'))
+
+
+class Tombstone(Model):
+    """Record of deleted row, used by change feed."""
+    __tablename__ = 'tombstones'
+
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String(length=128), nullable=False)
+    key = Column(Text, nullable=False)
+    deleted_at = Column(DateTime(), nullable=False, default=datetime.utcnow,
+                        index=True)
+
+    def __init__(self, table_name, key):
+        self.table_name = table_name
+        self.key = json.dumps(list(key))
+
+    def to_dict(self):
+        return dict(
+            id=self.id,
+            table_name=self.table_name,
+            key=json.loads(self.key),
+            deleted_at=self.deleted_at
+        )
+
+
+# Attribute type names -> kind of values stored.
+NUMERIC_TYPES = ('int', 'float')
+JSON_TYPES = ('list', 'json')
+
+
+def attribute_type_name(attribute_id):
+    """Name of type of attribute or None for unknown attribute."""
+    attribute = reference_cache.get(TaskAttribute, attribute_id)
+
+    if attribute is None:
+        return None
+
+    attribute_type = reference_cache.get(TaskAttributeType,
+                                         attribute['type_id'])
+
+    return attribute_type and attribute_type['name']
+
+
+def attribute_type_names(connection, attribute_ids):
+    """
+    Dict of attribute id -> name of its type for attributes with
+    attribute_ids, unknown attributes are left out.
+
+    Values are coerced with types read by this function in their write
+    transaction, not with reference cache, which can be stale after type
+    was changed by another process. Attributes are locked for share
+    (where supported), so their type cannot change until the values are
+    written, and change of type waits for them to be recoerced.
+    """
+    if not attribute_ids:
+        return dict()
+
+    return dict(connection.execute(
+        select([TaskAttribute.id, TaskAttributeType.name])
+        .select_from(TaskAttribute.__table__.join(TaskAttributeType))
+        .where(TaskAttribute.id.in_(sorted(set(attribute_ids))))
+        .with_for_update(read=True)).fetchall())
+
+
+def coerce_value(attribute_id, value, type_name):
+    """
+    Return (value, number_value) stored for value of attribute with type
+    type_name. Numbers are kept for 'int' and 'float' attributes, 'list'
+    and 'json' values are stored as JSON text, values of other (or unknown,
+    type_name None) attributes as text.
+
+    Raises ValidationError if value does not match type of attribute.
+    """
+    if type_name in NUMERIC_TYPES:
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            number = None
+
+        if number is None or not math.isfinite(number) or \
+                (type_name == 'int' and not number.is_integer()):
+            raise ValidationError('Invalid %s value of attribute %s: %r' % (
+                type_name, attribute_id, value))
+
+        if type_name == 'int':
+            return str(int(number)), number
+
+        return (value if isinstance(value, str) else str(number)), number
+
+    if type_name in JSON_TYPES:
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise ValidationError('Invalid JSON value of attribute %s' %
+                                      attribute_id)
+
+        if type_name == 'list' and not isinstance(value, list):
+            raise ValidationError('Value of attribute %s is not a list' %
+                                  attribute_id)
+
+        return json.dumps(value, sort_keys=True), None
+
+    return str(value), None
+
+
+def coerce_row(row, type_names):
+    """
+    Set value and number_value of dict of TaskAttributeValue columns, with
+    type_names from attribute_type_names.
+    """
+    row['value'], row['number_value'] = coerce_value(
+        row['task_attribute_id'], row['value'],
+        type_names.get(row['task_attribute_id']))
+
+    return row
+
+
+def recoerce_values(connection, attribute_id, type_name, after=0,
+                    limit=None):
+    """
+    Coerce stored values of attribute to type_name (eg. its new type) and
+    update the ones which change, with their number_value. Tasks of updated
+    values are touched. Values of tasks with id greater than after are
+    read, at most limit of them.
+
+    Returns ids of tasks whose values were read and list of (task_id,
+    message) of values which do not match the type, left unchanged.
+    """
+    table = TaskAttributeValue.__table__
+    query = select([table.c.task_id, table.c.value, table.c.number_value]) \
+        .where(table.c.task_attribute_id == attribute_id) \
+        .where(table.c.task_id > after).order_by(table.c.task_id)
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    rows = connection.execute(query).fetchall()
+    updates = []
+    invalid = []
+
+    for task_id, value, number_value in rows:
+        try:
+            coerced = coerce_value(attribute_id, value, type_name)
+        except ValidationError as e:
+            invalid.append((task_id, str(e)))
+            continue
+
+        if coerced != (value, number_value):
+            updates.append(dict(_task_id=task_id, value=coerced[0],
+                                number_value=coerced[1]))
+
+    if updates:
+        connection.execute(
+            table.update().where(
+                (table.c.task_attribute_id == attribute_id) &
+                (table.c.task_id == bindparam('_task_id'))
+            ).values(updated_at=datetime.utcnow()),
+            updates)
+        touch_tasks(connection, [row['_task_id'] for row in updates])
+
+    return [row[0] for row in rows], invalid
+
+
+def index_tasks(connection, task_ids):
+    """
+    Rebuild search documents of tasks with task_ids (list or select of
+    ids) from their name, external_identifier and values of 'string'
+    attributes. Documents of deleted tasks are removed.
+    """
+    if isinstance(task_ids, list) and not task_ids:
+        return
+
+    unindex_tasks(connection, task_ids)
+    table = TaskSearchDocument.__table__
+
+    documents = dict(
+        (row[0], list(row[1:])) for row in connection.execute(
+            select([Task.id] + [getattr(Task, name)
+                                for name in Task.SEARCHED])
+            .where(Task.id.in_(task_ids)))
+    )
+
+    values = select([TaskAttributeValue.task_id, TaskAttributeValue.value]) \
+        .select_from(TaskAttributeValue.__table__.join(TaskAttribute).join(
+            TaskAttributeType)) \
+        .where(TaskAttributeValue.task_id.in_(task_ids)) \
+        .where(TaskAttributeType.name == 'string') \
+        .order_by(TaskAttributeValue.task_id,
+                  TaskAttributeValue.task_attribute_id)
+
+    for task_id, value in connection.execute(values):
+        documents[task_id].append(value)
+
+    rows = [dict(task_id=task_id,
+                 document='\n'.join(part for part in parts if part))
+            for task_id, parts in documents.items()]
+
+    if rows:
+        connection.execute(table.insert(), rows)
+
+
+def unindex_tasks(connection, task_ids):
+    """Remove search documents of tasks with task_ids (list or select)."""
+    table = TaskSearchDocument.__table__
+    connection.execute(table.delete().where(table.c.task_id.in_(task_ids)))
+
+
+def _changed(item, names):
+    state = inspect(item)
+
+    return any(state.attrs[name].history.has_changes() for name in names)
+
+
+@event.listens_for(db_session, 'after_flush')
+def index_changed_tasks(session, flush_context):
+    task_ids = set()
+    attribute_ids = set()
+
+    for item in chain(session.new, session.dirty, session.deleted):
+        if isinstance(item, Task):
+            if item not in session.dirty or _changed(item, Task.SEARCHED):
+                task_ids.add(item.id)
+        elif isinstance(item, TaskAttributeValue):
+            # Old task too, if value was moved to another task.
+            task_ids.update(inspect(item).attrs.task_id.history.sum())
+        elif isinstance(item, TaskAttribute) and item in session.dirty:
+            if _changed(item, ('type_id',)):
+                attribute_ids.add(item.id)
+
+    if attribute_ids:
+        task_ids.update(task_id for task_id, in session.execute(
+            select([TaskAttributeValue.task_id]).where(
+                TaskAttributeValue.task_attribute_id.in_(attribute_ids))))
+
+    task_ids.discard(None)
+
+    if task_ids:
+        index_tasks(session, sorted(task_ids))
+
+
+# Models whose deletes are recorded as tombstones.
+TRACKED_MODELS = (Task, User, TaskAttributeValue)
+
+
+def record_deletes(session, Class, keys):
+    """
+    Add tombstones for rows of Class with primary keys keys - list of key
+    tuples, or select of single column key, which is inserted by one
+    INSERT ... SELECT without loading the keys.
+    """
+    if not isinstance(keys, list):
+        key = list(keys.alias().c)[0]
+        # Same text as json.dumps([key]) for integer key.
+        text = literal('[') + cast(key, String) + literal(']')
+
+        session.execute(Tombstone.__table__.insert().from_select(
+            ['table_name', 'key', 'deleted_at'],
+            select([literal(Class.__tablename__), text,
+                    literal(datetime.utcnow())])))
+        return
+
+    rows = [dict(table_name=Class.__tablename__,
+                 key=json.dumps(list(key)),
+                 deleted_at=datetime.utcnow())
+            for key in keys]
+
+    if rows:
+        session.execute(Tombstone.__table__.insert(), rows)
+
+
+def insert_tasks(session, tasks):
+    """
+    Insert new tasks (not added to session) and set their ids.
+
+    bulk_save_objects has to fetch id of every task, so it sends INSERT
+    per task. On PostgreSQL ids are taken from the sequence by one query
+    instead, and tasks are inserted by one multi-row INSERT with them. Other
+    databases keep bulk_save_objects (see benchmarks/bulk_insert.py).
+    """
+    if not tasks or session.bind.dialect.name != 'postgresql':
+        session.bulk_save_objects(tasks, return_defaults=True)
+        return
+
+    table = Task.__table__
+    ids = [id for id, in session.execute(
+        select([func.nextval(func.pg_get_serial_sequence(table.name, 'id'))])
+        .select_from(func.generate_series(1, len(tasks))))]
+    rows = []
+
+    for task, id in zip(tasks, ids):
+        task.id = id
+        row = dict()
+
+        for column in table.columns:
+            value = getattr(task, column.key)
+
+            # Multi-row VALUES need value of every column in every row.
+            if value is None and column.default is not None:
+                value = column.default.arg(None)
+
+            row[column.key] = value
+
+        rows.append(row)
+
+    session.execute(table.insert().values(rows))
+
+
+def touch_tasks(session, task_ids):
+    """Set updated_at of tasks, eg. when their content was changed."""
+    if task_ids:
+        session.execute(Task.__table__.update().where(
+            Task.id.in_(task_ids)).values(updated_at=datetime.utcnow()))
+
+
+@event.listens_for(db_session, 'after_flush')
+def touch_tasks_with_changed_content(session, flush_context):
+    task_ids = set(
+        item.task_id
+        for item in chain(session.new, session.dirty, session.deleted)
+        if isinstance(item, TaskAttributeValue)
+    )
+
+    touch_tasks(session, task_ids)
+
+
+@event.listens_for(db_session, 'after_flush')
+def record_deleted_rows(session, flush_context):
+    for Class in TRACKED_MODELS:
+        keys = [inspect(item).identity for item in session.deleted
+                if isinstance(item, Class)]
+
+        record_deletes(session, Class, keys)
@@ -0,0 +1,231 @@
+from hashlib import sha1
+from itertools import chain
+from create_app import app
+from flask import request, stream_with_context
+from sqlalchemy import func, inspect, select
+from database import db_session
+from models import Task, TaskStatus, User
+from utils import paginate, iterate_batches
+from serializers import get_encoder, encode_list, CACHED_RELATIONSHIPS
+from cache import reference_cache
+from json_backend import jsonify, dumps, response_mimetype, \
+    MSGPACK_MIMETYPE
+from compression import etag_variants
+
+
+def make_etag(*parts):
+    """Strong ETag from parts, which have to have stable repr()."""
+    return sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+# Models whose rows are embedded in bodies of Class, but whose changes do
+# not touch updated_at of Class rows. Their versions are part of ETags.
+EMBEDDED_MODELS = {
+    Task: (TaskStatus, User),
+}
+
+# Models embedded from reference cache instead of the database.
+CACHED_MODELS = set(Related for Related, _ in CACHED_RELATIONSHIPS.values())
+
+
+def embedded_versions(Class):
+    """
+    Versions of models embedded in Class (see EMBEDDED_MODELS), as list of
+    reference cache versions of cached models and list of scalar selects
+    of the latest updated_at of the others.
+    """
+    embedded = EMBEDDED_MODELS.get(Class, ())
+    cached = [reference_cache.version(Embedded) for Embedded in embedded
+              if Embedded in CACHED_MODELS]
+    selects = [select([func.max(Embedded.updated_at)]).as_scalar()
+               for Embedded in embedded if Embedded not in CACHED_MODELS]
+
+    return cached, selects
+
+
+def row_etag(item):
+    """
+    ETag of single row from its primary key and updated_at, and versions
+    of embedded models.
+    """
+    cached, selects = embedded_versions(type(item))
+    versions = db_session.query(*selects).one() if selects else ()
+
+    return make_etag(item.__tablename__, inspect(item).identity,
+                     item.updated_at, cached, tuple(versions))
+
+
+def list_etag(query, Class):
+    """
+    ETag of list returned by query, derived from number of rows matching
+    the query and the latest updated_at among them (and versions of
+    embedded models), so it costs one small aggregate query. Request args
+    (filters, page) and negotiated mimetype are part of the ETag.
+
+    Query must not have parameters set by Query.params().
+    """
+    subquery = query.order_by(None).subquery()
+    cached, selects = embedded_versions(Class)
+    row = db_session.query(func.count(), func.max(subquery.c.updated_at),
+                           *selects).one()
+
+    return make_etag(Class.__tablename__, tuple(row), cached,
+                     sorted(request.args.items(multi=True)),
+                     response_mimetype())
+
+
+def etag_matches(etag):
+    """
+    True if If-None-Match header of request has etag or ETag of its
+    compressed variant.
+    """
+    return any(variant in request.if_none_match
+               for variant in etag_variants(etag))
+
+
+def not_modified(etag):
+    response = app.response_class(status=304)
+    response.set_etag(etag)
+
+    return response
+
+
+def conditional_response(etag, build):
+    """
+    Response 304 if etag matches If-None-Match header of request,
+    otherwise response returned by build(). ETag header is set on both.
+    """
+    if etag_matches(etag):
+        return not_modified(etag)
+
+    response = build()
+    response.set_etag(etag)
+
+    return response
+
+
+def json_response(data):
+    """Response with JSON text data, see Response.from_json."""
+    return app.response_class.from_json(data)
+
+
+def encoded_response(data, encode, many=False):
+    """
+    Response with item (or list of items if many) encoded by encode to
+    JSON text, or, if client prefers MessagePack, its dicts returned by
+    encode.to_dict packed directly.
+    """
+    if response_mimetype() == MSGPACK_MIMETYPE:
+        if many:
+            data = [encode.to_dict(item) for item in data]
+        else:
+            data = encode.to_dict(data)
+
+        return app.response_class.from_data(data)
+
+    return json_response(encode_list(data, encode) if many else encode(data))
+
+
+def item_response(item, encode=None):
+    """
+    Conditional response with item encoded by encode (default encoder of
+    item's model, see serializers). ETag is derived from item's row,
+    request args (which can select fields) and negotiated mimetype.
+    """
+    if encode is None:
+        encode = get_encoder(type(item))
+
+    etag = make_etag(row_etag(item), sorted(request.args.items(multi=True)),
+                     response_mimetype())
+
+    return conditional_response(etag, lambda: encoded_response(item, encode))
+
+
+def dict_response(data):
+    """Conditional response with data and ETag computed from data."""
+    etag = make_etag(dumps(data, sort_keys=True), response_mimetype())
+
+    return conditional_response(etag, lambda: jsonify(data))
+
+
+def list_response(query, Class, options, encode=None):
+    """
+    Response with list of items from query, each encoded by encode
+    (default encoder of Class, see serializers).
+
+    options are list options returned by utils.split_list_options. If
+    there is a next page, its cursor is sent in X-Next-Cursor header.
+    With stream option the list is sent by stream_response, which sends
+    JSON only, so it is refused with 406 if client prefers MessagePack.
+    Responses to GET requests are conditional, see list_etag.
+    """
+    options = dict(options)
+
+    if options.get('stream') and response_mimetype() == MSGPACK_MIMETYPE:
+        return jsonify(dict(
+            message='Streamed lists are sent as application/json only')), 406
+
+    if encode is None:
+        encode = get_encoder(Class)
+
+    if request.method == 'GET':
+        etag = list_etag(query, Class)
+    else:
+        etag = None
+
+    if etag is not None and etag_matches(etag):
+        return not_modified(etag), 304
+
+    if options.pop('stream', False):
+        response, status = stream_response(query, Class, encode, **options)
+    else:
+        response, status = page_response(query, Class, encode, **options)
+
+    if etag is not None and status == 200:
+        response.set_etag(etag)
+
+    return response, status
+
+
+def page_response(query, Class, encode, limit=None, after=None):
+    try:
+        items, cursor = paginate(query, Class, limit, after)
+    except ValueError:
+        return jsonify(dict(message='Invalid cursor')), 400
+
+    response = encoded_response(items, encode, many=True)
+
+    if cursor is not None:
+        response.headers['X-Next-Cursor'] = cursor
+
+    return response, 200
+
+
+def stream_response(query, Class, encode, limit=None, after=None):
+    """
+    Streamed response with JSON array of items from query.
+
+    Items are loaded in batches of STREAM_BATCH_SIZE and encoded one by
+    one, so memory usage does not depend on number of items. Whole list
+    (or limit items) is sent, X-Next-Cursor is never set.
+    """
+    batch_size = app.config.get('STREAM_BATCH_SIZE', 1000)
+    batches = iterate_batches(query, Class, batch_size, limit, after)
+
+    try:
+        first_batch = next(batches, [])
+    except ValueError:
+        return jsonify(dict(message='Invalid cursor')), 400
+
+    def generate():
+        separator = '['
+
+        for batch in chain([first_batch], batches):
+            for item in batch:
+                yield separator + encode(item)
+                separator = ','
+
+        yield '[]' if separator == '[' else ']'
+
+    return app.response_class(stream_with_context(generate()),
+                              mimetype='application/json'), 200
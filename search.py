@@ -0,0 +1,116 @@
+"""
+Full-text search of tasks.
+
+Every task has a search document (TaskSearchDocument) with its name,
+external identifier and values of 'string' attributes, rebuilt by
+models.index_tasks on writes which change them. Documents are matched by
+to_tsvector with GIN index on PostgreSQL and by FTS5 table on SQLite.
+
+A task matches if its document has all words of the searched text. Tasks
+are ordered by rank, best first, and paged with cursor of (rank, task id).
+"""
+import re
+from sqlalchemy import Float, and_, cast, false, func, literal, \
+    literal_column, or_, select
+from sqlalchemy.sql import column, table
+from database import db_session
+from models import Task, TaskSearchDocument, SEARCH_CONFIG, \
+    SEARCH_FTS_TABLE, index_tasks
+from utils import encode_cursor
+
+
+def search_words(text):
+    return re.findall(r'\w+', text)
+
+
+def _postgresql_matches(words):
+    config = literal_column("'%s'" % SEARCH_CONFIG)
+    vector = func.to_tsvector(config, TaskSearchDocument.document)
+    query = func.plainto_tsquery(config, ' '.join(words))
+
+    # Rank is real, cast to double so that it survives the cursor intact.
+    return select([
+        TaskSearchDocument.task_id,
+        cast(func.ts_rank(vector, query), Float).label('rank'),
+    ]).where(vector.op('@@')(query))
+
+
+def _sqlite_matches(words):
+    fts = table(SEARCH_FTS_TABLE, column('rowid'))
+    name = literal_column(SEARCH_FTS_TABLE)
+    # Words are quoted, so that eg. 'and' is not an FTS5 operator.
+    query = ' '.join('"%s"' % word for word in words)
+
+    # bm25() is lower for better matches.
+    return select([
+        fts.c.rowid.label('task_id'),
+        (-func.bm25(name)).label('rank'),
+    ]).where(name.match(query))
+
+
+def ranked_matches(text):
+    """Select of task_id and rank of documents matching all words of text."""
+    words = search_words(text)
+
+    if not words:
+        return select([TaskSearchDocument.task_id,
+                       literal(0.0).label('rank')]).where(false())
+
+    if db_session.bind.dialect.name == 'sqlite':
+        return _sqlite_matches(words)
+
+    return _postgresql_matches(words)
+
+
+def search_tasks(query, text, limit, after=None):
+    """
+    Tasks from query matching text, best first, and cursor for the next
+    page or None if there are no more tasks. after is decoded cursor.
+
+    Raises ValueError for malformed cursor.
+    """
+    matches = ranked_matches(text).alias('matches')
+    query = query.join(matches, matches.c.task_id == Task.id) \
+        .add_columns(matches.c.rank)
+
+    if after is not None:
+        if len(after) != 2 or not all(
+                isinstance(value, (int, float)) for value in after):
+            raise ValueError('Invalid cursor')
+
+        rank, task_id = after
+        query = query.filter(or_(
+            matches.c.rank < rank,
+            and_(matches.c.rank == rank, Task.id > task_id)))
+
+    rows = query.order_by(matches.c.rank.desc(), Task.id) \
+        .limit(limit + 1).all()
+
+    if len(rows) <= limit:
+        return [task for task, _ in rows], None
+
+    task, rank = rows[limit - 1]
+
+    return [task for task, _ in rows[:limit]], encode_cursor([rank, task.id])
+
+
+def reindex_tasks(engine, batch_size=10000):
+    """Rebuild search documents of all tasks, batch_size tasks at once."""
+    last_id = 0
+
+    while True:
+        with engine.begin() as connection:
+            task_ids = [task_id for task_id, in connection.execute(
+                select([Task.id]).where(Task.id > last_id)
+                .order_by(Task.id).limit(batch_size))]
+
+            if not task_ids:
+                break
+
+            index_tasks(connection, task_ids)
+            last_id = task_ids[-1]
+
+    # Documents of tasks deleted without index_tasks.
+    with engine.begin() as connection:
+        connection.execute(TaskSearchDocument.__table__.delete().where(
+            ~TaskSearchDocument.task_id.in_(select([Task.id]))))
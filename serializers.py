@@ -0,0 +1,254 @@
+"""
+Serializers which encode rows directly to JSON text.
+
+Encoder of a model (and a fieldset) is generated once: keys are encoded in
+advance, every column gets an encoder chosen by its type and nullability,
+and attribute access is inlined, so encoding a row makes no per-field
+decisions and builds no intermediate dicts. Output is the same JSON as
+to_dict() of the model.
+
+Every encoder has to_dict attribute, generated the same way, which returns
+the dict instead of JSON text, for bodies encoded to other formats (eg.
+MessagePack) without a round trip through JSON.
+"""
+from json import dumps
+from json.encoder import encode_basestring_ascii
+from sqlalchemy import Boolean, DateTime, Integer, String, inspect
+from cache import reference_cache
+from models import User, Task, TaskStatus, TaskType, TaskAttribute, \
+    TaskAttributeType, TaskAttributeValue, TaskAttributeToTaskType
+
+# Fields of each model as returned by its to_dict().
+FIELDS = {
+    User: ('id', 'login', 'first_name', 'last_name', 'is_creator',
+           'is_contractor', 'is_admin'),
+    Task: Task.FIELDS,
+    TaskStatus: ('id', 'name'),
+    TaskType: ('id', 'name'),
+    TaskAttribute: ('id', 'name', 'type_id'),
+    TaskAttributeType: ('id', 'name'),
+    TaskAttributeToTaskType: ('task_type_id', 'task_attribute_id', 'sort',
+                              'rules'),
+    TaskAttributeValue: ('value', 'task_id', 'task_attribute_id'),
+}
+
+# Relationships embedded by to_dict().
+EMBEDDED = {
+    Task: Task.EMBEDDED,
+}
+
+# Relationships taken from reference cache instead of the database,
+# (model, name) -> (related model, foreign key attribute).
+CACHED_RELATIONSHIPS = {
+    (Task, 'status'): (TaskStatus, 'status_id'),
+}
+
+_encoders = dict()
+
+
+def _encode_bool(value):
+    return 'true' if value else 'false'
+
+
+def _encode_datetime(value):
+    return '"' + value.isoformat() + '"'
+
+
+def _nullable(encode):
+    def f(value):
+        return 'null' if value is None else encode(value)
+    return f
+
+
+def _column_encoder(column):
+    if isinstance(column.type, Boolean):
+        encode = _encode_bool
+    elif isinstance(column.type, Integer):
+        encode = str
+    elif isinstance(column.type, DateTime):
+        encode = _encode_datetime
+    elif isinstance(column.type, String):
+        encode = encode_basestring_ascii
+    else:
+        return dumps
+
+    return _nullable(encode) if column.nullable else encode
+
+
+def _key(name):
+    return encode_basestring_ascii(name) + ':'
+
+
+def _get(attribute):
+    """
+    Expression which reads attribute of item. Loaded values are read from
+    instance dict, bypassing instrumented attribute, others (expired or
+    lazy) through the attribute.
+    """
+    return '(state[%r] if %r in state else item.%s)' % (
+        attribute, attribute, attribute)
+
+
+def compile_encoder(Class, fields, include):
+    """
+    Generate function which encodes instance of Class to JSON object with
+    columns in fields and relationships in include.
+
+    Raises KeyError for unknown field or relationship.
+    """
+    mapper = inspect(Class)
+    namespace = dict(dumps=dumps)
+    parts = []
+
+    for i, field in enumerate(fields):
+        name = 'encode_%d' % i
+        namespace[name] = _column_encoder(mapper.columns[field])
+        parts.append('%r + %s(%s)' % (_key(field), name, _get(field)))
+
+    lines = [
+        'def encode(item):',
+        '    state = item.__dict__',
+        '    parts = [%s]' % ', '.join(parts),
+    ]
+
+    for i, relationship in enumerate(include):
+        name = 'embedded_%d' % i
+        key = _key(relationship)
+
+        if (Class, relationship) in CACHED_RELATIONSHIPS:
+            Related, attribute = CACHED_RELATIONSHIPS[Class, relationship]
+            namespace[name] = lambda id, Related=Related: \
+                reference_cache.get(Related, id)
+            lines += [
+                '    value = %s(%s)' % (name, _get(attribute)),
+                '    if value is not None:',
+                '        parts.append(%r + dumps(value))' % key,
+            ]
+            continue
+
+        prop = mapper.relationships[relationship]
+        namespace[name] = get_encoder(prop.mapper.class_)
+
+        if prop.uselist:
+            lines.append(
+                "    parts.append(%r + '[' + ','.join([%s(value) for value "
+                "in %s]) + ']')" % (key, name, _get(relationship)))
+        else:
+            lines += [
+                '    value = %s' % _get(relationship),
+                '    if value is not None:',
+                '        parts.append(%r + %s(value))' % (key, name),
+            ]
+
+    lines.append("    return '{' + ','.join(parts) + '}'")
+    exec('\n'.join(lines), namespace)
+
+    encode = namespace['encode']
+    encode.to_dict = compile_dict_encoder(Class, fields, include)
+
+    return encode
+
+
+def compile_dict_encoder(Class, fields, include):
+    """
+    Generate function which returns dict of instance of Class, with the
+    same keys and values as JSON object encoded by compile_encoder, except
+    that datetimes are left to the encoder of the dict.
+    """
+    mapper = inspect(Class)
+    namespace = dict()
+    items = []
+
+    # Fields are already checked by compile_encoder.
+    for field in fields:
+        items.append('%r: %s' % (field, _get(field)))
+
+    lines = [
+        'def to_dict(item):',
+        '    state = item.__dict__',
+        '    data = {%s}' % ', '.join(items),
+    ]
+
+    for i, relationship in enumerate(include):
+        name = 'embedded_%d' % i
+
+        if (Class, relationship) in CACHED_RELATIONSHIPS:
+            Related, attribute = CACHED_RELATIONSHIPS[Class, relationship]
+            namespace[name] = lambda id, Related=Related: \
+                reference_cache.get(Related, id)
+            lines += [
+                '    value = %s(%s)' % (name, _get(attribute)),
+                '    if value is not None:',
+                '        data[%r] = value' % relationship,
+            ]
+            continue
+
+        prop = mapper.relationships[relationship]
+        namespace[name] = get_encoder(prop.mapper.class_).to_dict
+
+        if prop.uselist:
+            lines.append('    data[%r] = [%s(value) for value in %s]' % (
+                relationship, name, _get(relationship)))
+        else:
+            lines += [
+                '    value = %s' % _get(relationship),
+                '    if value is not None:',
+                '        data[%r] = %s(value)' % (relationship, name),
+            ]
+
+    lines.append('    return data')
+    exec('\n'.join(lines), namespace)
+
+    return namespace['to_dict']
+
+
+def get_encoder(Class, fields=None, include=None):
+    """
+    Cached encoder of Class, see compile_encoder. None means fields or
+    relationships returned by to_dict() of Class.
+    """
+    if fields is None:
+        fields = FIELDS[Class]
+
+    if include is None:
+        include = EMBEDDED.get(Class, ())
+
+    key = (Class, tuple(sorted(set(fields))), tuple(sorted(set(include))))
+
+    try:
+        return _encoders[key]
+    except KeyError:
+        encode = _encoders[key] = compile_encoder(*key)
+        return encode
+
+
+def compile_row_encoder(table):
+    """
+    Generate function which encodes row of table (sequence of values of
+    all its columns, as returned by select of the table) to JSON object.
+    """
+    namespace = dict()
+    parts = []
+
+    for i, column in enumerate(table.columns):
+        namespace['encode_%d' % i] = _column_encoder(column)
+        parts.append('%r + encode_%d(row[%d])' % (_key(column.key), i, i))
+
+    exec("def encode(row):\n    return '{' + %s + '}'" %
+         " + ',' + ".join(parts), namespace)
+
+    return namespace['encode']
+
+
+def get_row_encoder(table):
+    """Cached encoder of rows of table, see compile_row_encoder."""
+    try:
+        return _encoders[table]
+    except KeyError:
+        encode = _encoders[table] = compile_row_encoder(table)
+        return encode
+
+
+def encode_list(items, encode):
+    """JSON array of items encoded by encode."""
+    return '[' + ','.join([encode(item) for item in items]) + ']'
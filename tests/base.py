@@ -8,6 +8,8 @@ class Base(TestCase):
 
     def create_app(self):
         app.config.from_object('settings.TestConfig')
+        # The lowest cost bcrypt accepts, users are created in every test.
+        app.config['BCRYPT_LOG_ROUNDS'] = 4
         self.engine = create_engine(app.config['SQLALCHEMY_DATABASE_URI'])
         return app
 
@@ -1,7 +1,11 @@
+from click.testing import CliRunner
+from flask.cli import ScriptInfo
 from tests.base import Base
 from tests.utils import is_json
 from flask import json
 from models import TaskAttribute, TaskAttributeValue
+from create_app import backfill_values_command
+from cache import reference_cache
 from database import db_session
 from exceptions import ValidationError
 from utils import query_from_dict
@@ -142,6 +146,61 @@ class TestAttribute(Base):
 
         self.assertEqual(data, attribute.to_dict())
 
+    def _update_type(self, attribute_id, type_id):
+        return self.client.put(
+            '/task/attribute/%d' % attribute_id,
+            data=json.dumps(dict(type_id=type_id)),
+            headers={'Content-Type': 'application/json'}
+        )
+
+    def test_update_attribute_type_coerces_values(self):
+        TaskAttributeValue.query.get((2, 3)).value = '12.5'
+        db_session.commit()
+
+        # 'Opis' from string to float, 'Cena' from float to int.
+        self.assertStatus(self._update_type(3, 3), 200)
+        self.assertStatus(self._update_type(2, 2), 200)
+
+        values = dict(((value.task_id, value.task_attribute_id),
+                       (value.value, value.number_value))
+                      for value in TaskAttributeValue.query)
+
+        self.assertEqual(values[2, 3], ('12.5', 12.5))
+        self.assertEqual(values[1, 2], ('10', 10))
+        self.assertEqual(values[2, 2], ('110', 110))
+
+    def test_update_attribute_type_invalid_values(self):
+        # 'Laptop Asus2' is not a number.
+        response = self._update_type(1, 3)
+
+        self.assertStatus(response, 409)
+        self.assertIn('attribute 1', json.loads(response.get_data())['message'])
+        self.assertEqual(TaskAttribute.query.get(1).type_id, 1)
+        self.assertIsNone(TaskAttributeValue.query.get((2, 1)).number_value)
+
+    def test_backfill_values_command(self):
+        db_session.execute(TaskAttributeValue.__table__.update().values(
+            number_value=None))
+        db_session.execute(TaskAttributeValue.__table__.insert().values(
+            task_id=1, task_attribute_id=1, value='Monitor'))
+        db_session.execute(TaskAttribute.__table__.update().where(
+            TaskAttribute.id == 1).values(type_id=3))
+        db_session.commit()
+        reference_cache.clear()
+        self.addCleanup(reference_cache.clear)
+
+        result = CliRunner().invoke(
+            backfill_values_command, ['--batch-size', '1'],
+            obj=ScriptInfo(create_app=lambda *args: self.app))
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('2 invalid', result.output)
+        self.assertEqual(
+            dict(((value.task_id, value.task_attribute_id), value.number_value)
+                 for value in TaskAttributeValue.query),
+            {(1, 1): None, (1, 2): 10, (2, 1): None, (2, 2): 110,
+             (2, 3): None})
+
     def test_update_not_existing_attribute(self):
         attribute = TaskAttribute.query.first()
 
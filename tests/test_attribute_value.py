@@ -1,10 +1,11 @@
 from tests.base import Base
-from tests.utils import is_json
+from tests.utils import is_json, count_queries
 from flask import json
-from models import TaskAttributeValue, TaskAttribute
+from models import TaskAttributeValue, TaskAttribute, attribute_type_name
 from database import db_session
+from cache import reference_cache
 from exceptions import ValidationError
-from utils import query_from_dict
+from utils import query_from_dict, encode_cursor
 import unittest
 
 
@@ -29,6 +30,28 @@ class TestAttributeValue(Base):
         response = self.client.get('/task/attribute/value/' + str(1000000))
         self.assertStatus(response, 404)
 
+    def test_coerce(self):
+        value = TaskAttributeValue(1, 3, 12).coerce()
+        self.assertEqual((value.value, value.number_value), ('12', None))
+
+        value = TaskAttributeValue(1, 2, '12.5').coerce()
+        self.assertEqual((value.value, value.number_value), ('12.5', 12.5))
+
+        with self.assertRaises(ValidationError):
+            TaskAttributeValue(1, 2, 'abc').coerce()
+
+    def test_flush_does_not_load_reference_cache(self):
+        reference_cache.clear()
+        db_session.add(TaskAttributeValue(1, 3, 'Monitor'))
+
+        with count_queries(self.engine) as statements:
+            db_session.commit()
+
+        # Reference cache loads whole tables of attributes and their types.
+        self.assertFalse([statement for statement in statements
+                          if statement.startswith(('SELECT task_attributes.',
+                                                   'SELECT task_attribute_types.'))])
+
     def test_update_from_dict(self):
         attribute_value = TaskAttributeValue.query.first()
 
@@ -482,3 +505,215 @@ class TestAttributeValue(Base):
         )
 
         self.assertStatus(response, 400)
+
+    def test_get_value_list_paginated(self):
+        keys = []
+        cursor = ''
+
+        while cursor is not None:
+            url = '/task/attribute/values?limit=3'
+
+            if cursor:
+                url += '&after=' + cursor
+
+            response = self.client.get(url)
+            self.assertStatus(response, 200)
+
+            data = json.loads(response.get_data())
+            keys += [(item['task_id'], item['task_attribute_id'])
+                     for item in data]
+            cursor = response.headers.get('X-Next-Cursor')
+
+        values = TaskAttributeValue.query.order_by(
+            TaskAttributeValue.task_id,
+            TaskAttributeValue.task_attribute_id).all()
+
+        self.assertEqual(
+            keys, [(item.task_id, item.task_attribute_id) for item in values])
+
+    def test_get_value_list_paginated_invalid_cursor(self):
+        response = self.client.get('/task/attribute/values?limit=3')
+        cursor = response.headers.get('X-Next-Cursor')
+
+        response = self.client.get('/task/statuses?limit=3&after=' + cursor)
+        self.assertStatus(response, 400)
+
+        for values in (['1', 2], [1, 2.5], [True, 1], [1, None], [[1], 1]):
+            response = self.client.get(
+                '/task/attribute/values?limit=3&after=' +
+                encode_cursor(values))
+            self.assertStatus(response, 400)
+
+            response = self.client.get(
+                '/task/attribute/values?stream=true&after=' +
+                encode_cursor(values))
+            self.assertStatus(response, 400)
+
+    def test_create_attribute_values_bulk(self):
+        count_before_insert = TaskAttributeValue.query.count()
+
+        values_list = [
+            dict(task_id=1, task_attribute_id=1, value='abc'),
+            dict(task_id=1, task_attribute_id=3, value='def'),
+        ]
+
+        response = self.client.post(
+            '/task/attribute/values/bulk',
+            data=json.dumps(values_list),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 201)
+        self.assertEqual(json.loads(response.get_data()), values_list)
+        self.assertEqual(TaskAttributeValue.query.count(),
+                         count_before_insert + 2)
+        self.assertEqual(TaskAttributeValue.query.get((1, 3)).value, 'def')
+
+    def test_create_attribute_values_bulk_invalid_data(self):
+        values_list = [
+            dict(task_id=1, task_attribute_id=1, value='abc'),
+            dict(task_id=1, task_attribute_id='abc', value='def'),
+        ]
+
+        response = self.client.post(
+            '/task/attribute/values/bulk',
+            data=json.dumps(values_list),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 400)
+        self.assertIsNone(TaskAttributeValue.query.get((1, 1)))
+
+    def test_create_attribute_values_bulk_duplicate(self):
+        count_before_insert = TaskAttributeValue.query.count()
+
+        values_list = [
+            dict(task_id=1, task_attribute_id=1, value='abc'),
+            dict(task_id=1, task_attribute_id=2, value='5'),
+        ]
+
+        response = self.client.post(
+            '/task/attribute/values/bulk',
+            data=json.dumps(values_list),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 409)
+        self.assertEqual(TaskAttributeValue.query.count(), count_before_insert)
+
+    def _add_attribute(self, type_id):
+        attribute = TaskAttribute(name='Typed', type_id=type_id)
+        db_session.add(attribute)
+        db_session.commit()
+
+        return attribute.id
+
+    def _create_value(self, task_attribute_id, value):
+        return self.client.post(
+            '/task/attribute/value',
+            data=json.dumps(dict(task_id=1,
+                                 task_attribute_id=task_attribute_id,
+                                 value=value)),
+            headers={'Content-Type': 'application/json'}
+        )
+
+    def test_create_numeric_attribute_value(self):
+        attribute_id = self._add_attribute(3)
+        response = self._create_value(attribute_id, '12.50')
+
+        self.assertStatus(response, 201)
+        attribute_value = TaskAttributeValue.query.get((1, attribute_id))
+        self.assertEqual(attribute_value.value, '12.50')
+        self.assertEqual(attribute_value.number_value, 12.5)
+
+    def test_create_numeric_attribute_value_invalid(self):
+        count_before_insert = TaskAttributeValue.query.count()
+
+        response = self._create_value(2, 'cheap')
+
+        self.assertStatus(response, 400)
+        self.assertEqual(TaskAttributeValue.query.count(),
+                         count_before_insert)
+
+    def test_create_int_attribute_value(self):
+        attribute_id = self._add_attribute(2)
+
+        self.assertStatus(self._create_value(attribute_id, '2.5'), 400)
+        self.assertStatus(self._create_value(attribute_id, '3.0'), 201)
+
+        attribute_value = TaskAttributeValue.query.get((1, attribute_id))
+        self.assertEqual(attribute_value.value, '3')
+        self.assertEqual(attribute_value.number_value, 3)
+
+    def test_create_list_attribute_value(self):
+        attribute_id = self._add_attribute(4)
+
+        self.assertStatus(self._create_value(attribute_id, 'a, b'), 400)
+        self.assertStatus(self._create_value(attribute_id, '{"a": 1}'), 400)
+        self.assertStatus(self._create_value(attribute_id, '["a","b"]'), 201)
+
+        attribute_value = TaskAttributeValue.query.get((1, attribute_id))
+        self.assertEqual(attribute_value.value, '["a", "b"]')
+        self.assertIsNone(attribute_value.number_value)
+
+    def test_update_numeric_attribute_value(self):
+        response = self.client.put(
+            '/task/attribute/value/2/2',
+            data=json.dumps(dict(value='cheap')),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 400)
+
+        response = self.client.put(
+            '/task/attribute/value/2/2',
+            data=json.dumps(dict(value='99.9')),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 200)
+        attribute_value = TaskAttributeValue.query.get((2, 2))
+        self.assertEqual(attribute_value.number_value, 99.9)
+
+    def test_value_coerced_with_current_type(self):
+        attribute_id = self._add_attribute(1)
+        self.addCleanup(reference_cache.clear)
+        reference_cache.clear()
+        self.assertEqual(attribute_type_name(attribute_id), 'string')
+
+        # Type changed by another process, cache still has the old one.
+        TaskAttribute.query.get(attribute_id).type_id = 3
+        db_session.commit()
+
+        self.assertStatus(self._create_value(attribute_id, 'cheap'), 400)
+        self.assertStatus(self._create_value(attribute_id, '12.5'), 201)
+        self.assertEqual(
+            TaskAttributeValue.query.get((1, attribute_id)).number_value, 12.5)
+
+    def test_create_attribute_values_bulk_typed(self):
+        attribute_id = self._add_attribute(3)
+        values_list = [
+            dict(task_id=1, task_attribute_id=1, value='abc'),
+            dict(task_id=1, task_attribute_id=attribute_id, value='cheap'),
+        ]
+
+        response = self.client.post(
+            '/task/attribute/values/bulk',
+            data=json.dumps(values_list),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 400)
+        self.assertIsNone(TaskAttributeValue.query.get((1, 1)))
+
+        values_list[1]['value'] = '7'
+
+        response = self.client.post(
+            '/task/attribute/values/bulk',
+            data=json.dumps(values_list),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 201)
+        self.assertEqual(
+            TaskAttributeValue.query.get((1, attribute_id)).number_value, 7)
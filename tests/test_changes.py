@@ -0,0 +1,190 @@
+from datetime import datetime, timedelta
+from click.testing import CliRunner
+from flask.cli import ScriptInfo
+from tests.base import Base
+from tests.utils import is_json
+from flask import json
+from models import Task, User, TaskAttributeValue, Tombstone
+from database import db_session
+from utils import encode_cursor
+from create_app import prune_tombstones_command
+
+
+class TestChanges(Base):
+
+    def setUp(self):
+        super().setUp()
+        self.app.config['CHANGES_SAFETY_LAG'] = 0
+
+    def tearDown(self):
+        self.app.config.pop('CHANGES_SAFETY_LAG', None)
+        super().tearDown()
+
+    def _get_all_changes(self, limit):
+        changes = []
+        response = self.client.get('/changes?limit=' + str(limit))
+
+        while True:
+            self.assertStatus(response, 200)
+            page = json.loads(response.get_data())
+            cursor = response.headers['X-Next-Cursor']
+
+            if not page:
+                return changes, cursor
+
+            self.assertLessEqual(len(page), limit)
+            changes += page
+            response = self.client.get(
+                '/changes?limit=' + str(limit) + '&since=' + cursor)
+
+    def test_get_changes(self):
+        response = self.client.get('/changes')
+
+        self.assertStatus(response, 200)
+        self.assertTrue(is_json(response.get_data()), 'Response is not json')
+        self.assertIn('X-Next-Cursor', response.headers)
+
+        data = json.loads(response.get_data())
+        types = set(change['type'] for change in data)
+
+        self.assertEqual(types, {'task', 'user', 'attribute_value'})
+
+        for change in data:
+            self.assertEqual(change['operation'], 'upsert')
+
+    def test_changes_are_paged_without_duplicates(self):
+        changes, _ = self._get_all_changes(3)
+        expected = Task.query.count() + User.query.count() + \
+            TaskAttributeValue.query.count()
+
+        keys = set((change['type'], tuple(change['key']))
+                   for change in changes)
+
+        self.assertEqual(len(changes), expected)
+        self.assertEqual(len(keys), expected)
+
+        dates = [change['changed_at'] for change in changes]
+        self.assertEqual(dates, sorted(dates))
+
+    def test_changes_since_cursor(self):
+        _, cursor = self._get_all_changes(100)
+        task = Task.query.first()
+
+        response = self.client.put(
+            '/task/' + str(task.id), data=json.dumps(dict(name='Changed')),
+            content_type='application/json')
+        self.assertStatus(response, 200)
+
+        response = self.client.get('/changes?since=' + cursor)
+        self.assertStatus(response, 200)
+
+        data = json.loads(response.get_data())
+
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['type'], 'task')
+        self.assertEqual(data[0]['key'], [task.id])
+        self.assertEqual(data[0]['data']['name'], 'Changed')
+
+        next_cursor = response.headers['X-Next-Cursor']
+        response = self.client.get('/changes?since=' + next_cursor)
+
+        self.assertEqual(json.loads(response.get_data()), [])
+        self.assertEqual(response.headers['X-Next-Cursor'], next_cursor)
+
+    def test_deletes_are_in_feed(self):
+        task = Task(name='tmp', type_id=1, status_id=1, creator_id=1)
+        db_session.add(task)
+        db_session.commit()
+        task_id = task.id
+
+        _, cursor = self._get_all_changes(100)
+
+        response = self.client.delete('/task/' + str(task_id))
+        self.assertStatus(response, 204)
+
+        response = self.client.get('/changes?since=' + cursor)
+        data = json.loads(response.get_data())
+
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['type'], 'task')
+        self.assertEqual(data[0]['operation'], 'delete')
+        self.assertEqual(data[0]['key'], [task_id])
+        self.assertIsNone(data[0]['data'])
+
+    def test_bulk_deletes_are_in_feed(self):
+        for i in range(3):
+            db_session.add(Task(name='bulk' + str(i), type_id=1, status_id=1,
+                                creator_id=1))
+        db_session.commit()
+        task_ids = sorted(task.id for task in Task.query.filter(
+            Task.name.startswith('bulk')))
+
+        _, cursor = self._get_all_changes(100)
+
+        data = dict(filter=dict(name=dict(value='bulk', operator='prefix')))
+        response = self.client.delete(
+            '/tasks', data=json.dumps(data), content_type='application/json')
+        self.assertStatus(response, 200)
+
+        response = self.client.get('/changes?since=' + cursor)
+        data = json.loads(response.get_data())
+
+        self.assertEqual(len(data), 3)
+        self.assertEqual(set(change['operation'] for change in data),
+                         {'delete'})
+        self.assertEqual(sorted(change['key'] for change in data),
+                         [[task_id] for task_id in task_ids])
+
+    def test_invalid_since(self):
+        response = self.client.get('/changes?since=abc')
+        self.assertStatus(response, 400)
+
+        response = self.client.get('/changes?limit=0')
+        self.assertStatus(response, 400)
+
+        for values in ([1, 0, 1], [None, 0, 1], ['abc', 0, 1]):
+            response = self.client.get(
+                '/changes?since=' + encode_cursor(values))
+            self.assertStatus(response, 400)
+
+    def test_recent_changes_are_held_back(self):
+        _, cursor = self._get_all_changes(100)
+        self.client.put(
+            '/task/1', data=json.dumps(dict(name='Changed')),
+            content_type='application/json')
+        self.app.config['CHANGES_SAFETY_LAG'] = 60
+
+        response = self.client.get('/changes?since=' + cursor)
+
+        self.assertStatus(response, 200)
+        self.assertEqual(json.loads(response.get_data()), [])
+        self.assertEqual(response.headers['X-Next-Cursor'], cursor)
+
+        self.app.config['CHANGES_SAFETY_LAG'] = 0
+        response = self.client.get('/changes?since=' + cursor)
+
+        self.assertEqual(len(json.loads(response.get_data())), 1)
+
+    def test_expired_cursor(self):
+        old = datetime.utcnow() - timedelta(days=31)
+        cursor = encode_cursor([old.isoformat(), 0, 1])
+
+        response = self.client.get('/changes?since=' + cursor)
+        self.assertStatus(response, 410)
+
+    def test_prune_tombstones(self):
+        db_session.add(Tombstone('tasks', [100]))
+        db_session.add(Tombstone('tasks', [101]))
+        db_session.commit()
+        Tombstone.query.filter_by(key='[100]').update(
+            dict(deleted_at=datetime.utcnow() - timedelta(days=40)),
+            synchronize_session=False)
+        db_session.commit()
+
+        result = CliRunner().invoke(
+            prune_tombstones_command,
+            obj=ScriptInfo(create_app=lambda *args: self.app))
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Deleted 1 tombstones', result.output)
+        self.assertEqual([item.key for item in Tombstone.query], ['[101]'])
@@ -0,0 +1,140 @@
+import gzip
+import threading
+import zlib
+from tests.base import Base
+from flask import json
+from database import db_session
+from models import Task
+from compression import compress_stream, compressed_cache
+
+
+class TestCompression(Base):
+
+    def setUp(self):
+        super().setUp()
+        compressed_cache.clear()
+
+        for i in range(20):
+            db_session.add(Task(name='task ' + str(i), type_id=1,
+                                status_id=1, creator_id=1))
+        db_session.commit()
+
+    def test_list_is_compressed(self):
+        plain = self.client.get('/tasks')
+        response = self.client.get(
+            '/tasks', headers={'Accept-Encoding': 'gzip, deflate'})
+
+        self.assertStatus(response, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertLess(len(response.get_data()), len(plain.get_data()))
+        self.assertEqual(gzip.decompress(response.get_data()),
+                         plain.get_data())
+        self.assertEqual(response.headers['ETag'],
+                         plain.headers['ETag'][:-1] + '-gzip"')
+
+    def test_small_response_is_not_compressed(self):
+        response = self.client.get(
+            '/task/status/1', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertStatus(response, 200)
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_encoding_not_accepted(self):
+        response = self.client.get(
+            '/tasks', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+
+        self.assertStatus(response, 200)
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_streamed_list_is_compressed(self):
+        plain = self.client.get('/tasks?stream=true')
+        response = self.client.get(
+            '/tasks?stream=true', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertStatus(response, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            json.loads(gzip.decompress(response.get_data())),
+            json.loads(plain.get_data()))
+
+    def test_streamed_list_etag_has_encoding(self):
+        plain = self.client.get('/tasks?stream=true')
+        response = self.client.get(
+            '/tasks?stream=true', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(response.headers['ETag'],
+                         plain.headers['ETag'][:-1] + '-gzip"')
+
+    def test_streamed_chunks_are_flushed(self):
+        chunks = compress_stream(iter(['[{"id": 1}', ', {"id": 2}]']),
+                                 'gzip')
+
+        self.assertEqual(zlib.decompressobj(31).decompress(next(chunks)),
+                         b'[{"id": 1}')
+
+    def test_compressed_body_is_cached(self):
+        headers = {'Accept-Encoding': 'gzip'}
+        response = self.client.get('/tasks', headers=headers)
+        etag = response.headers['ETag'].strip('"')[:-len('-gzip')]
+
+        self.assertEqual(compressed_cache.get((etag, 'application/json', 'gzip')),
+                         response.get_data())
+
+        compressed_cache.set((etag, 'application/json', 'gzip'), b'cached')
+        response = self.client.get('/tasks', headers=headers)
+
+        self.assertEqual(response.get_data(), b'cached')
+
+    def test_compressed_body_changes_with_embedded_rows(self):
+        headers = {'Accept-Encoding': 'gzip'}
+        self.client.get('/tasks', headers=headers)
+
+        self.client.put(
+            '/task/status/1',
+            data=json.dumps(dict(name='Nowe zadanie')),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        response = self.client.get('/tasks', headers=headers)
+        names = set(task['status']['name'] for task in
+                    json.loads(gzip.decompress(response.get_data())))
+
+        self.assertIn('Nowe zadanie', names)
+
+    def test_cache_concurrent_access(self):
+        self.app.config['COMPRESS_CACHE_SIZE'] = 2
+        errors = []
+
+        def work(offset):
+            try:
+                for i in range(2000):
+                    compressed_cache.set((offset + i % 5,), b'data')
+                    compressed_cache.get((offset + (i + 1) % 5,))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(i,))
+                   for i in range(4)]
+
+        try:
+            for thread in threads:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+        finally:
+            del self.app.config['COMPRESS_CACHE_SIZE']
+
+        self.assertEqual(errors, [])
+
+    def test_compressed_etag_is_not_modified(self):
+        response = self.client.get(
+            '/tasks', headers={'Accept-Encoding': 'gzip'})
+
+        response = self.client.get('/tasks', headers={
+            'Accept-Encoding': 'gzip',
+            'If-None-Match': response.headers['ETag'],
+        })
+
+        self.assertStatus(response, 304)
@@ -0,0 +1,89 @@
+import csv
+import gzip
+import io
+from datetime import datetime, timedelta
+from tests.base import Base
+from flask import json
+from database import db_session
+from models import Task, TaskAttributeValue
+
+
+class TestExport(Base):
+
+    def test_export_tasks_ndjson(self):
+        response = self.client.get('/export/tasks')
+
+        self.assertStatus(response, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+
+        rows = [json.loads(line)
+                for line in response.get_data().decode().splitlines()]
+        tasks = Task.query.order_by(Task.id).all()
+
+        self.assertEqual([row['id'] for row in rows],
+                         [task.id for task in tasks])
+        self.assertEqual(rows[0]['name'], tasks[0].name)
+        self.assertEqual(rows[0]['create_date'],
+                         tasks[0].create_date.isoformat())
+
+    def test_export_attribute_values_csv(self):
+        response = self.client.get('/export/attribute-values?format=csv')
+
+        self.assertStatus(response, 200)
+        self.assertEqual(response.mimetype, 'text/csv')
+
+        rows = list(csv.DictReader(
+            io.StringIO(response.get_data().decode())))
+
+        self.assertEqual(len(rows), TaskAttributeValue.query.count())
+        self.assertEqual(set(rows[0]), {'task_id', 'task_attribute_id',
+                                        'value', 'number_value',
+                                        'updated_at'})
+
+    def test_export_in_batches(self):
+        self.app.config['EXPORT_BATCH_SIZE'] = 1
+
+        try:
+            response = self.client.get('/export/tasks?format=csv')
+        finally:
+            del self.app.config['EXPORT_BATCH_SIZE']
+
+        rows = list(csv.reader(io.StringIO(response.get_data().decode())))
+
+        self.assertEqual(len(rows), Task.query.count() + 1)
+
+    def test_export_since(self):
+        task = Task.query.first()
+        since = datetime.utcnow() + timedelta(days=1)
+        task.updated_at = since
+        db_session.commit()
+
+        response = self.client.get(
+            '/export/tasks?since=' + since.isoformat())
+        lines = response.get_data().decode().splitlines()
+
+        self.assertEqual([json.loads(line)['id'] for line in lines],
+                         [task.id])
+
+        response = self.client.get(
+            '/export/tasks?format=csv&since=' +
+            (since + timedelta(days=1)).isoformat())
+
+        self.assertEqual(response.get_data().decode().splitlines(),
+                         [','.join(c.key for c in Task.__table__.columns)])
+
+    def test_export_gzip(self):
+        plain = self.client.get('/export/tasks')
+        response = self.client.get(
+            '/export/tasks', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.get_data()),
+                         plain.get_data())
+
+    def test_export_invalid_args(self):
+        response = self.client.get('/export/tasks?format=xml')
+        self.assertStatus(response, 400)
+
+        response = self.client.get('/export/tasks?since=yesterday')
+        self.assertStatus(response, 400)
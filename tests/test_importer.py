@@ -0,0 +1,171 @@
+import io
+import json
+import os
+import tempfile
+from datetime import datetime
+from click.testing import CliRunner
+from flask.cli import ScriptInfo
+from tests.base import Base
+from models import Task, TaskAttribute, TaskAttributeValue
+from database import db_session
+from importer import import_file, insert_rows
+from create_app import import_command
+
+
+class TestImporter(Base):
+
+    def _lines(self, rows):
+        return io.StringIO('\n'.join(
+            row if isinstance(row, str) else json.dumps(row)
+            for row in rows) + '\n')
+
+    def test_import_ndjson(self):
+        count = Task.query.count()
+        lines = self._lines([
+            dict(name='imported 1', type_id=1, status_id=1, creator_id=1),
+            dict(name='imported 2', type_id=2, status_id=2, creator_id=2,
+                 contractor_id=3, create_date='2016-01-01T10:00:00'),
+            dict(name='', type_id=1, status_id=1, creator_id=1),
+            '{"name": ',
+        ])
+
+        result = import_file(self.engine, 'tasks', lines, batch_size=2)
+
+        self.assertEqual(result.loaded, 2)
+        self.assertEqual([number for number, _ in result.rejected], [3, 4])
+        self.assertEqual(Task.query.count(), count + 2)
+
+        task = Task.query.filter_by(name='imported 2').one()
+
+        self.assertEqual(task.create_date, datetime(2016, 1, 1, 10))
+        self.assertIsNotNone(task.updated_at)
+        self.assertEqual(task.contractor_id, 3)
+
+    def test_import_csv(self):
+        count = TaskAttributeValue.query.count()
+        lines = io.StringIO(
+            'task_id,task_attribute_id,value\n'
+            '1,1,Laptop\n'
+            '1,x,Laptop\n'
+            '1,3,"Opis, z przecinkiem"\n'
+        )
+
+        result = import_file(self.engine, 'attribute-values', lines, 'csv')
+
+        self.assertEqual(result.loaded, 2)
+        self.assertEqual([number for number, _ in result.rejected], [3])
+        self.assertEqual(TaskAttributeValue.query.count(), count + 2)
+        self.assertEqual(TaskAttributeValue.query.get((1, 3)).value,
+                         'Opis, z przecinkiem')
+
+    def test_import_typed_values(self):
+        attribute = TaskAttribute(name='Waga', type_id=3)
+        db_session.add(attribute)
+        db_session.commit()
+        lines = io.StringIO(
+            'task_id,task_attribute_id,value\n'
+            '1,{0},12.50\n'
+            '1,{0},cheap\n'.format(attribute.id)
+        )
+
+        result = import_file(self.engine, 'attribute-values', lines, 'csv')
+
+        self.assertEqual(result.loaded, 1)
+        self.assertEqual([number for number, _ in result.rejected], [3])
+        self.assertEqual(
+            TaskAttributeValue.query.get((1, attribute.id)).number_value, 12.5)
+
+    def test_rejected_batch(self):
+        lines = self._lines([
+            dict(task_id=2, task_attribute_id=1, value='duplicate'),
+            dict(task_id=1000, task_attribute_id=1, value='missing task'),
+        ])
+
+        result = import_file(self.engine, 'attribute-values', lines)
+
+        self.assertEqual(result.loaded, 0)
+        self.assertEqual(len(result.rejected), 2)
+
+    def test_refused_rows_do_not_reject_batch(self):
+        lines = self._lines([
+            dict(task_id=1, task_attribute_id=1, value='first'),
+            dict(task_id=2, task_attribute_id=1, value='duplicate'),
+            dict(task_id=1, task_attribute_id=3, value='second'),
+            dict(task_id=1000, task_attribute_id=1, value='missing task'),
+            dict(task_id=2, task_attribute_id=3, value='duplicate'),
+        ])
+
+        result = import_file(self.engine, 'attribute-values', lines)
+
+        self.assertEqual(result.loaded, 2)
+        self.assertEqual([number for number, _ in result.rejected], [2, 4, 5])
+        self.assertEqual(TaskAttributeValue.query.get((1, 1)).value, 'first')
+        self.assertEqual(TaskAttributeValue.query.get((1, 3)).value, 'second')
+
+    def test_import_row_dates(self):
+        lines = self._lines([
+            dict(name='with dates', type_id=1, status_id=1, creator_id=1,
+                 create_date='2016-01-01T10:00:00',
+                 end_date='2016-02-01T10:00:00.500000'),
+        ])
+
+        result = import_file(self.engine, 'tasks', lines)
+
+        self.assertEqual(result.rejected, [])
+
+        task = Task.query.filter_by(name='with dates').one()
+
+        self.assertEqual(task.create_date, datetime(2016, 1, 1, 10))
+        self.assertEqual(task.end_date, datetime(2016, 2, 1, 10, 0, 0, 500000))
+
+    def test_insert_rows_returns_task_ids(self):
+        now = datetime.utcnow()
+        task = dict(name='imported', type_id=1, status_id=1, creator_id=1,
+                    create_date=now, updated_at=now)
+
+        with self.engine.begin() as connection:
+            task_ids = insert_rows(connection, Task.__table__,
+                                   [dict(task, id=100), task, task])
+            value_ids = insert_rows(
+                connection, TaskAttributeValue.__table__,
+                [dict(task_id=task_id, task_attribute_id=1, value='x',
+                      number_value=None, updated_at=now)
+                 for task_id in task_ids[1:]])
+
+        self.assertEqual(task_ids[0], 100)
+        self.assertEqual(
+            sorted(task_ids),
+            [item.id for item in Task.query.filter_by(name='imported')
+             .order_by(Task.id)])
+        self.assertEqual(value_ids, sorted(task_ids[1:]))
+
+    def test_import_exported_tasks(self):
+        exported = self.client.get('/export/tasks').get_data().decode()
+        rows = [json.loads(line) for line in exported.splitlines()]
+
+        for row in rows:
+            row['id'] += 100
+
+        result = import_file(self.engine, 'tasks', self._lines(rows))
+
+        self.assertEqual(result.loaded, len(rows))
+        self.assertEqual(result.rejected, [])
+        self.assertEqual(Task.query.get(101).name, Task.query.get(1).name)
+
+    def test_import_command(self):
+        fd, path = tempfile.mkstemp(suffix='.ndjson')
+
+        with os.fdopen(fd, 'w') as f:
+            f.write(json.dumps(dict(name='cli', type_id=1, status_id=1,
+                                    creator_id=1)) + '\n')
+
+        try:
+            result = CliRunner().invoke(
+                import_command, ['tasks', path],
+                obj=ScriptInfo(create_app=lambda *args: self.app))
+        finally:
+            os.remove(path)
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Loaded 1 rows', result.output)
+        self.assertEqual(Task.query.filter_by(name='cli').count(), 1)
@@ -0,0 +1,52 @@
+from datetime import datetime
+from tests.base import Base
+from flask import json, request
+from json_backend import dumps, loads, load_backend
+
+
+class TestJsonBackend(Base):
+
+    def test_dumps_native_types(self):
+        data = dict(date=datetime(2016, 7, 1, 12, 30, 0, 5000),
+                    data=b'\x00\x01')
+
+        self.assertEqual(loads(dumps(data)), dict(
+            date='2016-07-01T12:30:00.005000', data='AAE='))
+
+        with self.assertRaises(TypeError):
+            dumps(dict(value=object()))
+
+    def test_dumps_sort_keys(self):
+        self.assertEqual(dumps(dict(b=1, a=2), sort_keys=True),
+                         b'{"a":2,"b":1}')
+
+    def test_load_backend(self):
+        dumps, loads = load_backend('json')
+
+        self.assertEqual(loads(dumps([1, 'ą'])), [1, 'ą'])
+        self.assertIsNotNone(load_backend('auto'))
+
+        with self.assertRaises(ValueError):
+            load_backend('pickle')
+
+    def test_request_body_is_parsed_once(self):
+        with self.app.test_request_context(
+                '/', method='POST', data='{"name": "x"}',
+                content_type='application/json'):
+            data = request.get_json()
+
+            self.assertEqual(data, dict(name='x'))
+            self.assertIs(request.get_json(), data)
+
+    def test_invalid_request_body(self):
+        response = self.client.post(
+            '/tasks', data='{"name": ',
+            headers={'Content-Type': 'application/json'})
+
+        self.assertStatus(response, 400)
+
+    def test_jsonify_response(self):
+        response = self.client.get('/monitoring/pool')
+
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertIn('pool', json.loads(response.get_data()))
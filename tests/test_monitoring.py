@@ -0,0 +1,59 @@
+from tests.base import Base
+from tests.utils import is_json
+from flask import json
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError
+from database import MonitoredQueuePool, get_engine_options, db_session
+from models import Task
+
+
+class TestMonitoring(Base):
+
+    def test_get_pool_status(self):
+        response = self.client.get('/monitoring/pool')
+
+        self.assertStatus(response, 200)
+        self.assertTrue(is_json(response.get_data()), 'Response is not json')
+        self.assertIn('pool', json.loads(response.get_data()))
+
+    def test_engine_options(self):
+        config = dict(
+            SQLALCHEMY_DATABASE_URI='postgresql://localhost/taskplus',
+            SQLALCHEMY_POOL_SIZE=20,
+            SQLALCHEMY_MAX_OVERFLOW=5,
+            SQLALCHEMY_POOL_RECYCLE=3600,
+        )
+
+        self.assertEqual(get_engine_options(config), dict(
+            poolclass=MonitoredQueuePool,
+            pool_size=20,
+            max_overflow=5,
+            pool_recycle=3600,
+        ))
+
+        config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+
+        self.assertEqual(get_engine_options(config), dict())
+
+    def test_pool_counts_waits(self):
+        engine = create_engine(
+            'sqlite://', poolclass=MonitoredQueuePool, pool_size=1,
+            max_overflow=0, pool_timeout=0.01)
+        connection = engine.connect()
+
+        with self.assertRaises(TimeoutError):
+            engine.connect()
+
+        connection.close()
+
+        self.assertEqual(engine.pool.waits, 1)
+        self.assertEqual(engine.pool.timeouts, 1)
+
+    def test_session_is_removed_on_app_context_teardown(self):
+        task = Task(name='tmp', type_id=1, status_id=1, creator_id=1)
+        db_session.add(task)
+
+        with self.app.app_context():
+            pass
+
+        self.assertNotIn(task, db_session)
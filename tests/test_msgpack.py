@@ -0,0 +1,90 @@
+import unittest
+from unittest import mock
+from tests.base import Base
+from flask import json
+from models import Task
+from json_backend import msgpack, packb, unpackb
+
+MSGPACK = {'Accept': 'application/msgpack'}
+
+
+@unittest.skipIf(msgpack is None, 'msgpack is not installed')
+class TestMsgpack(Base):
+
+    def test_get_task_list(self):
+        plain = self.client.get('/tasks')
+        response = self.client.get('/tasks', headers=MSGPACK)
+
+        self.assertStatus(response, 200)
+        self.assertEqual(response.mimetype, 'application/msgpack')
+        self.assertIn('Accept', response.headers['Vary'])
+        self.assertEqual(unpackb(response.get_data()),
+                         json.loads(plain.get_data()))
+        self.assertNotEqual(response.headers['ETag'], plain.headers['ETag'])
+
+    def test_get_task(self):
+        response = self.client.get('/task/1', headers=MSGPACK)
+
+        self.assertStatus(response, 200)
+        self.assertEqual(unpackb(response.get_data())['id'], 1)
+
+    def test_json_is_default(self):
+        response = self.client.get('/tasks', headers={'Accept': '*/*'})
+        self.assertEqual(response.mimetype, 'application/json')
+
+        response = self.client.get('/tasks', headers={
+            'Accept': 'application/json, application/msgpack;q=0.5'})
+        self.assertEqual(response.mimetype, 'application/json')
+
+    def test_create_task_from_msgpack(self):
+        task_dict = dict(name='tmp', type_id=1, status_id=1, creator_id=1)
+
+        response = self.client.post(
+            '/task', data=packb(task_dict), headers=dict(
+                MSGPACK, **{'Content-Type': 'application/msgpack'}))
+
+        self.assertStatus(response, 201)
+        self.assertEqual(response.mimetype, 'application/msgpack')
+
+        data = unpackb(response.get_data())
+        task = Task.query.get(data['id'])
+
+        self.assertEqual(task.name, 'tmp')
+        self.assertEqual(data['create_date'], task.create_date.isoformat())
+
+    def test_invalid_msgpack_body(self):
+        headers = {'Content-Type': 'application/msgpack'}
+
+        response = self.client.post(
+            '/task', data=packb(dict(name=True)), headers=headers)
+        self.assertStatus(response, 400)
+
+        response = self.client.post(
+            '/task', data=b'\xc1', headers=headers)
+        self.assertStatus(response, 400)
+
+    def test_task_fields_and_embedded_rows(self):
+        for url in ('/task/2?fields=id,name,end_date&include=status,content',
+                    '/tasks?fields=id,name,create_date&include=creator',
+                    '/tasks/search?q=laptop&include=content'):
+            plain = self.client.get(url)
+            response = self.client.get(url, headers=MSGPACK)
+
+            self.assertStatus(response, 200)
+            self.assertEqual(unpackb(response.get_data()),
+                             json.loads(plain.get_data()))
+
+    def test_packed_without_json(self):
+        with mock.patch('json_backend.loads') as loads:
+            response = self.client.get('/tasks', headers=MSGPACK)
+
+        self.assertStatus(response, 200)
+        self.assertFalse(loads.called)
+
+    def test_stream_not_acceptable(self):
+        response = self.client.get('/tasks?stream=true', headers=MSGPACK)
+        self.assertStatus(response, 406)
+
+        response = self.client.get('/tasks?stream=true')
+        self.assertStatus(response, 200)
+        self.assertEqual(response.mimetype, 'application/json')
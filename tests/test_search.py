@@ -0,0 +1,233 @@
+import io
+from click.testing import CliRunner
+from flask import json
+from flask.cli import ScriptInfo
+from tests.base import Base
+from models import Task, TaskAttributeValue, TaskSearchDocument
+from database import db_session
+from importer import import_file
+from create_app import reindex_command
+from utils import encode_cursor
+
+
+class TestSearch(Base):
+
+    def _search(self, q, args=''):
+        response = self.client.get('/tasks/search?q=' + q + args)
+        self.assertStatus(response, 200)
+
+        return [task['id'] for task in json.loads(response.get_data())]
+
+    def _add_task(self, name, external_identifier=None):
+        task = Task(name=name, type_id=1, status_id=1, creator_id=1,
+                    external_identifier=external_identifier)
+        db_session.add(task)
+        db_session.commit()
+
+        return task.id
+
+    def test_search(self):
+        task_id = self._add_task('Nowy monitor', 'ZAM-1234')
+
+        self.assertEqual(self._search('czegos'), [1])
+        self.assertEqual(self._search('CENY'), [1])
+        self.assertEqual(self._search('monitor'), [task_id])
+        self.assertEqual(self._search('ZAM-1234'), [task_id])
+        self.assertEqual(self._search('nic'), [])
+        self.assertEqual(self._search('!!'), [])
+
+    def test_search_all_words(self):
+        self.assertEqual(sorted(self._search('tam')), [1, 2])
+        self.assertEqual(self._search('cos tam'), [2])
+        self.assertEqual(self._search('ceny laptop'), [])
+
+    def test_search_string_attribute_values(self):
+        # Values of 'Nazwa produktu' and 'Opis', not numeric 'Cena'.
+        self.assertEqual(self._search('asus2'), [2])
+        self.assertEqual(self._search('fajny'), [2])
+        self.assertEqual(self._search('110'), [])
+
+    def test_search_ranked(self):
+        first = self._add_task('laptop laptop laptop')
+        last = self._add_task('laptop dla nowego pracownika w dziale zakupow')
+
+        ids = self._search('laptop')
+
+        self.assertEqual(sorted(ids), sorted([2, first, last]))
+        self.assertEqual(ids[0], first)
+        self.assertEqual(ids[-1], last)
+
+    def test_search_paginated(self):
+        for i in range(5):
+            self._add_task('Drukarka %d' % i)
+
+        ids = self._search('drukarka')
+        pages = []
+        response = self.client.get('/tasks/search?q=drukarka&limit=2')
+
+        while True:
+            self.assertStatus(response, 200)
+            pages.append([task['id'] for task in
+                          json.loads(response.get_data())])
+            cursor = response.headers.get('X-Next-Cursor')
+
+            if cursor is None:
+                break
+
+            response = self.client.get(
+                '/tasks/search?q=drukarka&limit=2&after=' + cursor)
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), ids)
+
+    def test_search_fields(self):
+        response = self.client.get(
+            '/tasks/search?q=laptop&fields=id,name&include=content')
+
+        self.assertStatus(response, 200)
+        self.assertEqual(json.loads(response.get_data()), [dict(
+            id=2, name='Dodaj cos tam',
+            content=[value.to_dict() for value in
+                     TaskAttributeValue.query.filter_by(task_id=2)])])
+
+    def test_search_invalid(self):
+        for args in ('', '?q=', '?q=laptop&limit=0', '?q=laptop&after=abc',
+                     '?q=laptop&fields=password'):
+            response = self.client.get('/tasks/search' + args)
+            self.assertStatus(response, 400)
+
+    def test_search_invalid_cursor(self):
+        cursor = encode_cursor(['2016-01-01T00:00:00', 0, 1])
+
+        response = self.client.get('/tasks/search?q=tam&after=' + cursor)
+        self.assertStatus(response, 400)
+
+    def test_index_updated_task(self):
+        response = self.client.put(
+            '/task/1',
+            data=json.dumps(dict(name='Zmiana nazwy')),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 200)
+        self.assertEqual(self._search('nazwy'), [1])
+        self.assertEqual(self._search('czegos'), [])
+
+    def test_index_deleted_task(self):
+        task_id = self._add_task('Do usuniecia')
+
+        response = self.client.delete('/task/%d' % task_id)
+
+        self.assertStatus(response, 204)
+        self.assertEqual(self._search('usuniecia'), [])
+        self.assertIsNone(TaskSearchDocument.query.get(task_id))
+
+    def test_index_attribute_values(self):
+        response = self.client.post(
+            '/task/attribute/value',
+            data=json.dumps(dict(task_id=1, task_attribute_id=3,
+                                 value='Monitor 27 cali')),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 201)
+        self.assertEqual(self._search('cali'), [1])
+
+        response = self.client.delete('/task/attribute/value/1/3')
+
+        self.assertStatus(response, 204)
+        self.assertEqual(self._search('cali'), [])
+
+    def test_index_attribute_type_change(self):
+        TaskAttributeValue.query.get((2, 3)).value = '["Bardzo fajny laptop"]'
+        db_session.commit()
+
+        self.assertEqual(self._search('fajny'), [2])
+
+        response = self.client.put(
+            '/task/attribute/3',
+            data=json.dumps(dict(type_id=4)),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 200)
+        self.assertEqual(self._search('fajny'), [])
+
+    def test_index_bulk_writes(self):
+        response = self.client.post(
+            '/tasks/bulk',
+            data=json.dumps([dict(
+                name='Serwer', type_id=1, status_id=1, creator_id=1,
+                content=[dict(task_attribute_id=1, value='Dell PowerEdge')])]),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 201)
+        task_id = json.loads(response.get_data())[0]['id']
+        self.assertEqual(self._search('poweredge'), [task_id])
+
+        response = self.client.post(
+            '/task/attribute/values/bulk',
+            data=json.dumps([dict(task_id=1, task_attribute_id=3,
+                                  value='Szafa rack')]),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 201)
+        self.assertEqual(self._search('rack'), [1])
+
+        response = self.client.patch(
+            '/tasks',
+            data=json.dumps(dict(filter=dict(id=dict(value=task_id)),
+                                 changes=dict(name='Macierz'))),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 200)
+        self.assertEqual(self._search('macierz'), [task_id])
+        self.assertEqual(self._search('serwer'), [])
+
+    def test_index_bulk_delete(self):
+        task_id = self._add_task('Do usuniecia')
+
+        response = self.client.delete(
+            '/tasks',
+            data=json.dumps(dict(filter=dict(id=dict(value=task_id)))),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 200)
+        self.assertEqual(self._search('usuniecia'), [])
+
+    def test_index_imported_rows(self):
+        lines = io.StringIO(json.dumps(dict(
+            name='Import skanera', type_id=1, status_id=1,
+            creator_id=1)) + '\n')
+
+        result = import_file(self.engine, 'tasks', lines)
+
+        self.assertEqual(result.loaded, 1)
+        self.assertEqual(len(self._search('skanera')), 1)
+
+        lines = io.StringIO(json.dumps(dict(
+            task_id=1, task_attribute_id=3, value='Skaner dokumentow')) + '\n')
+
+        result = import_file(self.engine, 'attribute-values', lines)
+
+        self.assertEqual(result.loaded, 1)
+        self.assertEqual(self._search('dokumentow'), [1])
+
+    def test_reindex_command(self):
+        db_session.query(TaskSearchDocument).delete()
+        db_session.add(TaskSearchDocument(task_id=1000, document='usuniety'))
+        db_session.commit()
+
+        self.assertEqual(self._search('tam'), [])
+
+        result = CliRunner().invoke(
+            reindex_command, ['--batch-size', '1'],
+            obj=ScriptInfo(create_app=lambda *args: self.app))
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(sorted(self._search('tam')), [1, 2])
+        self.assertEqual(self._search('usuniety'), [])
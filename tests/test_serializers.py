@@ -0,0 +1,61 @@
+from tests.base import Base
+from flask import json
+from database import db_session
+from models import User, Task, TaskStatus, TaskType, TaskAttribute, \
+    TaskAttributeType, TaskAttributeValue, TaskAttributeToTaskType
+from serializers import get_encoder, get_row_encoder, encode_list
+from tests.utils import to_json
+
+
+class TestSerializers(Base):
+
+    def test_encoder_matches_to_dict(self):
+        for Class in [User, Task, TaskStatus, TaskType, TaskAttribute,
+                      TaskAttributeType, TaskAttributeValue,
+                      TaskAttributeToTaskType]:
+            encode = get_encoder(Class)
+
+            for item in Class.query:
+                self.assertEqual(json.loads(encode(item)),
+                                 to_json(item.to_dict()))
+
+    def test_encoder_with_fieldset(self):
+        task = Task.query.first()
+        encode = get_encoder(Task, ['name', 'end_date', 'id'], ['status'])
+
+        self.assertEqual(
+            json.loads(encode(task)),
+            to_json(task.to_dict(['id', 'name', 'end_date'], ['status'])))
+
+    def test_encoder_with_null_values(self):
+        task = Task(name='Zażółć "gęślą"\n', type_id=1, status_id=1,
+                    creator_id=1)
+        db_session.add(task)
+        db_session.commit()
+
+        self.assertIsNone(task.contractor)
+        self.assertEqual(json.loads(get_encoder(Task)(task)),
+                         to_json(task.to_dict()))
+
+    def test_encoders_are_cached(self):
+        self.assertIs(get_encoder(Task, ['id', 'name'], []),
+                      get_encoder(Task, ['name', 'id'], []))
+
+    def test_encode_list(self):
+        users = User.query.all()
+
+        self.assertEqual(json.loads(encode_list(users, get_encoder(User))),
+                         [user.to_dict() for user in users])
+        self.assertEqual(encode_list([], get_encoder(User)), '[]')
+
+    def test_unknown_field(self):
+        with self.assertRaises(KeyError):
+            get_encoder(User, ['x; import os'])
+
+    def test_row_encoder(self):
+        table = Task.__table__
+        encode = get_row_encoder(table)
+        row = db_session.execute(table.select()).first()
+
+        self.assertEqual(json.loads(encode(row)),
+                         to_json(dict(zip(row.keys(), row))))
@@ -1,5 +1,5 @@
 from tests.base import Base
-from tests.utils import is_json
+from tests.utils import is_json, count_queries
 from flask import json
 from models import TaskStatus, Task
 from database import db_session
@@ -27,6 +27,31 @@ class TestStatus(Base):
         response = self.client.get('/task/status/' + str(1000000))
         self.assertStatus(response, 404)
 
+    def test_missing_status_does_not_reload_cache(self):
+        self.client.get('/task/status/1')
+
+        with count_queries(self.engine) as statements:
+            for status_id in range(1000, 1010):
+                response = self.client.get('/task/status/%d' % status_id)
+                self.assertStatus(response, 404)
+
+        self.assertEqual(statements, [])
+
+    def test_missing_status_reloads_cache_after_ttl(self):
+        self.app.config['REFERENCE_CACHE_MISS_TTL'] = 0
+        self.addCleanup(self.app.config.pop, 'REFERENCE_CACHE_MISS_TTL')
+        self.client.get('/task/status/1')
+
+        # Created by another process, without invalidating the cache.
+        db_session.execute(TaskStatus.__table__.insert().values(
+            id=1000, name='Nowy'))
+        db_session.commit()
+
+        response = self.client.get('/task/status/1000')
+
+        self.assertStatus(response, 200)
+        self.assertEqual(json.loads(response.get_data())['name'], 'Nowy')
+
     def test_update_from_dict(self):
         status = TaskStatus.query.first()
         status_id = status.id
@@ -387,3 +412,60 @@ class TestStatus(Base):
         )
 
         self.assertStatus(response, 400)
+
+    def test_get_status_after_update(self):
+        status = TaskStatus.query.first()
+        self.client.get('/task/status/' + str(status.id))
+
+        response = self.client.put(
+            '/task/status/' + str(status.id),
+            data=json.dumps(dict(name='Zmieniony')),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 200)
+
+        response = self.client.get('/task/status/' + str(status.id))
+        data = json.loads(response.get_data())
+
+        self.assertEqual(data['name'], 'Zmieniony')
+
+    def test_get_status_does_not_query_database_twice(self):
+        status = TaskStatus.query.first()
+        self.client.get('/task/status/' + str(status.id))
+
+        with count_queries(self.engine) as statements:
+            response = self.client.get('/task/status/' + str(status.id))
+
+        self.assertStatus(response, 200)
+        self.assertEqual(statements, [])
+
+    def test_task_list_does_not_query_statuses(self):
+        self.client.get('/tasks')
+
+        with count_queries(self.engine) as statements:
+            response = self.client.get('/tasks')
+
+        self.assertStatus(response, 200)
+        self.assertFalse(any('task_statuses' in statement
+                             for statement in statements))
+
+    def test_get_status_etag(self):
+        response = self.client.get('/task/status/1')
+        etag = response.headers.get('ETag')
+
+        response = self.client.get(
+            '/task/status/1', headers={'If-None-Match': etag})
+
+        self.assertStatus(response, 304)
+
+        self.client.put(
+            '/task/status/1',
+            data=json.dumps(dict(name='Zmieniony')),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        response = self.client.get(
+            '/task/status/1', headers={'If-None-Match': etag})
+
+        self.assertStatus(response, 200)
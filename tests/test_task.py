@@ -1,10 +1,12 @@
+from datetime import datetime
 from tests.base import Base
-from tests.utils import is_json
+from tests.utils import is_json, count_queries, to_json
 from flask import json
-from models import Task, Task
+from models import Task, Task, TaskAttributeValue
 from database import db_session
 from exceptions import ValidationError
 from utils import query_from_dict
+from sqlalchemy import inspect
 from sqlalchemy.exc import IntegrityError
 
 
@@ -19,7 +21,7 @@ class TestTask(Base):
 
         data = json.loads(response.get_data())
 
-        self.assertEqual(data, task.to_dict())
+        self.assertEqual(data, to_json(task.to_dict()))
 
     def test_404_if_task_not_exist_or_task_id_is_invalid(self):
         response = self.client.get('/task/' + 'sdfs')
@@ -147,7 +149,7 @@ class TestTask(Base):
 
         data = json.loads(response.get_data())
 
-        self.assertEqual(data, task.to_dict())
+        self.assertEqual(data, to_json(task.to_dict()))
 
     def test_update_not_existing_task(self):
         task = Task.query.first()
@@ -221,7 +223,8 @@ class TestTask(Base):
 
         self.assertEqual(count_before_insert + 1, count_after_insert)
         self.assertIsNotNone(task)
-        self.assertEqual(json.loads(response.get_data()), task.to_dict())
+        self.assertEqual(json.loads(response.get_data()),
+                         to_json(task.to_dict()))
 
     def test_create_task_invalid_data(self):
         count_before_insert = Task.query.count()
@@ -318,7 +321,7 @@ class TestTask(Base):
         data = json.loads(response.get_data())
         tasks = Task.query.filter_by(name='Dodaj cos tam', id=2).all()
 
-        tasks_list = [task.to_dict() for task in tasks]
+        tasks_list = to_json([task.to_dict() for task in tasks])
 
         self.assertEqual(len(data), len(tasks))
         self.assertListEqual(data, tasks_list)
@@ -335,7 +338,7 @@ class TestTask(Base):
         )
 
         tasks = query_from_dict(Task, data)
-        tasks_list = [task.to_dict() for task in tasks]
+        tasks_list = to_json([task.to_dict() for task in tasks])
 
         response = self.client.post(
             '/tasks',
@@ -385,3 +388,807 @@ class TestTask(Base):
         )
 
         self.assertStatus(response, 400)
+
+    def _add_tasks_with_relations(self, count):
+        for i in range(count):
+            task = Task(name='tmp' + str(i), type_id=1, status_id=1,
+                        creator_id=1)
+            task.contractor_id = 2
+            db_session.add(task)
+            db_session.flush()
+            db_session.add(TaskAttributeValue(task.id, 1, 'value').coerce())
+            db_session.add(TaskAttributeValue(task.id, 2, '10').coerce())
+
+        db_session.commit()
+        db_session.expire_all()
+
+    def test_get_task_list_query_count_is_constant(self):
+        # Fill reference cache.
+        self.client.get('/tasks')
+
+        with count_queries(self.engine) as statements:
+            response = self.client.get('/tasks')
+
+        self.assertStatus(response, 200)
+        queries_before = len(statements)
+
+        self._add_tasks_with_relations(10)
+
+        with count_queries(self.engine) as statements:
+            response = self.client.get('/tasks')
+
+        self.assertStatus(response, 200)
+        self.assertEqual(len(json.loads(response.get_data())), 12)
+        self.assertEqual(queries_before, len(statements))
+
+    def test_get_task_list_complex_query_count_is_constant(self):
+        data = dict(status_id=dict(value=1))
+
+        # Fill reference cache.
+        self.client.get('/tasks')
+
+        with count_queries(self.engine) as statements:
+            response = self.client.post(
+                '/tasks',
+                data=json.dumps(data),
+                headers={'Content-Type': 'application/json'}
+            )
+
+        self.assertStatus(response, 200)
+        queries_before = len(statements)
+
+        self._add_tasks_with_relations(10)
+
+        with count_queries(self.engine) as statements:
+            response = self.client.post(
+                '/tasks',
+                data=json.dumps(data),
+                headers={'Content-Type': 'application/json'}
+            )
+
+        self.assertStatus(response, 200)
+        self.assertEqual(len(json.loads(response.get_data())), 12)
+        self.assertEqual(queries_before, len(statements))
+
+    def test_get_task_list_paginated(self):
+        self._add_tasks_with_relations(3)
+
+        response = self.client.get('/tasks?limit=2')
+        self.assertStatus(response, 200)
+
+        data = json.loads(response.get_data())
+        cursor = response.headers.get('X-Next-Cursor')
+
+        self.assertEqual([task['id'] for task in data], [1, 2])
+        self.assertIsNotNone(cursor)
+
+        ids = [task['id'] for task in data]
+
+        while cursor is not None:
+            response = self.client.get(
+                '/tasks?limit=2&after=' + cursor)
+            self.assertStatus(response, 200)
+
+            ids += [task['id'] for task in json.loads(response.get_data())]
+            cursor = response.headers.get('X-Next-Cursor')
+
+        tasks = Task.query.order_by(Task.id).all()
+
+        self.assertEqual(ids, [task.id for task in tasks])
+
+    def test_cursor_and_etag_headers_are_exposed(self):
+        response = self.client.get(
+            '/tasks?limit=1', headers={'Origin': 'http://example.com'})
+
+        self.assertIsNotNone(response.headers.get('X-Next-Cursor'))
+        self.assertEqual(
+            sorted(response.headers['Access-Control-Expose-Headers']
+                   .lower().split(', ')),
+            ['etag', 'x-next-cursor'])
+
+    def test_get_task_list_paginated_with_filter(self):
+        self._add_tasks_with_relations(3)
+
+        response = self.client.get('/tasks?limit=2&type_id=1')
+        data = json.loads(response.get_data())
+
+        self.assertStatus(response, 200)
+        self.assertEqual(len(data), 2)
+        self.assertTrue(all(task['type_id'] == 1 for task in data))
+
+    def test_get_task_list_paginated_invalid_parameters(self):
+        response = self.client.get('/tasks?limit=0')
+        self.assertStatus(response, 400)
+
+        response = self.client.get('/tasks?limit=abc')
+        self.assertStatus(response, 400)
+
+        response = self.client.get('/tasks?limit=2&after=abc')
+        self.assertStatus(response, 400)
+
+    def test_get_task_list_complex_paginated(self):
+        self._add_tasks_with_relations(3)
+
+        data = dict(type_id=dict(value=1))
+
+        response = self.client.post(
+            '/tasks?limit=2',
+            data=json.dumps(data),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 200)
+
+        first_page = json.loads(response.get_data())
+        cursor = response.headers.get('X-Next-Cursor')
+
+        response = self.client.post(
+            '/tasks?limit=2&after=' + cursor,
+            data=json.dumps(data),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 200)
+
+        second_page = json.loads(response.get_data())
+        tasks = Task.query.filter_by(type_id=1).order_by(Task.id).all()
+
+        self.assertIsNone(response.headers.get('X-Next-Cursor'))
+        self.assertEqual([task['id'] for task in first_page + second_page],
+                         [task.id for task in tasks])
+
+    def test_get_task_list_streamed(self):
+        self._add_tasks_with_relations(5)
+        self.app.config['STREAM_BATCH_SIZE'] = 2
+        self.addCleanup(self.app.config.pop, 'STREAM_BATCH_SIZE')
+
+        response = self.client.get('/tasks?stream=1')
+
+        self.assertStatus(response, 200)
+        self.assertTrue(response.is_streamed)
+
+        data = json.loads(response.get_data())
+        tasks = Task.query.order_by(Task.id).all()
+
+        self.assertEqual(data, to_json([task.to_dict() for task in tasks]))
+
+    def test_get_task_list_streamed_with_limit(self):
+        self._add_tasks_with_relations(5)
+        self.app.config['STREAM_BATCH_SIZE'] = 2
+        self.addCleanup(self.app.config.pop, 'STREAM_BATCH_SIZE')
+
+        response = self.client.get('/tasks?stream=1&limit=3&type_id=1')
+
+        self.assertStatus(response, 200)
+
+        data = json.loads(response.get_data())
+        tasks = Task.query.filter_by(type_id=1).order_by(Task.id).limit(3)
+
+        self.assertEqual(data, to_json([task.to_dict() for task in tasks]))
+        self.assertIsNone(response.headers.get('X-Next-Cursor'))
+
+    def test_get_task_list_streamed_empty(self):
+        response = self.client.get('/tasks?stream=1&type_id=100')
+
+        self.assertStatus(response, 200)
+        self.assertEqual(json.loads(response.get_data()), [])
+
+    def test_get_task_list_stream_values(self):
+        # Streamed list is never paged with X-Next-Cursor.
+        for value in ('enable', 'On', 'TRUE'):
+            response = self.client.get('/tasks?limit=1&stream=' + value)
+
+            self.assertStatus(response, 200)
+            self.assertEqual(len(json.loads(response.get_data())), 1)
+            self.assertIsNone(response.headers.get('X-Next-Cursor'))
+
+        for value in ('disable', 'off', '0'):
+            response = self.client.get('/tasks?limit=1&stream=' + value)
+
+            self.assertStatus(response, 200)
+            self.assertIsNotNone(response.headers.get('X-Next-Cursor'))
+
+        response = self.client.get('/tasks?stream=maybe')
+        self.assertStatus(response, 400)
+
+    def test_get_task_list_complex_extended_operators(self):
+        data = dict(
+            status_id=dict(value=[1, 2], operator='in'),
+            name=dict(value='Dodaj', operator='prefix'),
+            contractor_id=dict(value=True, operator='is_null'),
+        )
+
+        response = self.client.post(
+            '/tasks',
+            data=json.dumps(data),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 200)
+
+        tasks = Task.query.filter(Task.name.like('Dodaj%')).all()
+
+        self.assertEqual(json.loads(response.get_data()),
+                         to_json([task.to_dict() for task in tasks]))
+
+    def test_get_task_list_complex_extended_operators_invalid_value(self):
+        invalid_data = [
+            dict(status_id=dict(value=1, operator='in')),
+            dict(status_id=dict(value=[1], operator='between')),
+            dict(status_id=dict(value='1', operator='prefix')),
+            dict(name=dict(value='abc', operator='is_null')),
+            dict(name=dict(value='abc', operator='like')),
+            dict(name=dict(value='abc', operator=1)),
+        ]
+
+        for data in invalid_data:
+            response = self.client.post(
+                '/tasks',
+                data=json.dumps(data),
+                headers={'Content-Type': 'application/json'}
+            )
+
+            self.assertStatus(response, 400)
+
+    def test_task_indexes_are_created(self):
+        indexes = dict(
+            (index['name'], index['column_names'])
+            for index in inspect(self.engine).get_indexes('tasks')
+        )
+
+        self.assertEqual(indexes['ix_tasks_status_id_create_date'],
+                         ['status_id', 'create_date'])
+        self.assertIn(['type_id'], indexes.values())
+        self.assertIn(['creator_id'], indexes.values())
+        self.assertIn(['contractor_id'], indexes.values())
+
+    def test_create_tasks_bulk(self):
+        count_before_insert = Task.query.count()
+        values_before_insert = TaskAttributeValue.query.count()
+
+        tasks_list = [
+            dict(name='bulk1', type_id=1, status_id=1, creator_id=1,
+                 content=[dict(task_attribute_id=1, value='abc'),
+                          dict(task_attribute_id=2, value='10')]),
+            dict(name='bulk2', type_id=2, status_id=1, creator_id=2),
+        ]
+
+        response = self.client.post(
+            '/tasks/bulk',
+            data=json.dumps(tasks_list),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 201)
+
+        data = json.loads(response.get_data())
+        tasks = [Task.query.get(item['id']) for item in data]
+
+        self.assertEqual(Task.query.count(), count_before_insert + 2)
+        self.assertEqual(TaskAttributeValue.query.count(),
+                         values_before_insert + 2)
+        self.assertEqual([task.name for task in tasks], ['bulk1', 'bulk2'])
+        self.assertEqual(data, to_json([task.to_dict() for task in tasks]))
+        self.assertEqual(len(data[0]['content']), 2)
+
+    def test_create_tasks_bulk_invalid_data(self):
+        count_before_insert = Task.query.count()
+
+        invalid_data = [
+            [],
+            dict(name='bulk1', type_id=1, status_id=1, creator_id=1),
+            [dict(name='bulk1', type_id=1, status_id=1, creator_id=1),
+             dict(name=True, type_id=1, status_id=1, creator_id=1)],
+            [dict(name='bulk1', type_id=1, status_id=1, creator_id=1,
+                  content=[dict(value='abc')])],
+            [dict(name='bulk1', type_id=1, status_id=1, creator_id=1,
+                  content=[dict(task_attribute_id=2, value='abc')])],
+        ]
+
+        for tasks_list in invalid_data:
+            response = self.client.post(
+                '/tasks/bulk',
+                data=json.dumps(tasks_list),
+                headers={'Content-Type': 'application/json'}
+            )
+
+            self.assertStatus(response, 400)
+
+        self.assertEqual(Task.query.count(), count_before_insert)
+
+    def test_create_tasks_bulk_invalid_indices(self):
+        count_before_insert = Task.query.count()
+
+        tasks_list = [
+            dict(name='bulk1', type_id=1, status_id=1, creator_id=1),
+            dict(name='bulk2', type_id=10, status_id=10, creator_id=10),
+        ]
+
+        response = self.client.post(
+            '/tasks/bulk',
+            data=json.dumps(tasks_list),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 409)
+        self.assertEqual(Task.query.count(), count_before_insert)
+
+    def test_update_tasks_bulk(self):
+        self._add_tasks_with_relations(3)
+
+        data = dict(
+            filter=dict(name=dict(value='tmp', operator='prefix')),
+            changes=dict(status_id=2, contractor_id=None)
+        )
+
+        response = self.client.patch(
+            '/tasks',
+            data=json.dumps(data),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 200)
+        self.assertEqual(json.loads(response.get_data()), dict(count=3))
+
+        tasks = Task.query.filter(Task.name.like('tmp%')).all()
+
+        self.assertEqual(len(tasks), 3)
+        self.assertTrue(all(task.status_id == 2 for task in tasks))
+        self.assertTrue(all(task.contractor_id is None for task in tasks))
+        self.assertEqual(Task.query.filter_by(status_id=1).count(), 2)
+
+    def test_update_tasks_bulk_invalid_data(self):
+        invalid_data = [
+            dict(filter=dict(), changes=dict(status_id=2)),
+            dict(filter=dict(id=dict(value=1)), changes=dict()),
+            dict(filter=dict(id=dict(value=1)), changes=dict(id=5)),
+            dict(changes=dict(status_id=2)),
+        ]
+
+        for data in invalid_data:
+            response = self.client.patch(
+                '/tasks',
+                data=json.dumps(data),
+                headers={'Content-Type': 'application/json'}
+            )
+
+            self.assertStatus(response, 400)
+
+    def test_update_tasks_bulk_invalid_indices(self):
+        data = dict(
+            filter=dict(id=dict(value=1)),
+            changes=dict(status_id=100)
+        )
+
+        response = self.client.patch(
+            '/tasks',
+            data=json.dumps(data),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 409)
+        self.assertEqual(Task.query.get(1).status_id, 1)
+
+    def test_delete_tasks_bulk(self):
+        for i in range(3):
+            db_session.add(Task(name='tmp' + str(i), type_id=1, status_id=1,
+                                creator_id=1))
+
+        db_session.commit()
+
+        count_before_delete = Task.query.count()
+        data = dict(filter=dict(name=dict(value='tmp', operator='prefix')))
+
+        response = self.client.delete(
+            '/tasks',
+            data=json.dumps(data),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 200)
+        self.assertEqual(json.loads(response.get_data()), dict(count=3))
+        self.assertEqual(Task.query.count(), count_before_delete - 3)
+
+    def test_delete_tasks_bulk_which_cant_be_deleted(self):
+        count_before_delete = Task.query.count()
+        data = dict(filter=dict(id=dict(value=[1, 2], operator='in')))
+
+        response = self.client.delete(
+            '/tasks',
+            data=json.dumps(data),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 409)
+        self.assertEqual(Task.query.count(), count_before_delete)
+
+    def test_delete_tasks_bulk_requires_filter(self):
+        count_before_delete = Task.query.count()
+
+        response = self.client.delete(
+            '/tasks',
+            data=json.dumps(dict(filter=dict())),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 400)
+        self.assertEqual(Task.query.count(), count_before_delete)
+
+    def test_get_task_etag(self):
+        response = self.client.get('/task/1')
+        etag = response.headers.get('ETag')
+
+        self.assertStatus(response, 200)
+        self.assertIsNotNone(etag)
+
+        response = self.client.get('/task/1', headers={'If-None-Match': etag})
+
+        self.assertStatus(response, 304)
+        self.assertEqual(response.get_data(), b'')
+        self.assertEqual(response.headers.get('ETag'), etag)
+
+        response = self.client.get(
+            '/task/1', headers={'If-None-Match': '"other"'})
+
+        self.assertStatus(response, 200)
+
+    def test_get_task_etag_changes_on_update(self):
+        etag = self.client.get('/task/1').headers.get('ETag')
+
+        self.client.put(
+            '/task/1',
+            data=json.dumps(dict(name='tmp')),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        response = self.client.get('/task/1', headers={'If-None-Match': etag})
+
+        self.assertStatus(response, 200)
+        self.assertNotEqual(response.headers.get('ETag'), etag)
+
+    def test_get_task_etag_changes_on_content_update(self):
+        etag = self.client.get('/task/1').headers.get('ETag')
+
+        self.client.put(
+            '/task/attribute/value/1/2',
+            data=json.dumps(dict(value='20')),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        response = self.client.get('/task/1', headers={'If-None-Match': etag})
+
+        self.assertStatus(response, 200)
+        self.assertEqual(json.loads(response.get_data())['content'][0]['value'],
+                         '20')
+
+    def test_get_task_etag_changes_on_status_update(self):
+        etag = self.client.get('/task/1').headers.get('ETag')
+        list_etag = self.client.get('/tasks').headers.get('ETag')
+
+        response = self.client.put(
+            '/task/status/1',
+            data=json.dumps(dict(name='Nowe zadanie')),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 200)
+
+        response = self.client.get('/task/1', headers={'If-None-Match': etag})
+
+        self.assertStatus(response, 200)
+        self.assertNotEqual(response.headers.get('ETag'), etag)
+        self.assertEqual(json.loads(response.get_data())['status']['name'],
+                         'Nowe zadanie')
+
+        response = self.client.get(
+            '/tasks', headers={'If-None-Match': list_etag})
+
+        self.assertStatus(response, 200)
+        self.assertNotEqual(response.headers.get('ETag'), list_etag)
+
+    def test_get_task_etag_changes_on_user_update(self):
+        etag = self.client.get('/task/1').headers.get('ETag')
+
+        response = self.client.put(
+            '/user/2',
+            data=json.dumps(dict(first_name='Nowe')),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 200)
+
+        response = self.client.get('/task/1', headers={'If-None-Match': etag})
+
+        self.assertStatus(response, 200)
+        self.assertNotEqual(response.headers.get('ETag'), etag)
+
+    def test_get_task_list_etag(self):
+        response = self.client.get('/tasks?status_id=1')
+        etag = response.headers.get('ETag')
+
+        self.assertStatus(response, 200)
+        self.assertIsNotNone(etag)
+
+        with count_queries(self.engine) as statements:
+            response = self.client.get(
+                '/tasks?status_id=1', headers={'If-None-Match': etag})
+
+        self.assertStatus(response, 304)
+        self.assertEqual(len(statements), 1)
+
+        response = self.client.get(
+            '/tasks?status_id=2', headers={'If-None-Match': etag})
+
+        self.assertStatus(response, 200)
+
+        self._add_tasks_with_relations(1)
+
+        response = self.client.get(
+            '/tasks?status_id=1', headers={'If-None-Match': etag})
+
+        self.assertStatus(response, 200)
+        self.assertNotEqual(response.headers.get('ETag'), etag)
+
+    def test_get_task_with_fields(self):
+        task = Task.query.first()
+        response = self.client.get(
+            '/task/' + str(task.id) + '?fields=id,name,status_id')
+
+        self.assertStatus(response, 200)
+        self.assertEqual(json.loads(response.get_data()), dict(
+            id=task.id, name=task.name, status_id=task.status_id))
+
+        response = self.client.get(
+            '/task/' + str(task.id) + '?fields=name&include=status')
+        data = json.loads(response.get_data())
+
+        self.assertEqual(set(data), {'name', 'status'})
+        self.assertEqual(data['status'], task.status.to_dict())
+
+    def test_get_task_list_with_fields(self):
+        self._add_tasks_with_relations(3)
+
+        response = self.client.get('/tasks?fields=id,name&limit=2')
+        self.assertStatus(response, 200)
+
+        data = json.loads(response.get_data())
+
+        self.assertEqual([set(task) for task in data], [{'id', 'name'}] * 2)
+        self.assertIn('X-Next-Cursor', response.headers)
+
+        response = self.client.get('/tasks?include=creator&stream=true')
+        data = json.loads(response.get_data())
+
+        self.assertEqual(len(data), Task.query.count())
+        self.assertIn('creator', data[0])
+        self.assertIn('create_date', data[0])
+        self.assertNotIn('content', data[0])
+        self.assertNotIn('contractor', data[0])
+
+        response = self.client.post(
+            '/tasks?fields=id&include=content',
+            data=json.dumps(dict(status_id=dict(value=1))),
+            headers={'Content-Type': 'application/json'}
+        )
+        self.assertStatus(response, 200)
+
+        for task in json.loads(response.get_data()):
+            self.assertEqual(set(task), {'id', 'content'})
+
+    def test_get_task_list_with_fields_loads_less(self):
+        self._add_tasks_with_relations(10)
+        self.client.get('/tasks')
+
+        with count_queries(self.engine) as statements:
+            self.client.get('/tasks')
+
+        queries_all = len(statements)
+
+        with count_queries(self.engine) as statements:
+            response = self.client.get('/tasks?fields=id,name,status_id')
+
+        self.assertStatus(response, 200)
+        self.assertLess(len(statements), queries_all)
+        self.assertNotIn('create_date', statements[-1])
+        self.assertNotIn('JOIN', statements[-1])
+
+    def test_get_task_with_invalid_fields(self):
+        response = self.client.get('/tasks?fields=id,password')
+        self.assertStatus(response, 400)
+
+        response = self.client.get('/task/1?include=type')
+        self.assertStatus(response, 400)
+
+    def test_get_tasks_count(self):
+        response = self.client.get('/tasks/count')
+
+        self.assertStatus(response, 200)
+        self.assertEqual(json.loads(response.get_data()),
+                         dict(count=Task.query.count()))
+
+        response = self.client.get('/tasks/count?status_id=1')
+
+        self.assertEqual(json.loads(response.get_data()),
+                         dict(count=Task.query.filter_by(status_id=1).count()))
+
+        response = self.client.get('/tasks/count?limit=1')
+        self.assertStatus(response, 400)
+
+    def test_aggregate_tasks(self):
+        self._add_tasks_with_relations(3)
+
+        response = self.client.post(
+            '/tasks/aggregate',
+            data=json.dumps(dict(group_by=['status_id', 'creator_id'])),
+            headers={'Content-Type': 'application/json'}
+        )
+        self.assertStatus(response, 200)
+
+        data = json.loads(response.get_data())
+        tasks = Task.query.all()
+
+        self.assertEqual(sum(group['count'] for group in data), len(tasks))
+
+        for group in data:
+            group_tasks = [task for task in tasks
+                           if task.status_id == group['status_id'] and
+                           task.creator_id == group['creator_id']]
+
+            self.assertEqual(group['count'], len(group_tasks))
+            self.assertEqual(
+                group['max_create_date'],
+                max(task.create_date for task in group_tasks).isoformat())
+
+    def test_aggregate_tasks_by_date_bucket(self):
+        task = Task.query.first()
+        task.create_date = datetime(2015, 3, 10, 12, 0)
+        db_session.commit()
+
+        data = dict(group_by=['create_date:month'],
+                    filter=dict(id=dict(value=task.id)))
+        response = self.client.post(
+            '/tasks/aggregate',
+            data=json.dumps(data),
+            headers={'Content-Type': 'application/json'}
+        )
+        self.assertStatus(response, 200)
+
+        self.assertEqual(json.loads(response.get_data()), [dict(
+            count=1,
+            min_create_date='2015-03-10T12:00:00',
+            max_create_date='2015-03-10T12:00:00',
+            min_end_date=to_json(task.end_date),
+            max_end_date=to_json(task.end_date),
+            **{'create_date:month': '2015-03-01T00:00:00'}
+        )])
+
+    def test_aggregate_tasks_invalid_group(self):
+        response = self.client.post(
+            '/tasks/aggregate',
+            data=json.dumps(dict(group_by=['name'])),
+            headers={'Content-Type': 'application/json'}
+        )
+        self.assertStatus(response, 400)
+
+    def _search_by_attributes(self, data, args=''):
+        return self.client.post(
+            '/tasks/by-attributes' + args,
+            data=json.dumps(data),
+            headers={'Content-Type': 'application/json'}
+        )
+
+    def test_search_tasks_by_attributes(self):
+        response = self._search_by_attributes(dict(attributes=[
+            dict(attribute_id=2, value=100, operator='>'),
+        ]))
+        self.assertStatus(response, 200)
+        self.assertEqual([task['id'] for task in
+                          json.loads(response.get_data())], [2])
+
+        # '9' > '10.0' as text, attribute 2 has to be compared as number.
+        response = self._search_by_attributes(dict(attributes=[
+            dict(attribute_id=2, value='9', operator='>'),
+            dict(attribute_id=2, value=[5, 50], operator='between'),
+        ]))
+        self.assertEqual([task['id'] for task in
+                          json.loads(response.get_data())], [1])
+
+        response = self._search_by_attributes(dict(
+            attributes=[
+                dict(attribute_id=2, value=5, operator='>'),
+                dict(attribute_id=1, value='Laptop', operator='prefix'),
+            ],
+            filter=dict(status_id=dict(value=1)),
+        ), '?fields=id,name')
+        self.assertEqual(json.loads(response.get_data()),
+                         [dict(id=2, name='Dodaj cos tam')])
+
+    def test_search_tasks_by_attributes_uses_one_scan(self):
+        data = dict(attributes=[
+            dict(attribute_id=1, value='Laptop Asus2'),
+            dict(attribute_id=2, value=100, operator='>'),
+            dict(attribute_id=3, value='laptop', operator='contains'),
+        ])
+
+        # Fill reference cache.
+        self._search_by_attributes(data, '?fields=id')
+
+        with count_queries(self.engine) as statements:
+            response = self._search_by_attributes(data, '?fields=id')
+
+        self.assertEqual(json.loads(response.get_data()), [dict(id=2)])
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(statements[0].count('FROM task_attribute_values'), 1)
+        self.assertNotIn('JOIN', statements[0])
+
+    def test_search_tasks_by_long_attribute_values(self):
+        prefix = 'x' * 300
+        db_session.add(TaskAttributeValue(1, 3, prefix + 'a'))
+        TaskAttributeValue.query.get((2, 3)).value = prefix + 'b'
+        db_session.commit()
+
+        for value, ids in ((prefix + 'a', [1]), ([prefix + 'b'], [2]),
+                           (prefix, [])):
+            response = self._search_by_attributes(dict(attributes=[
+                dict(attribute_id=3, value=value,
+                     operator='in' if isinstance(value, list) else '='),
+            ]), '?fields=id')
+
+            self.assertStatus(response, 200)
+            self.assertEqual([task['id'] for task in
+                              json.loads(response.get_data())], ids)
+
+    def test_attribute_values_index_is_bounded(self):
+        indexes = dict(self.engine.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name = 'task_attribute_values'").fetchall())
+
+        self.assertIn('substr(value, 1, 200)', indexes[
+            'ix_task_attribute_values_task_attribute_id_value_prefix'])
+        self.assertNotIn('ix_task_attribute_values_task_attribute_id_value',
+                         indexes)
+
+    def test_sort_tasks_by_attributes(self):
+        self._add_tasks_with_relations(2)
+
+        response = self._search_by_attributes(
+            dict(sort=[dict(attribute_id=2, desc=True)]), '?fields=id')
+        self.assertStatus(response, 200)
+
+        ids = [task['id'] for task in json.loads(response.get_data())]
+        values = dict((task.id, dict((value.task_attribute_id, value.value)
+                                     for value in task.content))
+                      for task in Task.query)
+
+        self.assertEqual(len(ids), len(values))
+        self.assertEqual(ids[:2], [2, 1])
+        self.assertEqual(
+            [float(values[task_id][2]) for task_id in ids],
+            sorted([float(value[2]) for value in values.values()],
+                   reverse=True))
+
+        response = self._search_by_attributes(
+            dict(sort=[dict(attribute_id=2)]), '?fields=id&limit=1')
+        self.assertEqual(json.loads(response.get_data()), [dict(id=1)])
+
+    def test_search_tasks_by_attributes_invalid(self):
+        response = self._search_by_attributes(dict(attributes=[
+            dict(attribute_id=1000, value='x')]))
+        self.assertStatus(response, 400)
+
+        response = self._search_by_attributes(dict(attributes=[
+            dict(attribute_id=2, value='cheap')]))
+        self.assertStatus(response, 400)
+
+        response = self._search_by_attributes(dict(attributes=[
+            dict(attribute_id=2, value=1, operator='is_null')]))
+        self.assertStatus(response, 400)
+
+        for operator in ('prefix', 'contains'):
+            response = self._search_by_attributes(dict(attributes=[
+                dict(attribute_id=2, value='1', operator=operator)]))
+            self.assertStatus(response, 400)
+
+        response = self._search_by_attributes(
+            dict(sort=[dict(attribute_id=2)]), '?after=' + 'WzFd')
+        self.assertStatus(response, 400)
@@ -1,3 +1,4 @@
+from unittest.mock import patch
 from tests.base import Base
 from tests.utils import is_json
 from flask import json
@@ -5,6 +6,7 @@ from models import User, Task
 from database import db_session
 from exceptions import ValidationError
 from utils import query_from_dict
+from hashing import hash_password, get_executor, shutdown_executor
 
 
 class TestUser(Base):
@@ -516,3 +518,68 @@ class TestUser(Base):
         )
 
         self.assertStatus(response, 400)
+
+    def _user_dict(self):
+        return dict(
+            login='konbis',
+            first_name='Konrad',
+            last_name='Biś',
+            password='secret',
+            is_creator=True,
+            is_contractor=True,
+            is_admin=False
+        )
+
+    def test_create_user_from_dict_hashes_password_once(self):
+        with patch('models.hash_password', wraps=hash_password) as mock:
+            user = User.create_from_dict(self._user_dict())
+
+        self.assertEqual(mock.call_count, 1)
+        self.assertTrue(user.check_password_hash('secret'))
+        self.assertFalse(user.check_password_hash('tmp'))
+
+    def test_password_hash_rounds_are_configurable(self):
+        self.app.config['BCRYPT_LOG_ROUNDS'] = 5
+        self.addCleanup(self.app.config.__setitem__, 'BCRYPT_LOG_ROUNDS', 4)
+
+        user = User.create_from_dict(self._user_dict())
+
+        self.assertEqual(user.password.split(b'$')[2], b'05')
+        self.assertTrue(user.check_password_hash('secret'))
+
+    def test_password_hash_in_process_pool(self):
+        self.app.config['PASSWORD_HASH_WORKERS'] = 1
+        self.addCleanup(shutdown_executor)
+        self.addCleanup(self.app.config.pop, 'PASSWORD_HASH_WORKERS')
+
+        response = self.client.post(
+            '/user',
+            data=json.dumps(self._user_dict()),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        self.assertStatus(response, 201)
+
+        user = User.query.filter_by(login='konbis').first()
+
+        self.assertTrue(user.check_password_hash('secret'))
+
+    def test_password_hash_pool_follows_config(self):
+        self.addCleanup(shutdown_executor)
+        self.addCleanup(self.app.config.pop, 'PASSWORD_HASH_WORKERS', None)
+
+        self.assertIsNone(get_executor())
+
+        self.app.config['PASSWORD_HASH_WORKERS'] = 1
+        executor = get_executor()
+
+        self.assertIs(get_executor(), executor)
+
+        self.app.config['PASSWORD_HASH_WORKERS'] = 2
+        resized = get_executor()
+
+        self.assertIsNot(resized, executor)
+        self.assertEqual(resized._max_workers, 2)
+
+        self.app.config['PASSWORD_HASH_WORKERS'] = 0
+        self.assertIsNone(get_executor())
@@ -1,7 +1,12 @@
 from tests.base import Base
-from utils import query_from_dict
-from validation.utils import Date
-from models import User
+from utils import query_from_dict, encode_cursor, decode_cursor, \
+    compile_filter
+from voluptuous import Invalid
+from validation.utils import Date, ValueOperatorPair
+from validation.schemas import get_schema
+from validation.schemas import task as task_schemas
+from validation.json import validate_json
+from models import User, Task
 
 
 class TestUtils(Base):
@@ -62,3 +67,155 @@ class TestUtils(Base):
 
         self.assertEqual(str(date_parse('2016-07-09T14:04:06.000').isoformat()),
                          '2016-07-09T14:04:06')
+
+    def test_cursor(self):
+        cursor = encode_cursor([1, 'abc'])
+
+        self.assertEqual(decode_cursor(cursor), [1, 'abc'])
+
+        with self.assertRaises(ValueError):
+            decode_cursor('abc')
+
+        with self.assertRaises(ValueError):
+            decode_cursor(encode_cursor([]))
+
+    def test_compile_filter_is_cached(self):
+        shape = (('first_name', '!=', None), ('id', '>', None))
+
+        criterion = compile_filter(User, shape)
+
+        self.assertIs(criterion, compile_filter(User, shape))
+        self.assertIsNot(criterion, compile_filter(User, (('id', '>', None),)))
+
+    def test_unknown_operators_share_filter(self):
+        query_from_dict(User, dict(id=dict(value=1)))
+        size = compile_filter.cache_info().currsize
+
+        for operator in ['unknown1', 'unknown2']:
+            users = query_from_dict(
+                User, dict(id=dict(value=1, operator=operator)))
+
+            self.assertEqual([user.id for user in users], [1])
+
+        self.assertEqual(compile_filter.cache_info().currsize, size)
+        self.assertIsNotNone(compile_filter.cache_info().maxsize)
+
+    def test_query_from_dict_reuses_filter_with_other_values(self):
+        for first_name in ['Daniel', 'Przemek']:
+            users = query_from_dict(
+                User, dict(first_name=dict(value=first_name)))
+            users2 = User.query.filter(User.first_name == first_name).all()
+
+            self.assertEqual(users, users2)
+
+    def test_query_from_dict_invalid_field(self):
+        with self.assertRaises(AttributeError):
+            query_from_dict(User, dict(password2=dict(value='abc')))
+
+    def test_query_from_dict_in_operator(self):
+        users = query_from_dict(User, dict(id=dict(value=[1, 3], operator='in')))
+        users2 = User.query.filter(User.id.in_([1, 3])).all()
+
+        self.assertEqual(users, users2)
+        self.assertEqual(len(users), 2)
+
+        users = query_from_dict(
+            User, dict(id=dict(value=[1, 3], operator='not_in')))
+        users2 = User.query.filter(User.id.notin_([1, 3])).all()
+
+        self.assertEqual(users, users2)
+        self.assertEqual(len(users), 1)
+
+    def test_query_from_dict_between_operator(self):
+        users = query_from_dict(
+            User, dict(id=dict(value=[2, 3], operator='between')))
+        users2 = User.query.filter(User.id.between(2, 3)).all()
+
+        self.assertEqual(users, users2)
+        self.assertEqual(len(users), 2)
+
+    def test_query_from_dict_prefix_operator(self):
+        users = query_from_dict(
+            User, dict(login=dict(value='dan', operator='prefix')))
+        users2 = User.query.filter(User.login.like('dan%')).all()
+
+        self.assertEqual(users, users2)
+        self.assertEqual(len(users), 1)
+
+    def test_query_from_dict_prefix_operator_special_values(self):
+        for value in ['Dan', 'd_n', 'da%', 'dan\U0010ffff']:
+            users = query_from_dict(
+                User, dict(login=dict(value=value, operator='prefix')))
+
+            self.assertEqual(users, [])
+
+    def test_query_from_dict_in_operator_shares_filter(self):
+        query_from_dict(User, dict(id=dict(value=[1, 2, 3], operator='in')))
+        size = compile_filter.cache_info().currsize
+
+        users = query_from_dict(
+            User, dict(id=dict(value=[1, 2, 3, 4], operator='in')))
+
+        self.assertEqual([user.id for user in users], [1, 2, 3])
+        self.assertEqual(compile_filter.cache_info().currsize, size)
+
+        users = query_from_dict(
+            User, dict(id=dict(value=[1, 2, 4], operator='not_in')))
+
+        self.assertEqual([user.id for user in users], [3])
+
+    def test_query_from_dict_contains_operator(self):
+        users = query_from_dict(
+            User, dict(last_name=dict(value='łoc', operator='contains')))
+        users2 = User.query.filter(User.last_name.like('%łoc%')).all()
+
+        self.assertEqual(users, users2)
+        self.assertEqual(len(users), 2)
+
+        users = query_from_dict(
+            User, dict(last_name=dict(value='%', operator='contains')))
+
+        self.assertEqual(users, [])
+
+    def test_query_from_dict_is_null_operator(self):
+        tasks = query_from_dict(
+            Task, dict(contractor_id=dict(value=True, operator='is_null')))
+
+        self.assertEqual(tasks, Task.query.all())
+
+        tasks = query_from_dict(
+            Task, dict(contractor_id=dict(value=False, operator='is_null')))
+
+        self.assertEqual(tasks, [])
+
+    def test_value_operator_pair_validation(self):
+        validate = ValueOperatorPair(int)
+
+        self.assertEqual(validate(dict(value=['1', 2], operator='in')), [1, 2])
+        self.assertEqual(validate(dict(value=True, operator='is_null')), True)
+        self.assertEqual(
+            validate(dict(value=[1, 2], operator='between')), [1, 2])
+
+        invalid_values = [
+            dict(value=[], operator='in'),
+            dict(value=1, operator='not_in'),
+            dict(value=[1, 2, 3], operator='between'),
+            dict(value=1, operator='is_null'),
+            dict(value='1', operator='prefix'),
+        ]
+
+        for value in invalid_values:
+            with self.assertRaises(Invalid):
+                validate(value)
+
+    def test_get_schema(self):
+        self.assertIs(get_schema('task', 'create'), task_schemas.create)
+
+        with self.assertRaises(ImportError):
+            get_schema('not_existing', 'create')
+
+        with self.assertRaises(AttributeError):
+            get_schema('task', 'not_existing')
+
+        with self.assertRaises(AttributeError):
+            validate_json('task', 'not_existing')
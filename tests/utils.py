@@ -1,5 +1,8 @@
+from contextlib import contextmanager
 from json.decoder import JSONDecodeError
 from flask.json import loads as json_loads
+from sqlalchemy import event
+from json_backend import dumps
 
 def is_json(data):
     try:
@@ -7,3 +10,23 @@ def is_json(data):
     except JSONDecodeError:
         return False
     return True
+
+
+def to_json(data):
+    """Data as it is sent in response body, eg. with dates as strings."""
+    return json_loads(dumps(data))
+
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
@@ -1,42 +1,370 @@
+import json
+import operator
+from collections import namedtuple
+from functools import lru_cache
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from binascii import Error as Base64Error
+from sqlalchemy import and_, or_, func, inspect, bindparam
 from database import db_session
 
 
-def query_from_dict(Class, data):
+LIST_OPTIONS = ('limit', 'after', 'stream')
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+FIELDSET_OPTIONS = ('fields', 'include')
+
+
+def _compare(compare):
+    def build(column, name, arity):
+        return compare(column, bindparam(name))
+
+    return build
+
+
+def _bind_value(name, value):
+    return {name: value}
+
+
+def _list_arity(value):
+    """
+    Number of bind parameters for list value, rounded up to a power of two,
+    so that lists of similar length share one compiled filter.
+    """
+    arity = 1
+
+    while arity < len(value):
+        arity *= 2
+
+    return arity
+
+
+def _bind_list(name, value):
+    # Padded with the last item, which does not change result of IN.
+    value = list(value) + value[-1:] * (_list_arity(value) - len(value))
+
+    return dict(('%s_%d' % (name, i), item) for i, item in enumerate(value))
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _bind_prefix(name, value):
+    return {name + '_0': _escape_like(value) + '%', name + '_1': len(value),
+            name + '_2': value}
+
+
+def _bind_contains(name, value):
+    return {name: '%' + _escape_like(value) + '%'}
+
+
+def _bind_nothing(name, value):
+    return dict()
+
+
+def _list_binds(name, arity):
+    return [bindparam('%s_%d' % (name, i)) for i in range(arity)]
+
+
+def _in(column, name, arity):
+    return column.in_(_list_binds(name, arity))
+
+
+def _not_in(column, name, arity):
+    return column.notin_(_list_binds(name, arity))
+
+
+def _between(column, name, arity):
+    return column.between(*_list_binds(name, 2))
+
+
+def _prefix(column, name, arity):
+    # LIKE can use index (with pattern ops on PostgreSQL), but it ignores
+    # case on SQLite, so the prefix is compared exactly too.
+    pattern, length, value = _list_binds(name, 3)
+
+    return and_(column.like(pattern, escape='\\'),
+                func.substr(column, 1, length) == value)
+
+
+def _contains(column, name, arity):
+    return column.like(bindparam(name), escape='\\')
+
+
+def _is_null(column, name, arity):
+    return column.is_(None) if arity else column.isnot(None)
+
+
+Operator = namedtuple('Operator', ['build', 'bind', 'arity'])
+
+OPERATORS = {
+    '=': Operator(_compare(operator.eq), _bind_value, None),
+    '!=': Operator(_compare(operator.ne), _bind_value, None),
+    '>': Operator(_compare(operator.gt), _bind_value, None),
+    '<': Operator(_compare(operator.lt), _bind_value, None),
+    '>=': Operator(_compare(operator.ge), _bind_value, None),
+    '<=': Operator(_compare(operator.le), _bind_value, None),
+    'in': Operator(_in, _bind_list, _list_arity),
+    'not_in': Operator(_not_in, _bind_list, _list_arity),
+    'between': Operator(_between, _bind_list, None),
+    'prefix': Operator(_prefix, _bind_prefix, None),
+    'contains': Operator(_contains, _bind_contains, None),
+    'is_null': Operator(_is_null, _bind_nothing, bool),
+}
+
+# Number of compiled filters kept, least recently used are dropped.
+FILTER_PLAN_CACHE_SIZE = 1024
+
+_filter_columns = dict()
+
+
+def operator_name(name):
+    """Name of operator, '=' for unknown ones."""
+    return name if name in OPERATORS else '='
+
+
+def get_operator(name):
+    return OPERATORS[operator_name(name)]
+
+
+def get_filter_columns(Class):
+    """
+    Columns of Class which can be used in filters, cached per model.
+    """
+    columns = _filter_columns.get(Class)
+
+    if columns is None:
+        columns = dict(
+            (prop.key, getattr(Class, prop.key))
+            for prop in inspect(Class).column_attrs
+        )
+        _filter_columns[Class] = columns
+
+    return columns
+
+
+@lru_cache(maxsize=FILTER_PLAN_CACHE_SIZE)
+def compile_filter(Class, shape):
+    """
+    Compile filter for Class from shape - tuple of (field, operator, arity)
+    triples, where arity is part of the value which changes the SQL (number
+    of items for 'in', whether 'is_null' is true).
+
+    Returned criterion uses bind parameters named after fields, so it is
+    built once per shape and reused with different values. Unknown
+    operators are treated as '='; callers pass names normalized by
+    operator_name, so they do not add cache entries.
+    """
+    columns = get_filter_columns(Class)
+    clauses = []
+
+    for field, op_name, arity in shape:
+        try:
+            column = columns[field]
+        except KeyError:
+            raise AttributeError(field)
+
+        build = get_operator(op_name).build
+        clauses.append(build(column, 'filter_' + field, arity))
+
+    return and_(*clauses)
+
+
+def filter_from_dict(Class, data, query=None):
     if not isinstance(data, dict):
         raise TypeError('Second parameter should be instance of dict')
     if not hasattr(Class, 'query'):
         raise TypeError
 
-    query = Class.query
+    if query is None:
+        query = Class.query
 
     if not hasattr(query, 'all') or not hasattr(query, 'filter'):
         raise TypeError('Class is not instance of sqlalchemy model')
 
-    for key, item in data.items():
+    shape = []
+    params = dict()
+
+    for key, item in sorted(data.items()):
         if not isinstance(item, dict):
             raise TypeError(
                 'Bad formated data. Each item in data should have value of dict=(value='', operator='')')
 
-        if 'operator' in item:
-            operator = item['operator']
-        else:
-            operator = '='
-
+        op_name = operator_name(item.get('operator', '='))
         value = item['value']
+        arity = get_operator(op_name).arity
+
+        shape.append((key, op_name, arity and arity(value)))
+        params.update(get_operator(op_name).bind('filter_' + key, value))
+
+    if not shape:
+        return query
 
-        if operator == '!=':
-            query = query.filter(getattr(Class, key) != value)
-        elif operator == '>':
-            query = query.filter(getattr(Class, key) > value)
-        elif operator == '<':
-            query = query.filter(getattr(Class, key) < value)
-        elif operator == '>=':
-            query = query.filter(getattr(Class, key) >= value)
-        elif operator == '<=':
-            query = query.filter(getattr(Class, key) <= value)
-        else:
-            query = query.filter(getattr(Class, key) == value)
-
-    rv = query.all()
+    return query.filter(compile_filter(Class, tuple(shape))).params(**params)
+
+
+def query_from_dict(Class, data, query=None):
+    rv = filter_from_dict(Class, data, query).all()
 
     return rv
+
+
+def encode_cursor(values):
+    """Encode list of key values into opaque, url safe cursor."""
+    data = json.dumps(list(values), separators=(',', ':'))
+
+    return urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decode cursor created by encode_cursor.
+
+    Raises ValueError if cursor is malformed.
+    """
+    try:
+        values = json.loads(urlsafe_b64decode(
+            cursor.encode('ascii')).decode('utf-8'))
+    except (Base64Error, UnicodeError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+    if not isinstance(values, list) or not values:
+        raise ValueError('Invalid cursor')
+
+    return values
+
+
+def split_list_options(args):
+    """
+    Split request args into filters and list options (see LIST_OPTIONS).
+
+    List options are converted to values accepted by paginate, the same
+    way as by their validators in listing schema.
+    """
+    # Imported here, validation imports this module.
+    from validation.schemas import listing
+
+    filters = dict(args)
+    options = dict()
+
+    for name in LIST_OPTIONS:
+        if name in filters:
+            options[name] = filters.pop(name)
+
+    if 'limit' in options:
+        options['limit'] = int(options['limit'])
+
+    if 'after' in options:
+        options['after'] = decode_cursor(options['after'])
+
+    if 'stream' in options:
+        options['stream'] = listing.options['stream'](options['stream'])
+
+    return filters, options
+
+
+def split_fieldset(args):
+    """
+    Pop 'fields' and 'include' from args and split their comma separated
+    values. Returns tuple (fields, include), None for missing option.
+    """
+    return tuple(
+        tuple(name for name in args.pop(option).split(',') if name)
+        if option in args else None
+        for option in FIELDSET_OPTIONS
+    )
+
+
+def get_key_columns(Class):
+    return inspect(Class).primary_key
+
+
+def _matches_type(column, value):
+    """True if value (decoded from cursor) has type of column."""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return True
+
+    if python_type is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    if python_type is float:
+        return isinstance(value, (int, float)) and \
+            not isinstance(value, bool)
+
+    return isinstance(value, python_type)
+
+
+def keyset_criterion(columns, values):
+    """
+    Criterion selecting rows which come after values in order of columns.
+
+    For composite keys (a, b) it builds: a > x OR (a = x AND b > y).
+
+    Raises ValueError if number or types of values do not match columns.
+    """
+    if len(columns) != len(values) or not all(
+            _matches_type(column, value)
+            for column, value in zip(columns, values)):
+        raise ValueError('Invalid cursor')
+
+    clauses = []
+
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*(equal + [column > values[i]])))
+
+    return or_(*clauses)
+
+
+def paginate(query, Class, limit=None, after=None):
+    """
+    Keyset pagination on primary key of Class.
+
+    Returns list of items and cursor for the next page or None if there
+    are no more items. Without limit all items are returned.
+    """
+    columns = get_key_columns(Class)
+
+    if after is not None:
+        query = query.filter(keyset_criterion(columns, after))
+
+    if limit is None:
+        if after is not None:
+            query = query.order_by(*columns)
+
+        return query.all(), None
+
+    items = query.order_by(*columns).limit(limit + 1).all()
+
+    if len(items) <= limit:
+        return items, None
+
+    items = items[:limit]
+    last = items[-1]
+    cursor = encode_cursor(getattr(last, column.key) for column in columns)
+
+    return items, cursor
+
+
+def iterate_batches(query, Class, batch_size, limit=None, after=None):
+    """
+    Iterate over items from query in batches of batch_size.
+
+    Each batch is a separate keyset query, so only one batch is held in
+    memory at a time and eager loading options of query still apply.
+    """
+    while limit is None or limit > 0:
+        if limit is not None:
+            batch_size = min(batch_size, limit)
+            limit -= batch_size
+
+        items, cursor = paginate(query, Class, batch_size, after)
+
+        if items:
+            yield items
+
+        if cursor is None:
+            break
+
+        after = decode_cursor(cursor)
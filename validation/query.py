@@ -1,9 +1,9 @@
-from flask import request, jsonify
+from flask import request
+from json_backend import jsonify
 from functools import wraps
 from voluptuous import MultipleInvalid, Invalid
-from validation import schemas
+from validation.schemas import get_schema
 from flask.json import loads as json_loads
-from importlib import import_module
 
 
 def validate_query(filename, schema_name):
@@ -11,14 +11,14 @@ def validate_query(filename, schema_name):
     Decorator for validating requests.args.
 
     Function uses schema 'schema_name' which can be find in
-    '/validation/schemas/filename.py'
+    '/validation/schemas/filename.py'. Schema is resolved once, when the
+    decorator is applied.
     """
+    schema = get_schema(filename, schema_name)
+
     def decorator(f):
         @wraps(f)
         def wrapper(*args, **kw):
-            mod = import_module('validation.schemas.' + filename)
-            schema = getattr(mod, schema_name)
-
             try:
                 schema(request.args.to_dict())
             except MultipleInvalid as e:
@@ -0,0 +1,23 @@
+import os
+from importlib import import_module
+
+
+def get_schema(filename, schema_name):
+    """
+    Return schema 'schema_name' from '/validation/schemas/filename.py'.
+
+    Raises ImportError or AttributeError if there is no such schema.
+    """
+    module = import_module('validation.schemas.' + filename)
+
+    return getattr(module, schema_name)
+
+
+def load_schemas():
+    """
+    Import all schema modules, so every schema is compiled at startup
+    instead of on first request which uses it.
+    """
+    for module in os.listdir(os.path.dirname(__file__)):
+        if module != '__init__.py' and module[-3:] == '.py':
+            import_module('validation.schemas.' + module[:-3])
@@ -1,5 +1,6 @@
 from voluptuous import All, Length, Schema, ALLOW_EXTRA, Required
 from validation.utils import Coerce, ValueOperatorPair
+from validation.schemas import listing
 
 name_min = 1
 name_max = 128
@@ -26,11 +27,11 @@ query = Schema(
         'type_id': Coerce(int),
         'id': Coerce(int),
     },
-)
+).extend(listing.options)
 
 search = Schema(
     {
-        'name': All(ValueOperatorPair(str), Length(min=name_min, max=name_max)),
+        'name': ValueOperatorPair(All(str, Length(min=name_min, max=name_max))),
         'type_id': ValueOperatorPair(int),
         'id': ValueOperatorPair(int),
     },
@@ -1,5 +1,6 @@
 from voluptuous import All, Length, Schema, ALLOW_EXTRA, Required
 from validation.utils import Coerce, ValueOperatorPair
+from validation.schemas import listing
 
 
 update = Schema(
@@ -29,7 +30,7 @@ query = Schema(
         'sort': Coerce(int),
         'rules': str
     },
-)
+).extend(listing.options)
 
 search = Schema(
     {
@@ -1,5 +1,6 @@
 from voluptuous import All, Length, Schema, ALLOW_EXTRA, Required
 from validation.utils import Coerce, ValueOperatorPair
+from validation.schemas import listing
 
 name_min = 1
 name_max = 128
@@ -23,11 +24,11 @@ query = Schema(
         'id': Coerce(int),
         'name': All(str, Length(min=name_min, max=name_max)),
     },
-)
+).extend(listing.options)
 
 search = Schema(
     {
         'id': ValueOperatorPair(int),
-        'name': All(ValueOperatorPair(str), Length(min=name_min, max=name_max)),
+        'name': ValueOperatorPair(All(str, Length(min=name_min, max=name_max))),
     },
 )
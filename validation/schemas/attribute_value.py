@@ -1,7 +1,10 @@
 from voluptuous import All, Length, Schema, ALLOW_EXTRA, Required
 from validation.utils import Coerce, ValueOperatorPair
+from validation.schemas import listing
 
 value_min = 1
+bulk_min = 1
+bulk_max = 1000
 
 update = Schema(
     {
@@ -21,18 +24,25 @@ create = Schema(
     extra=ALLOW_EXTRA
 )
 
+# Row of bulk import.
+import_row = create
+
 query = Schema(
     {
         'value': All(str, Length(min=value_min)),
         'task_id': Coerce(int),
         'task_attribute_id': Coerce(int),
     },
-)
+).extend(listing.options)
 
 search = Schema(
     {
-        'value': All(ValueOperatorPair(str), Length(min=value_min)),
+        'value': ValueOperatorPair(All(str, Length(min=value_min))),
         'task_id': ValueOperatorPair(int),
         'task_attribute_id': ValueOperatorPair(int),
     },
 )
+
+bulk_create = Schema(
+    All([create], Length(min=bulk_min, max=bulk_max))
+)
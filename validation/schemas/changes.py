@@ -0,0 +1,8 @@
+from voluptuous import Schema
+from validation.utils import Cursor
+from validation.schemas.listing import options
+
+query = Schema({
+    'since': Cursor(),
+    'limit': options['limit'],
+})
@@ -0,0 +1,7 @@
+from voluptuous import Any, In, Schema
+from validation.utils import Date
+
+query = Schema({
+    'format': In(['ndjson', 'csv']),
+    'since': Any(Date(), Date('%Y-%m-%dT%H:%M:%S')),
+})
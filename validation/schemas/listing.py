@@ -0,0 +1,13 @@
+from voluptuous import All, Boolean, Range, Schema
+from validation.utils import Coerce, Cursor
+
+limit_min = 1
+limit_max = 1000
+
+options = {
+    'limit': All(Coerce(int), Range(min=limit_min, max=limit_max)),
+    'after': Cursor(),
+    'stream': Boolean(),
+}
+
+query = Schema(options)
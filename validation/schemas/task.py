@@ -1,8 +1,21 @@
-from voluptuous import All, Length, Schema, ALLOW_EXTRA, Required
-from validation.utils import Coerce, ValueOperatorPair, Date
+from voluptuous import All, Any, In, Length, Schema, ALLOW_EXTRA, Required
+from validation.utils import Coerce, ValueOperatorPair, Date, FieldList
+from validation.schemas import listing, attribute_value
 
 name_min = 1
 name_max = 128
+bulk_min = 1
+bulk_max = 1000
+
+# See Task.FIELDS and Task.EMBEDDED.
+fieldset = {
+    'fields': FieldList(('id', 'name', 'external_identifier', 'type_id',
+                         'status_id', 'creator_id', 'contractor_id',
+                         'create_date', 'end_date')),
+    'include': FieldList(('content', 'status', 'creator', 'contractor')),
+}
+
+item = Schema(fieldset, extra=ALLOW_EXTRA)
 
 update = Schema(
     {
@@ -32,7 +45,27 @@ create = Schema(
     extra=ALLOW_EXTRA
 )
 
-query = Schema(
+# Row of bulk import (eg. of exported tasks), dates are converted to
+# datetime. Not an extension of create, whose date fields (checked by
+# Length after conversion) reject every value.
+import_date = Any(Date(), Date('%Y-%m-%dT%H:%M:%S'))
+
+import_row = Schema(
+    {
+        'id': int,
+        Required('name'): All(str, Length(min=name_min, max=name_max)),
+        'external_identifier': Any(None, All(str, Length(min=name_min, max=name_max))),
+        Required('type_id'): int,
+        'end_date': Any(None, import_date),
+        'create_date': import_date,
+        Required('status_id'): int,
+        Required('creator_id'): int,
+        'contractor_id': Any(None, int),
+    },
+    extra=ALLOW_EXTRA
+)
+
+count = Schema(
     {
         'id': Coerce(int),
         'name': All(str, Length(min=name_min, max=name_max)),
@@ -46,16 +79,112 @@ query = Schema(
     },
 )
 
+query = count.extend(listing.options).extend(fieldset)
+
+list_options = listing.query.extend(fieldset)
+
+# Full-text search, see search module.
+text_search = Schema(
+    {
+        Required('q'): All(str, Length(min=1, max=256)),
+        'limit': listing.options['limit'],
+        'after': listing.options['after'],
+    },
+).extend(fieldset)
+
 search = Schema(
     {
         'id': ValueOperatorPair(int),
-        'name': All(ValueOperatorPair(str), Length(min=name_min, max=name_max)),
-        'external_identifier': All(ValueOperatorPair(str), Length(min=name_min, max=name_max)),
+        'name': ValueOperatorPair(All(str, Length(min=name_min, max=name_max))),
+        'external_identifier': ValueOperatorPair(All(str, Length(min=name_min, max=name_max))),
         'type_id': ValueOperatorPair(int),
-        'end_date': All(ValueOperatorPair(Date()), Length(min=name_min, max=name_max)),
-        'create_date': All(ValueOperatorPair(Date()), Length(min=name_min, max=name_max)),
+        'end_date': ValueOperatorPair(Date()),
+        'create_date': ValueOperatorPair(Date()),
         'status_id': ValueOperatorPair(int),
         'creator_id': ValueOperatorPair(int),
         'contractor_id': ValueOperatorPair(int),
     },
 )
+
+content = Schema(
+    {
+        Required('task_attribute_id'): int,
+        Required('value'): All(str, Length(min=attribute_value.value_min)),
+    },
+)
+
+bulk_create = Schema(
+    All([create.extend({'content': [content]})],
+        Length(min=bulk_min, max=bulk_max))
+)
+
+changes = Schema(
+    {
+        'name': All(str, Length(min=name_min, max=name_max)),
+        'external_identifier': Any(None, All(str, Length(min=name_min, max=name_max))),
+        'type_id': int,
+        'status_id': int,
+        'creator_id': int,
+        'contractor_id': Any(None, int),
+    },
+)
+
+bulk_update = Schema(
+    {
+        Required('filter'): All(search, Length(min=1)),
+        Required('changes'): All(changes, Length(min=1)),
+    },
+)
+
+bulk_delete = Schema(
+    {
+        Required('filter'): All(search, Length(min=1)),
+    },
+)
+
+# See aggregates.GROUP_COLUMNS, DATE_COLUMNS and DATE_BUCKETS.
+groups = ['status_id', 'type_id', 'creator_id', 'contractor_id'] + [
+    column + ':' + bucket
+    for column in ('create_date', 'end_date')
+    for bucket in ('day', 'month', 'year')
+]
+
+aggregate = Schema(
+    {
+        Required('group_by'): All([In(groups)], Length(min=1, max=4)),
+        'filter': search,
+    },
+)
+
+# Operators of attribute conditions, see attribute_search.
+attribute_operators = ['=', '!=', '>', '<', '>=', '<=', 'in', 'not_in',
+                       'between', 'prefix', 'contains']
+
+attribute_value_type = Any(str, int, float)
+
+attribute_condition = All(
+    Schema(
+        {
+            Required('attribute_id'): int,
+            Required('value'): Any(attribute_value_type,
+                                   [attribute_value_type]),
+            'operator': In(attribute_operators),
+        },
+    ),
+    ValueOperatorPair(attribute_value_type),
+)
+
+attribute_sort = Schema(
+    {
+        Required('attribute_id'): int,
+        'desc': bool,
+    },
+)
+
+attribute_search = Schema(
+    {
+        'filter': search,
+        'attributes': All([attribute_condition], Length(max=20)),
+        'sort': All([attribute_sort], Length(max=5)),
+    },
+)
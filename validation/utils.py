@@ -1,5 +1,6 @@
 from voluptuous import Invalid
 from datetime import datetime
+from utils import decode_cursor, OPERATORS
 
 
 def Coerce(type, msg=None):
@@ -16,7 +17,23 @@ def Coerce(type, msg=None):
     return f
 
 
+LIST_OPERATORS = ('in', 'not_in')
+TEXT_OPERATORS = ('prefix', 'contains')
+
+
 def ValueOperatorPair(type):
+    """Validate dict(value=..., operator=...) used by utils.filter_from_dict.
+
+    'type' is applied to value, or to each item of value for 'in', 'not_in'
+    and 'between'. Value of 'is_null' has to be bool, 'prefix' and
+    'contains' can be used only with text fields.
+    """
+    def coerce(value):
+        try:
+            return type(value)
+        except ValueError:
+            raise Invalid('Expected %s' % type.__name__)
+
     def f(v):
         if not isinstance(v, dict):
             raise Invalid('expected dict')
@@ -25,17 +42,61 @@ def ValueOperatorPair(type):
             operator = v['operator']
         else:
             operator = '='
+        if not isinstance(operator, str) or operator not in OPERATORS:
+            raise Invalid('Unknown operator')
         if 'value' not in v:
             raise Invalid("Expected dict which has 'value' key")
         value = v['value']
 
-        try:
-            return type(value)
-        except ValueError:
-            raise Invalid('Expected %s' % type.__name__)
+        if operator in LIST_OPERATORS:
+            if not isinstance(value, list) or not value:
+                raise Invalid('Expected non empty list')
+
+            return [coerce(item) for item in value]
+
+        if operator == 'between':
+            if not isinstance(value, list) or len(value) != 2:
+                raise Invalid('Expected list of two values')
+
+            return [coerce(item) for item in value]
+
+        if operator == 'is_null':
+            if not isinstance(value, bool):
+                raise Invalid('Expected bool')
+
+            return value
+
+        rv = coerce(value)
+
+        if operator in TEXT_OPERATORS and (not isinstance(rv, str) or not rv):
+            raise Invalid('Operator %s expects non empty text' % operator)
+
+        return rv
     return f
 
 
 def Date(fmt='%Y-%m-%dT%H:%M:%S.%f'):
     return lambda v: datetime.strptime(v, fmt)
     # YYYY-MM-DDTHH:MM:SS
+
+
+def Cursor(msg=None):
+    def f(v):
+        try:
+            return decode_cursor(v)
+        except (ValueError, AttributeError):
+            raise Invalid(msg or 'Expected cursor')
+    return f
+
+
+def FieldList(choices, msg=None):
+    """Validate comma separated list of names, each of them in choices."""
+    def f(v):
+        names = [name for name in v.split(',') if name]
+
+        for name in names:
+            if name not in choices:
+                raise Invalid(msg or 'Unknown field %s' % name)
+
+        return names
+    return f